@@ -0,0 +1,510 @@
+# Written by Jacques Boucher
+# email: jjrboucher@gmail.com
+#
+# Artifact benchmark with regression tracking: runs each artifact (every query function in SQLite/*.py,
+# get_chromium_bookmarks, Preferences, ChromeExtensions, Search Terms) and a whole Excel run against synthetic
+# fixture profiles of fixed sizes (see synthetic_profile.py), each in a fresh Python process, and records the wall
+# time, peak RSS and output size of each one in a results history file.
+#
+# Each run is compared with the latest run in the history that passed, on the same machine and fixtures (or with
+# the one given by --baseline); the script fails (exit code 1) if a benchmark got slower, used more memory or
+# produced a larger output by more than the threshold, or fails where it used to work. Run it before and after
+# upgrading to see whether the new release makes case runs slower.
+#
+# Examples:
+#   python Benchmarks/artifact_benchmark.py
+#   python Benchmarks/artifact_benchmark.py --fixtures small medium large --runs 5 --label "before upgrade"
+#   python Benchmarks/artifact_benchmark.py -k history -k bookmarks --no-record
+
+import argparse
+import datetime
+import importlib
+import inspect
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPOSITORY)
+
+from Benchmarks.synthetic_profile import GENERATOR_VERSION, MANIFEST, generate_profile
+from Classes.ParserSettings import __version__, CHUNK_SIZE, MAX_WORKERS
+
+RESULTS_FORMAT = 1  # version of the records in the history file; records of other versions are not compared
+HISTORY_FILE = os.path.join(REPOSITORY, 'Benchmarks', 'results', 'artifact_benchmark.jsonl')
+FIXTURES_FOLDER = os.path.join(REPOSITORY, 'Benchmarks', 'fixtures')
+FIXTURE_SEED = 1
+
+# Fixture name -> visits in its History (see synthetic_profile.table_sizes for the other tables)
+FIXTURES = {
+    'small': 10000,
+    'medium': 100000,
+    'large': 1000000,
+    'huge': 10000000,
+}
+
+# Query module in SQLite/ -> database file it runs against, relative to the profile folder
+QUERY_DATABASES = {
+    'history': 'History',
+    'downloads': 'History',
+    'searchterms': 'History',
+    'WebData': 'Web Data',
+    'logindata': 'Login Data',
+    'cookies': 'Network/Cookies',
+    'favicons': 'Favicons',
+    'shortcuts': 'Shortcuts',
+    'topsites': 'Top Sites',
+    'webasssist': 'WebAssistDatabase',
+}
+
+# Decoded WebKit timestamps of each chunk compared with integer arithmetic by check_timestamps, per column
+TIMESTAMP_SAMPLE = 100
+
+# Differences too small to count as regressions, whatever the threshold (timer and allocator noise)
+MIN_SECONDS = 0.05
+MIN_RSS_BYTES = 16 * 2 ** 20
+MIN_OUTPUT_BYTES = 4096
+
+# Measurements compared with the baseline: result key -> (label, smallest difference that counts)
+MEASUREMENTS = {
+    'seconds': ('wall time', MIN_SECONDS),
+    'peak_rss_bytes': ('peak RSS', MIN_RSS_BYTES),
+    'output_bytes': ('output size', MIN_OUTPUT_BYTES),
+}
+
+
+def query_targets():
+    """
+    Benchmarks of the query functions of SQLite/*.py: every function of a module that takes no argument (and
+    returns its SQL and worksheet name).
+    :return: dict of benchmark name -> (database file, module name, function name)
+    """
+    targets = {}
+    for module_name, database in QUERY_DATABASES.items():
+        module = importlib.import_module(f'SQLite.{module_name}')
+        for name, function in inspect.getmembers(module, inspect.isfunction):
+            if function.__module__ == module.__name__ and not inspect.signature(function).parameters:
+                targets[f'SQLite/{module_name}.py:{name}'] = (database, module_name, name)
+    return targets
+
+
+# Benchmarks that are not a single query: name -> function of this module that runs it
+OTHER_TARGETS = {
+    'JSON/bookmarks.py:get_chromium_bookmarks': 'run_bookmarks',
+    'Classes/Preferences.py:Preferences': 'run_preferences',
+    'Classes/ChromeExtensions.py:ChromeExtensions': 'run_extensions',
+    'Search Terms': 'run_search_terms',
+    'Excel write (all artifacts)': 'run_excel',
+}
+
+
+def all_targets():
+    """
+    Every benchmark, in the order they run.
+    :return: list of benchmark names
+    """
+    return list(query_targets()) + list(OTHER_TARGETS)
+
+
+def dataframe_size(dataframe):
+    """
+    Output size of an artifact that produces a dataframe.
+    :param dataframe: pandas DataFrame
+    :return: (rows, bytes of memory it takes, strings included)
+    """
+    return len(dataframe), int(dataframe.memory_usage(index=False, deep=True).sum())
+
+
+def check_timestamps(chunk, worksheet):
+    """
+    Check that the decoded WebKit timestamps of a chunk are exact to the microsecond, in columns with missing
+    values too: their raw values must not have been read as float64, which cannot hold 17 digits exactly.
+    Raises ValueError otherwise, which fails the benchmark.
+    :param chunk: chunk returned by the worksheet's query, decoded
+    :param worksheet: name of the worksheet
+    """
+    from Functions.timestamps import TIMESTAMP_COLUMNS, WEBKIT, webkit_timestamp_to_datetime
+
+    for raw_column, decoded_column, kind, *_ in TIMESTAMP_COLUMNS.get(worksheet, []):
+        if kind != WEBKIT or raw_column not in chunk.columns:
+            continue
+        raw = chunk[raw_column]
+        if raw.dtype.kind == 'f':
+            raise ValueError(f'{worksheet}: {raw_column} was read as {raw.dtype}, its timestamps are not exact')
+        # Chromium's null time (0), missing values and text are not timestamps
+        timestamps = [(position, value) for position, value in enumerate(raw.tolist())
+                      if isinstance(value, int) and value != 0]
+        for position, value in timestamps[:TIMESTAMP_SAMPLE]:
+            decoded = chunk[decoded_column].iloc[position]
+            if decoded != webkit_timestamp_to_datetime(value):
+                raise ValueError(f'{worksheet}: {raw_column} {value} decoded as {decoded}')
+
+
+def run_query(profile_path, work_folder, database, module_name, function_name):
+    """
+    Run a query as the engine does: in chunks from the shared read-only connection, decoding each chunk (and
+    checking its decoded timestamps, see check_timestamps).
+    """
+    from Classes.DatabaseConnections import DatabaseConnections
+    from Classes.ParserEngine import ParserEngine
+    from Functions.sql_frames import read_sql_query
+
+    db_file = os.path.join(profile_path, *database.split('/'))
+    if not os.path.isfile(db_file):
+        raise FileNotFoundError(f'{database} is not in the fixture')
+    query, worksheet = getattr(importlib.import_module(f'SQLite.{module_name}'), function_name)()
+
+    rows = size = 0
+    with DatabaseConnections() as connections:
+        for chunk in read_sql_query(query, connections.get(db_file), chunksize=CHUNK_SIZE):
+            chunk_rows, chunk_size = dataframe_size(ParserEngine.decode_columns(chunk, worksheet))
+            check_timestamps(chunk, worksheet)
+            rows += chunk_rows
+            size += chunk_size
+    return rows, size
+
+
+def run_bookmarks(profile_path, work_folder):
+    """Bookmarks file parsed into its dataframe."""
+    from JSON.bookmarks import get_chromium_bookmarks
+    bookmarks, _ = get_chromium_bookmarks(os.path.join(profile_path, 'Bookmarks'))
+    return dataframe_size(bookmarks)
+
+
+def run_preferences(profile_path, work_folder):
+    """Preferences file flattened into its dataframe, as the engine does."""
+    from Classes.ParserEngine import ParserEngine
+    return dataframe_size(ParserEngine(profile_path, os.path.join(work_folder, 'unused.xlsx')).process_preferences())
+
+
+def run_extensions(profile_path, work_folder):
+    """Extension manifests of the profile scanned, as the engine does."""
+    from Classes.ParserEngine import ParserEngine
+    extensions, _, _ = ParserEngine(profile_path, os.path.join(work_folder, 'unused.xlsx')).process_extensions()
+    return dataframe_size(extensions)
+
+
+def run_search_terms(profile_path, work_folder):
+    """Search terms of History joined with the search engines of Web Data, as the engine does."""
+    from Classes.DatabaseConnections import DatabaseConnections
+    from Classes.ParserEngine import ParserEngine
+    engine = ParserEngine(profile_path, os.path.join(work_folder, 'unused.xlsx'))
+    with DatabaseConnections() as engine.connections:
+        search_terms, _ = engine.process_search_terms()
+    return dataframe_size(search_terms)
+
+
+def run_excel(profile_path, work_folder):
+    """Whole run of the default artifacts to a workbook, as the GUI and the CLI do."""
+    from Classes.ParserEngine import ParserEngine
+    output_path = os.path.join(work_folder, 'output.xlsx')
+    engine = ParserEngine(profile_path, output_path, max_workers=MAX_WORKERS)
+    if not engine.run():
+        raise RuntimeError('the run did not complete')
+    return sum(record_count for _, record_count in engine.record_counts), os.path.getsize(output_path)
+
+
+def peak_rss():
+    """
+    Peak resident set size of this process.
+    :return: bytes, or None if it cannot be measured on this platform
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset
+        except (ImportError, AttributeError):
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # bytes on macOS, KiB elsewhere
+
+
+def run_target(target, profile_path):
+    """
+    Run one benchmark in this process (called in a fresh interpreter by measure).
+    :param target: benchmark name
+    :param profile_path: fixture profile folder
+    :return: dict with seconds, peak_rss_bytes, rows and output_bytes, or with error if the benchmark failed
+    """
+    queries = query_targets()
+    for module in ('pandas', 'Classes.DatabaseConnections', 'Classes.ParserEngine', 'JSON.bookmarks'):
+        importlib.import_module(module)  # loading the code is not part of the benchmark (see import_time.py)
+    with tempfile.TemporaryDirectory() as work_folder:
+        if target in queries:
+            run = lambda: run_query(profile_path, work_folder, *queries[target])
+        else:
+            run = lambda: globals()[OTHER_TARGETS[target]](profile_path, work_folder)
+        start = time.perf_counter()
+        try:
+            rows, output_bytes = run()
+        except Exception as e:
+            return {'error': f'{type(e).__name__}: {" ".join(str(e).split())}'}
+        seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'peak_rss_bytes': peak_rss(), 'rows': rows, 'output_bytes': output_bytes}
+
+
+def measure(target, profile_path, runs):
+    """
+    Run a benchmark in fresh interpreters, so that each one starts cold and its peak RSS is its own.
+    :param target: benchmark name
+    :param profile_path: fixture profile folder
+    :param runs: number of runs; the median of each measurement is kept
+    :return: dict with seconds, peak_rss_bytes, rows, output_bytes (medians) and error (None if every run worked)
+    """
+    results = []
+    for _ in range(runs):
+        process = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', target, profile_path],
+                                 cwd=REPOSITORY, capture_output=True, text=True)
+        if process.returncode != 0:  # crashed (e.g. out of memory) rather than failed
+            lines = process.stderr.strip().splitlines() or [f'exit code {process.returncode}']
+            result = {'error': lines[-1]}
+        else:
+            result = json.loads(process.stdout.strip().splitlines()[-1])
+        if 'error' in result:
+            return {'seconds': None, 'peak_rss_bytes': None, 'rows': None, 'output_bytes': None, **result}
+        results.append(result)
+
+    def median(key):
+        values = [result[key] for result in results if result[key] is not None]
+        return statistics.median(values) if values else None
+
+    return {'seconds': round(median('seconds'), 6), 'peak_rss_bytes': median('peak_rss_bytes'),
+            'rows': results[-1]['rows'], 'output_bytes': median('output_bytes'), 'error': None}
+
+
+def prepare_fixture(name, folder, on_status=print):
+    """
+    Fixture profile, generated the first time (or again if the generator changed since).
+    :param name: key of FIXTURES
+    :param folder: fixtures folder
+    :param on_status: called with progress messages
+    :return: (profile folder, fixture description recorded with the results)
+    """
+    profile_path = os.path.join(folder, name, 'Default')
+    fixture = {'visits': FIXTURES[name], 'seed': FIXTURE_SEED, 'generator_version': GENERATOR_VERSION}
+    try:
+        with open(os.path.join(profile_path, MANIFEST), encoding='utf-8') as f:
+            manifest = json.load(f)
+        current = all(manifest.get(key) == value for key, value in fixture.items())
+    except (OSError, ValueError):
+        current = False
+
+    if not current:
+        on_status(f'Generating the {name} fixture ({FIXTURES[name]:,} visits) in {profile_path}...')
+        generate_profile(profile_path, FIXTURES[name], FIXTURE_SEED)
+    return profile_path, fixture
+
+
+def git_commit():
+    """
+    Commit of the repository being benchmarked.
+    :return: commit hash (with '+' if there are uncommitted changes), or None if it is not a git checkout
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPOSITORY, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        changes = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPOSITORY,
+                                 capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('+' if changes else '')
+
+
+def read_history(history_file):
+    """
+    :param history_file: results history (JSON Lines, one record per benchmark run)
+    :return: list of records, oldest first
+    """
+    if not os.path.isfile(history_file):
+        return []
+    with open(history_file, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def find_baseline(history, record, baseline=None):
+    """
+    Record to compare a run with.
+    :param history: records of the history file, oldest first
+    :param record: the new run's record
+    :param baseline: label, parser version or commit (prefix) of the record to use; None for the latest run that
+                     passed on the same machine
+    :return: record, or None if there is none to compare with
+    """
+    for previous in reversed(history):
+        if previous.get('format') != RESULTS_FORMAT or previous['machine'] != record['machine']:
+            continue
+        if baseline is None:
+            if not previous['regressions']:
+                return previous
+        elif baseline in (previous.get('label'), previous['version']) or \
+                (previous.get('commit') or '').startswith(baseline):
+            return previous
+    return None
+
+
+def compare(record, baseline, threshold):
+    """
+    Regressions of a run compared with a baseline. Fixtures that differ (e.g. a new generator version) are not
+    compared.
+    :param record: the new run's record
+    :param baseline: record to compare with
+    :param threshold: largest relative increase tolerated (0.1 for 10%)
+    :return: list of (fixture, benchmark, message)
+    """
+    regressions = []
+    for fixture_name, results in record['results'].items():
+        if baseline['fixtures'].get(fixture_name) != record['fixtures'][fixture_name]:
+            continue
+        for target, result in results.items():
+            previous = baseline['results'][fixture_name].get(target)
+            if previous is None or previous['error'] is not None:
+                continue
+            if result['error'] is not None:
+                regressions.append((fixture_name, target, f'fails: {result["error"]}'))
+                continue
+            for key, (label, minimum) in MEASUREMENTS.items():
+                old, new = previous[key], result[key]
+                if old is None or new is None:
+                    continue
+                if new > old * (1 + threshold) and new - old > minimum:
+                    increase = f'+{(new / old - 1) * 100:.0f}%' if old else 'up'
+                    regressions.append((fixture_name, target, f'{label} {increase} '
+                                                              f'({format_value(key, old)} -> {format_value(key, new)})'))
+    return regressions
+
+
+def format_value(key, value):
+    """Measurement as shown in the report"""
+    if value is None:
+        return '-'
+    if key == 'seconds':
+        return f'{value:.3f} s'
+    if value < 2 ** 20:
+        return f'{value / 2 ** 10:.1f} KB'
+    return f'{value / 2 ** 20:.1f} MB'
+
+
+def change(key, result, previous):
+    """Relative change of a measurement since the baseline, as shown in the report"""
+    if previous is None or previous.get(key) in (None, 0) or result[key] is None:
+        return ''
+    return f'{(result[key] / previous[key] - 1) * 100:+.0f}%'
+
+
+def main(argv=None):
+    if argv is None and len(sys.argv) == 4 and sys.argv[1] == '--child':
+        print(json.dumps(run_target(sys.argv[2], sys.argv[3])))
+        return 0
+
+    parser = argparse.ArgumentParser(description='Benchmark each artifact on fixture profiles and track regressions.')
+    parser.add_argument('-f', '--fixtures', nargs='+', choices=list(FIXTURES), default=['small', 'medium'],
+                        help='fixture profiles to run on (default: small medium); '
+                             + ', '.join(f'{name}: {visits:,} visits' for name, visits in FIXTURES.items()))
+    parser.add_argument('-k', '--select', action='append', metavar='TEXT',
+                        help='only run the benchmarks whose name contains TEXT (case insensitive; repeatable)')
+    parser.add_argument('-r', '--runs', type=int, default=3,
+                        help='runs of each benchmark, each in a fresh interpreter; the median is kept (default: 3)')
+    parser.add_argument('-t', '--threshold', type=float, default=0.10,
+                        help='largest increase of wall time, peak RSS or output size tolerated, as a fraction of '
+                             'the baseline (default: 0.10)')
+    parser.add_argument('-b', '--baseline', metavar='LABEL',
+                        help='compare with the latest run with this label, parser version or commit (default: '
+                             'the latest run that passed on this machine)')
+    parser.add_argument('-l', '--label', help='name recorded with this run (e.g. "before upgrade")')
+    parser.add_argument('--history', default=HISTORY_FILE, help='results history file (default: %(default)s)')
+    parser.add_argument('--fixtures-folder', default=FIXTURES_FOLDER,
+                        help='where the fixture profiles are generated and kept (default: %(default)s)')
+    parser.add_argument('--no-record', action='store_true', help='do not add this run to the history')
+    parser.add_argument('--list', action='store_true', help='list the benchmarks and exit')
+    arguments = parser.parse_args(argv)
+    if arguments.runs < 1:
+        parser.error('--runs must be at least 1')
+
+    targets = all_targets()
+    if arguments.select:
+        targets = [target for target in targets
+                   if any(text.lower() in target.lower() for text in arguments.select)]
+    if arguments.list or not targets:
+        print('\n'.join(targets) if targets else 'No benchmark matches.')
+        return 0
+
+    record = {
+        'format': RESULTS_FORMAT,
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'label': arguments.label,
+        'version': __version__,
+        'commit': git_commit(),
+        'machine': platform.node(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'runs': arguments.runs,
+        'threshold': arguments.threshold,
+        'fixtures': {},
+        'results': {},
+        'regressions': [],
+    }
+    history = read_history(arguments.history)
+    baseline = find_baseline(history, record, arguments.baseline)
+    if arguments.baseline and baseline is None:
+        print(f'❌ No run matching {arguments.baseline} on this machine in {arguments.history}', file=sys.stderr)
+        return 2
+    print(f'Baseline: {describe(baseline)}' if baseline else 'No baseline yet: this run will be the first.')
+
+    for fixture_name in arguments.fixtures:
+        profile_path, record['fixtures'][fixture_name] = prepare_fixture(fixture_name, arguments.fixtures_folder)
+        results = record['results'][fixture_name] = {}
+        previous_results = baseline['results'].get(fixture_name, {}) if baseline else {}
+
+        print(f'\n{fixture_name} ({FIXTURES[fixture_name]:,} visits)')
+        print(f'{"Benchmark":<62} {"seconds":>9} {"":>5} {"peak RSS":>9} {"":>5} {"rows":>9} {"output":>9}')
+        for target in targets:
+            result = results[target] = measure(target, profile_path, arguments.runs)
+            if result['error'] is not None:
+                print(f'{target:<62} failed: {result["error"]}')
+                continue
+            previous = previous_results.get(target)
+            print(f'{target:<62} {result["seconds"]:9.3f} {change("seconds", result, previous):>5} '
+                  f'{format_value("peak_rss_bytes", result["peak_rss_bytes"]):>9} '
+                  f'{change("peak_rss_bytes", result, previous):>5} {result["rows"]:>9} '
+                  f'{format_value("output_bytes", result["output_bytes"]):>9}')
+
+    if baseline is not None:
+        record['regressions'] = [list(regression) for regression in
+                                 compare(record, baseline, arguments.threshold)]
+
+    if not arguments.no_record:
+        os.makedirs(os.path.dirname(os.path.abspath(arguments.history)), exist_ok=True)
+        with open(arguments.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    if record['regressions']:
+        print(f'\n❌ {len(record["regressions"])} regression(s) beyond {arguments.threshold:.0%} '
+              f'compared with {describe(baseline)}:', file=sys.stderr)
+        for fixture_name, target, message in record['regressions']:
+            print(f'   {fixture_name}: {target}: {message}', file=sys.stderr)
+        return 1
+    if baseline is not None:
+        print('\n✅ No regression.')
+    elif not arguments.no_record:
+        print('\nRecorded as the first baseline.')
+    return 0
+
+
+def describe(record):
+    """Short description of a history record"""
+    label = f'"{record["label"]}", ' if record.get('label') else ''
+    commit = f', commit {record["commit"][:10]}' if record.get('commit') else ''
+    return f'{label}version {record["version"]}{commit} of {record["date"]}'
+
+
+if __name__ == '__main__':
+    sys.exit(main())
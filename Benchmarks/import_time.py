@@ -0,0 +1,98 @@
+# Written by Jacques Boucher
+# email: jjrboucher@gmail.com
+#
+# Import-time benchmark: how long each front end takes to load, in a fresh Python process, before it can show
+# its window (GUI) or answer (CLI), and how long loading the engine takes on top of that.
+#
+# Examples:
+#   python Benchmarks/import_time.py
+#   python Benchmarks/import_time.py --runs 10 --modules 15
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Name -> code run in a fresh interpreter (from the repository folder); the time it takes is measured
+TARGETS = {
+    'GUI module (window can show)': (
+        "import importlib.util\n"
+        "spec = importlib.util.spec_from_file_location('gui', 'browser-artifact-parser-GUI.py')\n"
+        "spec.loader.exec_module(importlib.util.module_from_spec(spec))"
+    ),
+    'CLI module (--help, --list-artifacts)': (
+        "import importlib.util\n"
+        "spec = importlib.util.spec_from_file_location('cli', 'browser-artifact-parser-CLI.py')\n"
+        "spec.loader.exec_module(importlib.util.module_from_spec(spec))"
+    ),
+    'Engine (Classes.ParserEngine)': "import Classes.ParserEngine",
+    'Excel writer (openpyxl)': "from Classes.ParserSettings import writer_class; writer_class('xlsx')",
+    'pandas': "import pandas",
+}
+
+TIMER = (
+    "import time, sys\n"
+    "sys.path.insert(0, '.')\n"
+    "start = time.perf_counter()\n"
+    "{code}\n"
+    "print(time.perf_counter() - start)"
+)
+
+
+def time_imports(code, runs):
+    """
+    Time code in fresh interpreters.
+    :param code: Python code (imports) to time
+    :param runs: number of interpreters started
+    :return: list of times, in seconds
+    """
+    times = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', TIMER.format(code=code)], cwd=REPOSITORY,
+                                capture_output=True, text=True, check=True).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    return times
+
+
+def slowest_modules(code, count):
+    """
+    Modules that take the longest to import, from python -X importtime.
+    :param code: Python code (imports) to profile
+    :param count: number of modules listed
+    :return: list of (cumulative seconds, module name), slowest first
+    """
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', TIMER.format(code=code)], cwd=REPOSITORY,
+                            capture_output=True, text=True, check=True).stderr
+    modules = []
+    for line in stderr.splitlines():
+        match = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)', line)
+        if match and len(match.group(3)) <= 3:  # top-level imports only (nested ones are included in them)
+            modules.append((int(match.group(2)) / 1e6, match.group(4)))
+    return sorted(modules, reverse=True)[:count]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time the imports of the front ends and the engine.')
+    parser.add_argument('-r', '--runs', type=int, default=5, help='interpreters started per target (default: 5)')
+    parser.add_argument('-m', '--modules', type=int, default=10,
+                        help='slowest top-level imports listed for the engine (default: 10, 0 to skip)')
+    arguments = parser.parse_args(argv)
+
+    print(f'{"Target":<40} {"median":>8} {"min":>8} {"max":>8}')
+    for name, code in TARGETS.items():
+        times = time_imports(code, arguments.runs)
+        print(f'{name:<40} {statistics.median(times):8.3f} {min(times):8.3f} {max(times):8.3f}')
+
+    if arguments.modules:
+        print(f'\nSlowest top-level imports of the engine (cumulative seconds):')
+        for seconds, module in slowest_modules(TARGETS['Engine (Classes.ParserEngine)'], arguments.modules):
+            print(f'{seconds:8.3f}  {module}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,872 @@
+# Written by Jacques Boucher
+# email: jjrboucher@gmail.com
+#
+# Synthetic Chromium profile generator: writes a profile folder with the databases and JSON files the parser reads
+# (History, Web Data, Login Data, Network/Cookies, Favicons, Shortcuts, Top Sites, Bookmarks, Preferences and a
+# few extensions), with Chrome's table definitions and indexes, at any size, to exercise the parser at scale
+# without real evidence.
+#
+# The content is random but fully determined by the seed and the number of visits, so two runs with the same
+# parameters produce the same records (the files are identical as long as the SQLite version is the same) and
+# benchmark runs on them are comparable. The record ids have deliberate gaps (at the start, in the middle and,
+# for the AUTOINCREMENT tables, past the last record) for the *_gaps queries to find.
+#
+# Examples:
+#   python Benchmarks/synthetic_profile.py "fixtures/10k/Default" --visits 10000
+#   python Benchmarks/synthetic_profile.py "fixtures/50M/Default" --visits 50000000 --seed 7
+
+import argparse
+import array
+import bisect
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from JSON.bookmarks_hashing import regen_checksum
+
+GENERATOR_VERSION = 1  # changes whenever the same parameters would generate different content
+SEED = 1
+MIN_VISITS = 10000
+MAX_VISITS = 50000000
+ROWS_PER_BATCH = 50000
+CACHE_KIB = 524288  # page cache of each database while it is generated
+
+# Chromium time: microseconds since 1601-01-01 UTC. The history ends on 2025-06-01 and spans 90 days (what
+# Chrome keeps); everything else is spread over the year before.
+WEBKIT_EPOCH_OFFSET = 11644473600
+END_TIME = (1748736000 + WEBKIT_EPOCH_OFFSET) * 1000000
+HISTORY_SPAN = 90 * 86400 * 1000000
+YEAR = 365 * 86400 * 1000000
+
+# Descriptions of the generated files, written to this file in the profile folder
+MANIFEST = 'synthetic_profile.json'
+
+SCHEMAS = {
+    'History': """
+        CREATE TABLE meta(key LONGVARCHAR NOT NULL UNIQUE PRIMARY KEY, value LONGVARCHAR);
+        CREATE TABLE urls(id INTEGER PRIMARY KEY AUTOINCREMENT,url LONGVARCHAR,title LONGVARCHAR,
+            visit_count INTEGER DEFAULT 0 NOT NULL,typed_count INTEGER DEFAULT 0 NOT NULL,
+            last_visit_time INTEGER NOT NULL,hidden INTEGER DEFAULT 0 NOT NULL);
+        CREATE TABLE visits(id INTEGER PRIMARY KEY AUTOINCREMENT,url INTEGER NOT NULL,visit_time INTEGER NOT NULL,
+            from_visit INTEGER,external_referrer_url TEXT,transition INTEGER DEFAULT 0 NOT NULL,segment_id INTEGER,
+            visit_duration INTEGER DEFAULT 0 NOT NULL,incremented_omnibox_typed_score BOOLEAN DEFAULT FALSE NOT NULL,
+            opener_visit INTEGER,originator_cache_guid TEXT,originator_visit_id INTEGER,originator_from_visit INTEGER,
+            originator_opener_visit INTEGER,is_known_to_sync BOOLEAN DEFAULT FALSE NOT NULL,
+            consider_for_ntp_most_visited BOOLEAN DEFAULT FALSE NOT NULL,visited_link_id INTEGER DEFAULT 0 NOT NULL,
+            app_id TEXT);
+        CREATE TABLE visit_source(id INTEGER PRIMARY KEY,source INTEGER NOT NULL);
+        CREATE TABLE keyword_search_terms (keyword_id INTEGER NOT NULL,url_id INTEGER NOT NULL,
+            term LONGVARCHAR NOT NULL,normalized_term LONGVARCHAR NOT NULL);
+        CREATE TABLE downloads (id INTEGER PRIMARY KEY,guid VARCHAR NOT NULL,current_path LONGVARCHAR NOT NULL,
+            target_path LONGVARCHAR NOT NULL,start_time INTEGER NOT NULL,received_bytes INTEGER NOT NULL,
+            total_bytes INTEGER NOT NULL,state INTEGER NOT NULL,danger_type INTEGER NOT NULL,
+            interrupt_reason INTEGER NOT NULL,hash BLOB NOT NULL,end_time INTEGER NOT NULL,opened INTEGER NOT NULL,
+            last_access_time INTEGER NOT NULL,transient INTEGER NOT NULL,referrer VARCHAR NOT NULL,
+            site_url VARCHAR NOT NULL,embedder_download_data VARCHAR NOT NULL,tab_url VARCHAR NOT NULL,
+            tab_referrer_url VARCHAR NOT NULL,http_method VARCHAR NOT NULL,by_ext_id VARCHAR NOT NULL,
+            by_ext_name VARCHAR NOT NULL,by_web_app_id VARCHAR NOT NULL,etag VARCHAR NOT NULL,
+            last_modified VARCHAR NOT NULL,mime_type VARCHAR(255) NOT NULL,original_mime_type VARCHAR(255) NOT NULL);
+        CREATE TABLE downloads_url_chains (id INTEGER NOT NULL,chain_index INTEGER NOT NULL,url LONGVARCHAR NOT NULL,
+            PRIMARY KEY (id, chain_index));
+        CREATE TABLE downloads_slices (download_id INTEGER NOT NULL,offset INTEGER NOT NULL,
+            received_bytes INTEGER NOT NULL,finished INTEGER NOT NULL DEFAULT 0,PRIMARY KEY (download_id, offset));
+        CREATE TABLE segments (id INTEGER PRIMARY KEY,name VARCHAR,url_id INTEGER NON NULL);
+        CREATE TABLE segment_usage (id INTEGER PRIMARY KEY,segment_id INTEGER NOT NULL,time_slot INTEGER NOT NULL,
+            visit_count INTEGER DEFAULT 0 NOT NULL);
+        CREATE TABLE content_annotations(visit_id INTEGER PRIMARY KEY,visibility_score NUMERIC,
+            floc_protected_score NUMERIC,categories VARCHAR,page_topics_model_version INTEGER,
+            annotation_flags INTEGER NOT NULL,entities VARCHAR,related_searches VARCHAR,search_normalized_url VARCHAR,
+            search_terms LONGVARCHAR,alternative_title VARCHAR,page_language VARCHAR,
+            password_state INTEGER DEFAULT 0 NOT NULL,has_url_keyed_image BOOLEAN NOT NULL);
+        CREATE TABLE context_annotations(visit_id INTEGER PRIMARY KEY,context_annotation_flags INTEGER NOT NULL,
+            duration_since_last_visit INTEGER,page_end_reason INTEGER,total_foreground_duration INTEGER,
+            browser_type INTEGER DEFAULT 0 NOT NULL,window_id INTEGER DEFAULT -1 NOT NULL,
+            tab_id INTEGER DEFAULT -1 NOT NULL,task_id INTEGER DEFAULT -1 NOT NULL,
+            root_task_id INTEGER DEFAULT -1 NOT NULL,parent_task_id INTEGER DEFAULT -1 NOT NULL,
+            response_code INTEGER DEFAULT 0 NOT NULL);
+        CREATE TABLE clusters(cluster_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            should_show_on_prominent_ui_surfaces BOOLEAN NOT NULL,label VARCHAR NOT NULL,raw_label VARCHAR NOT NULL,
+            triggerability_calculated BOOLEAN NOT NULL,originator_cache_guid TEXT NOT NULL,
+            originator_cluster_id INTEGER NOT NULL);
+        CREATE TABLE clusters_and_visits(cluster_id INTEGER NOT NULL,visit_id INTEGER NOT NULL,
+            score NUMERIC DEFAULT 0 NOT NULL,engagement_score NUMERIC DEFAULT 0 NOT NULL,
+            url_for_deduping LONGVARCHAR NOT NULL,normalized_url LONGVARCHAR NOT NULL,
+            url_for_display LONGVARCHAR NOT NULL,interaction_state INTEGER DEFAULT 0 NOT NULL,
+            PRIMARY KEY(cluster_id,visit_id))WITHOUT ROWID;
+        CREATE TABLE cluster_keywords(cluster_id INTEGER NOT NULL,keyword VARCHAR NOT NULL,type INTEGER NOT NULL,
+            score NUMERIC NOT NULL,collections VARCHAR NOT NULL);
+        CREATE TABLE cluster_visit_duplicates(visit_id INTEGER NOT NULL,duplicate_visit_id INTEGER NOT NULL,
+            PRIMARY KEY(visit_id,duplicate_visit_id))WITHOUT ROWID;
+        CREATE TABLE visited_links(id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,link_url_id INTEGER NOT NULL,
+            top_level_url LONGVARCHAR NOT NULL,frame_url LONGVARCHAR NOT NULL,visit_count INTEGER DEFAULT 0 NOT NULL);
+        CREATE TABLE history_sync_metadata (storage_key INTEGER PRIMARY KEY NOT NULL,value BLOB);
+    """,
+    'Web Data': """
+        CREATE TABLE meta(key LONGVARCHAR NOT NULL UNIQUE PRIMARY KEY, value LONGVARCHAR);
+        CREATE TABLE autofill (name VARCHAR, value VARCHAR, value_lower VARCHAR, date_created INTEGER DEFAULT 0,
+            date_last_used INTEGER DEFAULT 0, count INTEGER DEFAULT 1, PRIMARY KEY (name, value));
+        CREATE TABLE keywords (id INTEGER PRIMARY KEY,short_name VARCHAR NOT NULL,keyword VARCHAR NOT NULL,
+            favicon_url VARCHAR NOT NULL,url VARCHAR NOT NULL,safe_for_autoreplace INTEGER,originating_url VARCHAR,
+            date_created INTEGER DEFAULT 0,usage_count INTEGER DEFAULT 0,input_encodings VARCHAR,suggest_url VARCHAR,
+            prepopulate_id INTEGER DEFAULT 0,created_by_policy INTEGER DEFAULT 0,last_modified INTEGER DEFAULT 0,
+            sync_guid VARCHAR,alternate_urls VARCHAR,image_url VARCHAR,search_url_post_params VARCHAR,
+            suggest_url_post_params VARCHAR,image_url_post_params VARCHAR,new_tab_url VARCHAR,
+            last_visited INTEGER DEFAULT 0, created_from_play_api INTEGER DEFAULT 0, is_active INTEGER DEFAULT 0,
+            starter_pack_id INTEGER DEFAULT 0, enforced_by_policy INTEGER DEFAULT 0,
+            featured_by_policy INTEGER DEFAULT 0, url_hash BLOB);
+        CREATE TABLE masked_credit_cards (id VARCHAR,name_on_card VARCHAR,network VARCHAR,last_four VARCHAR,
+            exp_month INTEGER DEFAULT 0,exp_year INTEGER DEFAULT 0, bank_name VARCHAR, nickname VARCHAR,
+            card_issuer INTEGER DEFAULT 0, instrument_id INTEGER DEFAULT 0,
+            virtual_card_enrollment_state INTEGER DEFAULT 0, card_art_url VARCHAR, product_description VARCHAR,
+            card_issuer_id VARCHAR, virtual_card_enrollment_type INTEGER DEFAULT 0,
+            card_info_retrieval_enrollment_state INTEGER DEFAULT 0);
+        CREATE TABLE server_card_metadata (id VARCHAR NOT NULL,use_count INTEGER NOT NULL DEFAULT 0,
+            use_date INTEGER NOT NULL DEFAULT 0, billing_address_id VARCHAR);
+        CREATE TABLE masked_bank_accounts (instrument_id INTEGER NOT NULL PRIMARY KEY,bank_name VARCHAR,
+            account_number_suffix VARCHAR NOT NULL,account_type INTEGER DEFAULT 0,display_icon_url VARCHAR,
+            nickname VARCHAR);
+        CREATE TABLE masked_bank_accounts_metadata (instrument_id INTEGER NOT NULL PRIMARY KEY,
+            use_count INTEGER NOT NULL DEFAULT 0,use_date INTEGER NOT NULL DEFAULT 0);
+        CREATE TABLE loyalty_cards (loyalty_card_id VARCHAR PRIMARY KEY NOT NULL,merchant_name VARCHAR NOT NULL,
+            program_name VARCHAR NOT NULL,program_logo VARCHAR NOT NULL,loyalty_card_number VARCHAR NOT NULL);
+        CREATE TABLE loyalty_card_merchant_domain (loyalty_card_id VARCHAR NOT NULL,merchant_domain VARCHAR NOT NULL);
+        CREATE TABLE addresses (guid VARCHAR PRIMARY KEY,use_count INTEGER NOT NULL DEFAULT 0,
+            use_date INTEGER NOT NULL DEFAULT 0,date_modified INTEGER NOT NULL DEFAULT 0,language_code VARCHAR,
+            label VARCHAR,initial_creator_id INTEGER DEFAULT 0,last_modifier_id INTEGER DEFAULT 0,
+            record_type INTEGER);
+        CREATE TABLE address_type_tokens (guid VARCHAR,type INTEGER,value VARCHAR,
+            verification_status INTEGER DEFAULT 0,observations BLOB,PRIMARY KEY (guid, type));
+    """,
+    'Login Data': """
+        CREATE TABLE meta(key LONGVARCHAR NOT NULL UNIQUE PRIMARY KEY, value LONGVARCHAR);
+        CREATE TABLE logins (origin_url VARCHAR NOT NULL, action_url VARCHAR, username_element VARCHAR,
+            username_value VARCHAR, password_element VARCHAR, password_value BLOB, submit_element VARCHAR,
+            signon_realm VARCHAR NOT NULL, date_created INTEGER NOT NULL, blacklisted_by_user INTEGER NOT NULL,
+            scheme INTEGER NOT NULL, password_type INTEGER, times_used INTEGER, form_data BLOB, display_name VARCHAR,
+            icon_url VARCHAR, federation_url VARCHAR, skip_zero_click INTEGER, generation_upload_status INTEGER,
+            possible_username_pairs BLOB, id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date_last_used INTEGER NOT NULL DEFAULT 0, moving_blocked_for BLOB,
+            date_password_modified INTEGER NOT NULL DEFAULT 0, sender_email VARCHAR, sender_name VARCHAR,
+            date_received INTEGER, sharing_notification_displayed INTEGER NOT NULL DEFAULT 0,
+            keychain_identifier BLOB, sender_profile_image_url VARCHAR, date_last_filled INTEGER NOT NULL DEFAULT 0,
+            actor_login_approved INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (origin_url, username_element, username_value, password_element, signon_realm));
+    """,
+    'Network/Cookies': """
+        CREATE TABLE meta(key LONGVARCHAR NOT NULL UNIQUE PRIMARY KEY, value LONGVARCHAR);
+        CREATE TABLE cookies(creation_utc INTEGER NOT NULL,host_key TEXT NOT NULL,top_frame_site_key TEXT NOT NULL,
+            name TEXT NOT NULL,value TEXT NOT NULL,encrypted_value BLOB NOT NULL,path TEXT NOT NULL,
+            expires_utc INTEGER NOT NULL,is_secure INTEGER NOT NULL,is_httponly INTEGER NOT NULL,
+            last_access_utc INTEGER NOT NULL,has_expires INTEGER NOT NULL,is_persistent INTEGER NOT NULL,
+            priority INTEGER NOT NULL,samesite INTEGER NOT NULL,source_scheme INTEGER NOT NULL,
+            source_port INTEGER NOT NULL,last_update_utc INTEGER NOT NULL,source_type INTEGER NOT NULL,
+            has_cross_site_ancestor INTEGER NOT NULL);
+    """,
+    'Favicons': """
+        CREATE TABLE meta(key LONGVARCHAR NOT NULL UNIQUE PRIMARY KEY, value LONGVARCHAR);
+        CREATE TABLE icon_mapping(id INTEGER PRIMARY KEY,page_url LONGVARCHAR NOT NULL,icon_id INTEGER,
+            page_url_type INTEGER DEFAULT 0);
+        CREATE TABLE favicons(id INTEGER PRIMARY KEY,url LONGVARCHAR NOT NULL,icon_type INTEGER DEFAULT 1);
+        CREATE TABLE favicon_bitmaps(id INTEGER PRIMARY KEY,icon_id INTEGER NOT NULL,last_updated INTEGER DEFAULT 0,
+            image_data BLOB,width INTEGER DEFAULT 0,height INTEGER DEFAULT 0,last_requested INTEGER DEFAULT 0);
+    """,
+    'Shortcuts': """
+        CREATE TABLE meta(key LONGVARCHAR NOT NULL UNIQUE PRIMARY KEY, value LONGVARCHAR);
+        CREATE TABLE omni_box_shortcuts (id VARCHAR PRIMARY KEY, text VARCHAR, fill_into_edit VARCHAR, url VARCHAR,
+            contents VARCHAR, contents_class VARCHAR, description VARCHAR, description_class VARCHAR,
+            transition INTEGER, type INTEGER, keyword VARCHAR, last_access_time INTEGER, number_of_hits INTEGER);
+    """,
+    'Top Sites': """
+        CREATE TABLE meta(key LONGVARCHAR NOT NULL UNIQUE PRIMARY KEY, value LONGVARCHAR);
+        CREATE TABLE top_sites(url TEXT NOT NULL PRIMARY KEY,url_rank INTEGER NOT NULL,title TEXT NOT NULL);
+    """,
+}
+
+# Chrome's secondary indexes, created once the tables are filled (faster than maintaining them while inserting)
+INDEXES = {
+    'History': """
+        CREATE INDEX urls_url_index ON urls (url);
+        CREATE INDEX visits_url_index ON visits (url);
+        CREATE INDEX visits_from_index ON visits (from_visit);
+        CREATE INDEX visits_time_index ON visits (visit_time);
+        CREATE INDEX visits_originator_id_index ON visits (originator_visit_id);
+        CREATE INDEX keyword_search_terms_index1 ON keyword_search_terms (keyword_id, normalized_term);
+        CREATE INDEX keyword_search_terms_index2 ON keyword_search_terms (url_id);
+        CREATE INDEX keyword_search_terms_index3 ON keyword_search_terms (term);
+        CREATE INDEX segments_name ON segments(name);
+        CREATE INDEX segments_url_id ON segments(url_id);
+        CREATE INDEX segment_usage_time_slot_segment_id ON segment_usage(time_slot, segment_id);
+        CREATE INDEX segments_usage_seg_id ON segment_usage(segment_id);
+        CREATE INDEX clusters_for_visit ON clusters_and_visits(visit_id);
+        CREATE INDEX visited_links_index ON visited_links (link_url_id, top_level_url, frame_url);
+    """,
+    'Web Data': """
+        CREATE INDEX autofill_name ON autofill (name);
+        CREATE INDEX autofill_name_value_lower ON autofill (name, value_lower);
+    """,
+    'Login Data': "CREATE INDEX logins_signon ON logins (signon_realm);",
+    'Network/Cookies': """
+        CREATE UNIQUE INDEX cookies_unique_index ON cookies(host_key, top_frame_site_key, has_cross_site_ancestor,
+            name, path, source_scheme, source_port);
+    """,
+    'Favicons': """
+        CREATE INDEX icon_mapping_page_url_idx ON icon_mapping(page_url);
+        CREATE INDEX icon_mapping_icon_id_idx ON icon_mapping(icon_id);
+        CREATE INDEX favicons_url ON favicons(url);
+        CREATE INDEX favicon_bitmaps_icon_id ON favicon_bitmaps(icon_id);
+    """,
+    'Shortcuts': "",
+    'Top Sites': "",
+}
+
+# meta table of each database: (version, last_compatible_version)
+META_VERSIONS = {
+    'History': (69, 16), 'Web Data': (135, 83), 'Login Data': (43, 40), 'Network/Cookies': (24, 24),
+    'Favicons': (8, 8), 'Shortcuts': (2, 2), 'Top Sites': (5, 5),
+}
+
+WORDS = ('account', 'archive', 'bank', 'blog', 'book', 'cloud', 'code', 'court', 'docs', 'drive', 'forum', 'guide',
+         'health', 'home', 'images', 'invoice', 'jobs', 'login', 'mail', 'maps', 'market', 'media', 'music', 'news',
+         'photos', 'portal', 'recipes', 'report', 'search', 'shop', 'sports', 'store', 'support', 'travel', 'video',
+         'weather', 'wiki', 'école', 'café', 'straße', 'ニュース', 'поиск')
+# URLs are ASCII (Chrome stores them punycode and percent-encoded)
+URL_WORDS = tuple(word for word in WORDS if word.isascii())
+TLDS = ('com', 'org', 'net', 'ca', 'co.uk', 'de', 'fr', 'io', 'jp', 'example')
+
+# (core transition type, weight) and (qualifier bits, weight); see Functions/code_tables.py
+TRANSITIONS = ((0, 55), (1, 10), (2, 4), (3, 8), (4, 2), (5, 6), (6, 3), (7, 3), (8, 5), (9, 2), (10, 2))
+QUALIFIERS = ((0x30000000, 60), (0x32000000, 12), (0x31000000, 6), (0x20000000, 8), (0x10000000, 4),
+              (0xA0000000, 5), (0x60000000, 3), (0x30800000, 1), (0x34000000, 1))
+VISIT_SOURCES = ((0, 80), (2, 6), (3, 5), (4, 3), (5, 2), (6, 2), (7, 2))
+
+# Headers of the favicon image formats FaviconStore recognizes
+IMAGE_HEADERS = (b'\x89PNG\r\n\x1a\n', b'\x00\x00\x01\x00', b'\xff\xd8\xff\xe0', b'GIF89a', b'RIFF\x00\x00\x00\x00WEBP',
+                 b'BM', b'<svg xmlns="http://www.w3.org/2000/svg">')
+
+
+def table_sizes(visits):
+    """
+    Number of records of each table for a number of visits (the other tables grow in proportion).
+    :param visits: number of visits
+    :return: dict of table name -> number of records
+    """
+    urls = max(100, visits // 4)
+    return {
+        'visits': visits,
+        'urls': urls,
+        'segments': max(10, urls // 20),
+        'keyword_search_terms': max(20, urls // 10),
+        'clusters': max(5, visits // 100),
+        'downloads': max(20, visits // 200),
+        'autofill': max(50, visits // 100),
+        'keywords': 20 + visits // 1000000,
+        'credit_cards': 3 + visits // 5000000,
+        'bank_accounts': 2 + visits // 10000000,
+        'loyalty_cards': 2 + visits // 10000000,
+        'addresses': 3 + visits // 2000000,
+        'logins': max(20, visits // 500),
+        'cookies': max(200, visits // 5),
+        'favicons': max(20, urls // 10),
+        'shortcuts': max(20, visits // 100),
+        'top_sites': 20,
+        'bookmarks': max(20, visits // 200),
+        'extensions': 8,
+    }
+
+
+def weighted(rng, choices):
+    """
+    Weighted random choice.
+    :param rng: random.Random
+    :param choices: tuple of (value, weight)
+    :return: function that returns one of the values each time it is called, in proportion to its weight
+    """
+    values = [value for value, _ in choices]
+    cumulative = []
+    total = 0
+    for _, weight in choices:
+        total += weight
+        cumulative.append(total)
+    return lambda: values[bisect.bisect_right(cumulative, rng.random() * total)]
+
+
+def rowids(rng, count, gap_rate=0.002, max_gap=40, gap_at_start=True):
+    """
+    Record ids with deliberate gaps, as deleted records leave them.
+    :param rng: random.Random
+    :param count: number of ids
+    :param gap_rate: share of the ids followed by a gap
+    :param max_gap: most ids missing in one gap
+    :param gap_at_start: whether the first id is greater than 1
+    :return: generator of increasing ids
+    """
+    next_id = 1 + (rng.randint(1, max_gap) if gap_at_start else 0)
+    for _ in range(count):
+        yield next_id
+        next_id += 1
+        if rng.random() < gap_rate:
+            next_id += rng.randint(1, max_gap)
+
+
+def batches(rows, size=ROWS_PER_BATCH):
+    """
+    Group rows into lists.
+    :param rows: iterable of rows
+    :param size: rows per list
+    :return: generator of lists of rows
+    """
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def domain_name(rng):
+    """Random host name"""
+    return f'{rng.choice(URL_WORDS)}{rng.randint(1, 999)}.{rng.choice(TLDS)}'
+
+
+def title_text(rng):
+    """Random page title, sometimes with characters a workbook cannot hold"""
+    title = ' '.join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(1, 6)))
+    if rng.random() < 0.001:
+        title += '\x0b\x01'
+    return title
+
+
+def webkit_time(rng, span=YEAR, end=END_TIME):
+    """Random Chromium time within span before end"""
+    return end - rng.randint(0, span)
+
+
+def unix_time(webkit):
+    """Chromium time to Unix time (seconds)"""
+    return webkit // 1000000 - WEBKIT_EPOCH_OFFSET
+
+
+def create_database(profile_path, name):
+    """
+    Create an empty database with Chrome's tables, replacing any existing file.
+    :param profile_path: profile folder
+    :param name: file name, relative to the profile folder (e.g. 'Network/Cookies')
+    :return: sqlite3.Connection in a transaction
+    """
+    path = os.path.join(profile_path, *name.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for suffix in ('', '-journal', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute(f'PRAGMA cache_size = -{CACHE_KIB}')  # the random inserts into WITHOUT ROWID tables and the
+    conn.execute('PRAGMA temp_store = MEMORY')         # index builds page heavily with the default 2 MB cache
+    conn.executescript(SCHEMAS[name])
+    conn.execute('BEGIN')  # one transaction for the whole file (executescript commits, so it comes after)
+    version, compatible = META_VERSIONS[name]
+    conn.executemany('INSERT INTO meta VALUES (?, ?)',
+                     [('mmap_status', '-1'), ('version', str(version)), ('last_compatible_version', str(compatible))])
+    return conn
+
+
+def close_database(conn, name, sequences=None):
+    """
+    Record the AUTOINCREMENT sequences, create the indexes and close.
+    :param conn: connection returned by create_database
+    :param name: file name (key of INDEXES)
+    :param sequences: dict of table -> last id allocated (past the last record if records were deleted at the end)
+    """
+    for table, sequence in (sequences or {}).items():
+        conn.execute('UPDATE sqlite_sequence SET seq = ? WHERE name = ?', (sequence, table))
+    conn.executescript(INDEXES[name])  # commits
+    conn.close()
+
+
+def write_history(profile_path, sizes, seed, keyword_ids):
+    """
+    History: urls, visits (with visit_source, segments and the cluster and annotation tables), keyword searches
+    and downloads.
+    :param profile_path: profile folder
+    :param sizes: table_sizes
+    :param seed: random seed
+    :param keyword_ids: ids of the Web Data keywords (search terms refer to them; a few refer to deleted ones)
+    :return: dict of table -> records written
+    """
+    rng = random.Random(f'{seed}:History')
+    conn = create_database(profile_path, 'History')
+    counts = dict.fromkeys(('urls', 'visits', 'visit_source', 'segments', 'keyword_search_terms', 'clusters',
+                            'clusters_and_visits', 'cluster_keywords', 'cluster_visit_duplicates',
+                            'content_annotations', 'context_annotations', 'downloads', 'downloads_url_chains'), 0)
+
+    url_count = sizes['urls']
+    url_ids = array.array('q', rowids(rng, url_count))
+    domains = [domain_name(rng) for _ in range(max(20, url_count // 50))]
+    # Some pages are visited much more often than others
+    popular = [rng.randrange(url_count) for _ in range(max(10, url_count // 100))]
+
+    segment_count = sizes['segments']
+    segment_domains = rng.sample(range(len(domains)), min(segment_count, len(domains)))
+    segments = [(index + 1, f'http://{domains[domain]}/', url_ids[domain % url_count])
+                for index, domain in enumerate(segment_domains)]
+    conn.executemany('INSERT INTO segments VALUES (?, ?, ?)', segments)
+    counts['segments'] = len(segments)
+
+    # Visits, in time order, with what hangs off them
+    visit_counts = array.array('i', bytes(4 * url_count))
+    typed_counts = array.array('i', bytes(4 * url_count))
+    last_visits = array.array('q', bytes(8 * url_count))
+    transition = weighted(rng, TRANSITIONS)
+    qualifiers = weighted(rng, QUALIFIERS)
+    visit_source = weighted(rng, VISIT_SOURCES)
+    cluster_count = sizes['clusters']
+    clustered_visits = []  # a few (cluster id, visit id) for the duplicates
+    step = HISTORY_SPAN // sizes['visits']
+    visit_time = END_TIME - HISTORY_SPAN
+    previous_visit = 0
+    last_visit_id = 0
+
+    def visit_rows():
+        nonlocal visit_time, previous_visit, last_visit_id
+        for visit_id in rowids(rng, sizes['visits'], gap_rate=0.001, max_gap=200):
+            url_index = rng.choice(popular) if rng.random() < 0.3 else rng.randrange(url_count)
+            visit_time += rng.randint(1, 2 * step)
+            core = transition()
+            from_visit = previous_visit if core in (0, 3, 4, 7) and rng.random() < 0.8 else 0
+            segment_id = rng.randint(1, len(segments)) if core in (0, 1) and rng.random() < 0.3 else 0
+            visit_counts[url_index] += 1
+            typed_counts[url_index] += core == 1
+            last_visits[url_index] = visit_time
+            previous_visit = last_visit_id = visit_id
+            yield (visit_id, url_ids[url_index], visit_time, from_visit, core | qualifiers(), segment_id,
+                   rng.randint(0, 600000000) if rng.random() < 0.7 else 0, url_index)
+
+    for batch in batches(visit_rows()):
+        conn.executemany(
+            'INSERT INTO visits (id, url, visit_time, from_visit, transition, segment_id, visit_duration) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)', (row[:7] for row in batch))
+        counts['visits'] += len(batch)
+
+        sources = [(row[0], visit_source()) for row in batch if rng.random() < 0.25]
+        conn.executemany('INSERT INTO visit_source VALUES (?, ?)', sources)
+        counts['visit_source'] += len(sources)
+
+        clustered = [row for row in batch if rng.random() < 0.25]
+        conn.executemany(
+            'INSERT INTO clusters_and_visits VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            ((rng.randint(1, cluster_count), row[0], round(rng.random(), 3), round(rng.random(), 3),
+              f'https://{domains[row[7] % len(domains)]}/p{row[7]}', f'https://{domains[row[7] % len(domains)]}/',
+              f'{domains[row[7] % len(domains)]}/p{row[7]}', rng.randint(0, 2)) for row in clustered))
+        counts['clusters_and_visits'] += len(clustered)
+        if len(clustered_visits) < 1000:
+            clustered_visits.extend(row[0] for row in clustered[:10])
+
+        content = [row for row in clustered if rng.random() < 0.5]
+        conn.executemany(
+            'INSERT INTO content_annotations VALUES (?, ?, -1, ?, 0, ?, ?, ?, ?, ?, ?, ?, 0, 0)',
+            ((row[0], round(rng.random(), 4), f'{rng.randint(1, 600)}:{rng.randint(1, 100)}', rng.randint(0, 7),
+              f'/m/{rng.randint(1000, 9999)}:{rng.randint(1, 100)}', rng.choice(WORDS),
+              f'https://www.google.com/search?q={rng.choice(URL_WORDS)}' if rng.random() < 0.2 else '',
+              rng.choice(WORDS) if rng.random() < 0.2 else '', '', rng.choice(('en', 'fr', 'de', 'ja')))
+             for row in content))
+        counts['content_annotations'] += len(content)
+
+        context = [row for row in batch if rng.random() < 0.5]
+        conn.executemany(
+            'INSERT INTO context_annotations (visit_id, context_annotation_flags, duration_since_last_visit, '
+            'page_end_reason, total_foreground_duration, window_id, tab_id, response_code) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            ((row[0], rng.randint(0, 15), rng.randint(-1, 10 ** 10), rng.randint(0, 9), rng.randint(0, 10 ** 9),
+              rng.randint(1, 20), rng.randint(1, 500), rng.choice((200, 200, 200, 301, 404))) for row in context))
+        counts['context_annotations'] += len(context)
+
+    # Records deleted past the last one are only seen through sqlite_sequence
+    visits_sequence = last_visit_id + rng.randint(1, 50)
+
+    duplicates = sorted({(visit, rng.choice(clustered_visits)) for visit in clustered_visits[::10]} -
+                        {(visit, visit) for visit in clustered_visits})
+    conn.executemany('INSERT INTO cluster_visit_duplicates VALUES (?, ?)', duplicates)
+    counts['cluster_visit_duplicates'] = len(duplicates)
+
+    for cluster_id in range(1, cluster_count + 1):
+        label = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+        conn.execute('INSERT INTO clusters VALUES (?, ?, ?, ?, 1, ?, ?)',
+                     (cluster_id, rng.randint(0, 1), label, label.title(), '', 0))
+        keywords = rng.sample(WORDS, rng.randint(1, 4))
+        conn.executemany('INSERT INTO cluster_keywords VALUES (?, ?, ?, ?, ?)',
+                         [(cluster_id, keyword, rng.randint(0, 5), round(rng.random() * 100, 2), '')
+                          for keyword in keywords])
+        counts['clusters'] += 1
+        counts['cluster_keywords'] += len(keywords)
+
+    def url_rows():
+        for url_index, url_id in enumerate(url_ids):
+            domain = domains[url_index % len(domains)]
+            last_visit = last_visits[url_index]
+            yield (url_id, f'https://{domain}/{rng.choice(URL_WORDS)}/p{url_index}?id={rng.randint(1, 10 ** 6)}',
+                   title_text(rng), visit_counts[url_index], typed_counts[url_index],
+                   last_visit or webkit_time(rng), 0 if visit_counts[url_index] else rng.randint(0, 1))
+
+    for batch in batches(url_rows()):
+        conn.executemany('INSERT INTO urls VALUES (?, ?, ?, ?, ?, ?, ?)', batch)
+        counts['urls'] += len(batch)
+
+    # Searches: the search results page of a keyword, mostly the default search engine
+    searched = sorted(rng.sample(range(url_count), min(sizes['keyword_search_terms'], url_count)))
+    searches = []
+    for url_index in searched:
+        term = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+        keyword_id = keyword_ids[0] if rng.random() < 0.7 else rng.choice(keyword_ids + [max(keyword_ids) + 7])
+        searches.append((keyword_id, url_ids[url_index], term, term.lower()))
+    conn.executemany('INSERT INTO keyword_search_terms VALUES (?, ?, ?, ?)', searches)
+    counts['keyword_search_terms'] = len(searches)
+
+    # Downloads (not AUTOINCREMENT: deleted records at the end leave no trace)
+    for download_id in rowids(rng, sizes['downloads'], gap_rate=0.02, max_gap=5):
+        start = webkit_time(rng, HISTORY_SPAN)
+        state = rng.choice((1, 1, 1, 2, 3, 4))
+        total = rng.randint(1000, 10 ** 9)
+        file_name = f'{rng.choice(URL_WORDS)}_{download_id}.{rng.choice(("pdf", "zip", "exe", "docx", "jpg"))}'
+        path = f'C:\\Users\\user\\Downloads\\{file_name}'
+        url = f'https://{rng.choice(domains)}/files/{file_name}'
+        conn.execute(
+            "INSERT INTO downloads VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?, ?, '', ?, '', 'GET', '', "
+            "'', '', '', '', ?, ?)",
+            (download_id, f'{rng.getrandbits(128):032x}', path, path, start, total if state == 1 else total // 2,
+             total, state, rng.choice((0, 0, 0, 1, 4, 99)), 0 if state == 1 else rng.choice((20, 40, 41)),
+             hashlib.sha256(file_name.encode()).digest() if state == 1 else b'',
+             start + rng.randint(10 ** 6, 10 ** 9) if state != 0 else 0, rng.randint(0, 1),
+             start + rng.randint(10 ** 9, 10 ** 11) if rng.random() < 0.4 else 0,
+             f'https://{rng.choice(domains)}/', f'https://{rng.choice(domains)}/', url,
+             'application/octet-stream', 'application/octet-stream'))
+        chain = [url] if rng.random() < 0.7 else [f'https://{rng.choice(domains)}/redirect?to={file_name}', url]
+        conn.executemany('INSERT INTO downloads_url_chains VALUES (?, ?, ?)',
+                         [(download_id, index, chain_url) for index, chain_url in enumerate(chain)])
+        counts['downloads'] += 1
+        counts['downloads_url_chains'] += len(chain)
+
+    close_database(conn, 'History', {'urls': url_ids[-1] + rng.randint(0, 20), 'visits': visits_sequence,
+                                     'clusters': cluster_count})
+    return counts
+
+
+def write_web_data(profile_path, sizes, seed):
+    """
+    Web Data: autofill entries, search engines (keywords), cards, bank accounts, loyalty cards and addresses.
+    :return: (dict of table -> records written, keyword ids)
+    """
+    rng = random.Random(f'{seed}:Web Data')
+    conn = create_database(profile_path, 'Web Data')
+    counts = {}
+
+    names = ('email', 'name', 'firstname', 'lastname', 'phone', 'address', 'city', 'postalcode', 'username', 'q')
+    autofill = {}
+    while len(autofill) < sizes['autofill']:
+        value = f'{rng.choice(WORDS)} {rng.randint(1, 10 ** 6)}'
+        created = unix_time(webkit_time(rng))
+        autofill[(rng.choice(names), value)] = (created, created + rng.randint(0, 10 ** 7), rng.randint(1, 50))
+    conn.executemany('INSERT INTO autofill VALUES (?, ?, ?, ?, ?, ?)',
+                     [(name, value, value.lower()) + details for (name, value), details in autofill.items()])
+    counts['autofill'] = len(autofill)
+
+    keyword_ids = list(rowids(rng, sizes['keywords'], gap_rate=0.1, max_gap=3, gap_at_start=False))
+    for index, keyword_id in enumerate(keyword_ids):
+        host = 'www.google.com' if index == 0 else domain_name(rng)
+        created = webkit_time(rng) if index else 0  # prepopulated engines have no creation date
+        conn.execute(
+            'INSERT INTO keywords (id, short_name, keyword, favicon_url, url, safe_for_autoreplace, date_created, '
+            'usage_count, prepopulate_id, last_modified, sync_guid, last_visited, is_active) '
+            'VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?, 1)',
+            (keyword_id, host.split('.')[-2].title(), host, f'https://{host}/favicon.ico',
+             f'https://{host}/search?q={{searchTerms}}', created, rng.randint(0, 500), 1 if index == 0 else 0,
+             webkit_time(rng), f'{rng.getrandbits(128):032x}', webkit_time(rng, HISTORY_SPAN)))
+    counts['keywords'] = len(keyword_ids)
+
+    for index in range(sizes['credit_cards']):
+        card_id = f'card{index}'
+        conn.execute('INSERT INTO masked_credit_cards (id, name_on_card, network, last_four, exp_month, exp_year, '
+                     'bank_name, nickname, instrument_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                     (card_id, 'J Doe', rng.choice(('visa', 'mastercard', 'amex')), f'{rng.randint(0, 9999):04}',
+                      rng.randint(1, 12), rng.randint(2025, 2032), f'{rng.choice(WORDS).title()} Bank', '',
+                      rng.randint(1, 10 ** 9)))
+        if index % 3 != 2:  # a card without metadata
+            conn.execute('INSERT INTO server_card_metadata VALUES (?, ?, ?, ?)',
+                         (card_id, rng.randint(0, 100), webkit_time(rng), ''))
+    counts['masked_credit_cards'] = sizes['credit_cards']
+
+    for instrument_id in range(1, sizes['bank_accounts'] + 1):
+        conn.execute('INSERT INTO masked_bank_accounts VALUES (?, ?, ?, ?, ?, ?)',
+                     (instrument_id, f'{rng.choice(WORDS).title()} Bank', f'{rng.randint(0, 9999):04}',
+                      rng.randint(1, 3), '', ''))
+        conn.execute('INSERT INTO masked_bank_accounts_metadata VALUES (?, ?, ?)',
+                     (instrument_id, rng.randint(0, 20), webkit_time(rng)))
+    counts['masked_bank_accounts'] = sizes['bank_accounts']
+
+    for index in range(sizes['loyalty_cards']):
+        card_id = f'loyalty{index}'
+        conn.execute('INSERT INTO loyalty_cards VALUES (?, ?, ?, ?, ?)',
+                     (card_id, rng.choice(WORDS).title(), 'Rewards', '', str(rng.randint(10 ** 9, 10 ** 10))))
+        conn.executemany('INSERT INTO loyalty_card_merchant_domain VALUES (?, ?)',
+                         [(card_id, domain_name(rng)) for _ in range(rng.randint(1, 2))])
+    counts['loyalty_cards'] = sizes['loyalty_cards']
+
+    for index in range(sizes['addresses']):
+        guid = f'{rng.getrandbits(128):032x}'
+        modified = unix_time(webkit_time(rng))
+        conn.execute('INSERT INTO addresses (guid, use_count, use_date, date_modified, language_code, record_type) '
+                     'VALUES (?, ?, ?, ?, ?, ?)', (guid, rng.randint(1, 30), modified + 1000, modified, 'en', 0))
+        tokens = {3: 'Jane', 5: 'Doe', 7: 'Jane Doe', 9: f'jane{index}@example.com', 14: '5551234567',
+                  77: f'{rng.randint(1, 999)} Main St', 33: rng.choice(WORDS).title(), 34: 'ON', 35: 'K1A 0B1',
+                  36: 'CA', 60: ''}
+        conn.executemany('INSERT INTO address_type_tokens (guid, type, value) VALUES (?, ?, ?)',
+                         [(guid, token_type, value) for token_type, value in tokens.items()])
+    counts['addresses'] = sizes['addresses']
+
+    close_database(conn, 'Web Data')
+    return counts, keyword_ids
+
+
+def write_login_data(profile_path, sizes, seed):
+    """Login Data: saved (and never saved) passwords, with gaps in the ids and after the last one."""
+    rng = random.Random(f'{seed}:Login Data')
+    conn = create_database(profile_path, 'Login Data')
+    login_id = 0
+    for login_id in rowids(rng, sizes['logins'], gap_rate=0.05, max_gap=4):
+        host = domain_name(rng)
+        created = webkit_time(rng)
+        never_saved = rng.random() < 0.1
+        conn.execute(
+            'INSERT INTO logins (id, origin_url, action_url, username_element, username_value, password_element, '
+            'password_value, signon_realm, date_created, blacklisted_by_user, scheme, password_type, times_used, '
+            "date_last_used, date_password_modified) VALUES (?, ?, ?, 'username', ?, 'password', ?, ?, ?, ?, 0, ?, ?, "
+            "?, ?)",
+            (login_id, f'https://{host}/login', f'https://{host}/session', '' if never_saved else f'user{login_id}',
+             b'' if never_saved else b'v10' + rng.randbytes(28), f'https://{host}/', created, int(never_saved),
+             rng.choice((0, 0, 1, 2)), rng.randint(0, 100), 0 if rng.random() < 0.2 else created + 10 ** 9,
+             0 if rng.random() < 0.3 else created))
+    close_database(conn, 'Login Data', {'logins': login_id + rng.randint(1, 5)})
+    return {'logins': sizes['logins']}
+
+
+def write_cookies(profile_path, sizes, seed):
+    """Network/Cookies"""
+    rng = random.Random(f'{seed}:Cookies')
+    conn = create_database(profile_path, 'Network/Cookies')
+    hosts = [domain_name(rng) for _ in range(max(10, sizes['cookies'] // 20))]
+
+    def cookie_rows():
+        for index in range(sizes['cookies']):
+            created = webkit_time(rng)
+            persistent = rng.random() < 0.8
+            yield (created, f'.{rng.choice(hosts)}', '', f'cookie{index}', '', b'v10' + rng.randbytes(16), '/',
+                   created + rng.randint(10 ** 9, 10 ** 14) if persistent else 0, rng.randint(0, 1),
+                   rng.randint(0, 1), created + rng.randint(0, 10 ** 10), int(persistent), int(persistent),
+                   rng.randint(0, 2), rng.choice((-1, 0, 1, 2)), 2, 443, created + rng.randint(0, 10 ** 9), 0, 0)
+
+    for batch in batches(cookie_rows()):
+        conn.executemany('INSERT INTO cookies VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                         batch)
+    close_database(conn, 'Network/Cookies')
+    return {'cookies': sizes['cookies']}
+
+
+def write_favicons(profile_path, sizes, seed):
+    """Favicons: icons in every format the parser recognizes, many pages sharing the same few images."""
+    rng = random.Random(f'{seed}:Favicons')
+    conn = create_database(profile_path, 'Favicons')
+    image_count = max(5, sizes['favicons'] // 5)
+    images = [rng.choice(IMAGE_HEADERS) + rng.randbytes(rng.randint(20, 2000)) for _ in range(image_count)]
+    bitmap_id = 0
+    mappings = 0
+    for icon_id in range(1, sizes['favicons'] + 1):
+        host = domain_name(rng)
+        conn.execute('INSERT INTO favicons VALUES (?, ?, ?)', (icon_id, f'https://{host}/favicon.ico',
+                                                                rng.choice((1, 1, 1, 2, 4, 8))))
+        for size in rng.sample((16, 32, 64), rng.randint(1, 2)):
+            bitmap_id += 1
+            conn.execute('INSERT INTO favicon_bitmaps VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         (bitmap_id, icon_id, webkit_time(rng) if rng.random() < 0.9 else 0, rng.choice(images),
+                          size, size, webkit_time(rng) if rng.random() < 0.5 else 0))
+        for page in range(rng.randint(1, 4)):
+            mappings += 1
+            conn.execute('INSERT INTO icon_mapping VALUES (?, ?, ?, 0)', (mappings, f'https://{host}/p{page}', icon_id))
+    close_database(conn, 'Favicons')
+    return {'favicons': sizes['favicons'], 'favicon_bitmaps': bitmap_id, 'icon_mapping': mappings}
+
+
+def write_shortcuts(profile_path, sizes, seed):
+    """Shortcuts: what was typed in the address bar and the suggestion picked"""
+    rng = random.Random(f'{seed}:Shortcuts')
+    conn = create_database(profile_path, 'Shortcuts')
+    for index in range(sizes['shortcuts']):
+        host = domain_name(rng)
+        text = host[:rng.randint(1, len(host))]
+        conn.execute("INSERT INTO omni_box_shortcuts VALUES (?, ?, ?, ?, ?, '0,0', ?, '0,0', ?, ?, '', ?, ?)",
+                     (f'{rng.getrandbits(128):032X}', text, f'https://{host}/', f'https://{host}/', host,
+                      title_text(rng), rng.choice((0, 1, 5)), rng.randint(0, 30), webkit_time(rng),
+                      rng.randint(1, 100)))
+    close_database(conn, 'Shortcuts')
+    return {'omni_box_shortcuts': sizes['shortcuts']}
+
+
+def write_top_sites(profile_path, sizes, seed):
+    """Top Sites"""
+    rng = random.Random(f'{seed}:Top Sites')
+    conn = create_database(profile_path, 'Top Sites')
+    hosts = sorted({domain_name(rng) for _ in range(sizes['top_sites'] * 2)})[:sizes['top_sites']]
+    conn.executemany('INSERT INTO top_sites VALUES (?, ?, ?)',
+                     [(f'https://{host}/', rank, title_text(rng)) for rank, host in enumerate(hosts)])
+    close_database(conn, 'Top Sites')
+    return {'top_sites': len(hosts)}
+
+
+def write_bookmarks(profile_path, sizes, seed):
+    """Bookmarks and Bookmarks.bak: nested folders of bookmarks, with Chrome's checksum."""
+    rng = random.Random(f'{seed}:Bookmarks')
+    next_id = 4  # 1 to 3 are the roots
+    count = 0
+
+    def node(folder_depth):
+        nonlocal next_id, count
+        next_id += 1
+        added = webkit_time(rng)
+        if folder_depth < 3 and rng.random() < 0.1:
+            children = [node(folder_depth + 1) for _ in range(rng.randint(0, 8))]
+            return {'children': children, 'date_added': str(added), 'date_last_used': '0',
+                    'date_modified': str(added + rng.randint(0, 10 ** 10)), 'guid': f'{rng.getrandbits(128):032x}',
+                    'id': str(next_id - 1), 'name': rng.choice(WORDS).title(), 'type': 'folder'}
+        count += 1
+        host = domain_name(rng)
+        return {'date_added': str(added), 'date_last_used': str(added + rng.randint(0, 10 ** 10))
+                if rng.random() < 0.5 else '0', 'guid': f'{rng.getrandbits(128):032x}', 'id': str(next_id - 1),
+                'name': title_text(rng).replace('\x0b\x01', ''), 'type': 'url', 'url': f'https://{host}/'}
+
+    def root(root_id, name, share):
+        children = []
+        while count < sizes['bookmarks'] * share:
+            children.append(node(0))
+        return {'children': children, 'date_added': str(END_TIME - YEAR), 'date_last_used': '0',
+                'date_modified': str(END_TIME), 'guid': f'{rng.getrandbits(128):032x}', 'id': str(root_id),
+                'name': name, 'type': 'folder'}
+
+    roots = {'bookmark_bar': root(1, 'Bookmarks bar', 0.6), 'other': root(2, 'Other bookmarks', 0.95),
+             'synced': root(3, 'Mobile bookmarks', 1)}
+    bookmarks = {'checksum': regen_checksum(roots), 'roots': roots, 'version': 1}
+    for name in ('Bookmarks', 'Bookmarks.bak'):
+        with open(os.path.join(profile_path, name), 'w', encoding='utf-8', newline='\n') as f:
+            json.dump(bookmarks, f, indent=3, ensure_ascii=False)
+    return {'bookmarks': count}
+
+
+def write_preferences(profile_path, sizes, seed):
+    """Preferences: the settings the Preferences worksheet reports."""
+    rng = random.Random(f'{seed}:Preferences')
+    created = webkit_time(rng)
+    preferences = {
+        'account_info': [{'email': 'jane.doe@example.com', 'full_name': 'Jane Doe', 'gaia': str(rng.getrandbits(64)),
+                          'given_name': 'Jane', 'locale': 'en-CA', 'picture_url': 'https://example.com/photo.jpg'}],
+        'browser': {'clear_data': {'browsing_history': True, 'cache': True, 'cookies': False, 'time_period': 4}},
+        'countryid_at_install': 17217,
+        'custom_links': {'list': [{'isMostVisited': True, 'title': rng.choice(WORDS).title(),
+                                   'url': f'https://{domain_name(rng)}/'} for _ in range(5)]},
+        'download': {'default_directory': 'C:\\Users\\user\\Downloads', 'prompt_for_download': False},
+        'history_clusters': {'all_cache': {'all_keywords': {word: {'score': round(rng.random() * 100, 2), 'type': 1}
+                                                            for word in rng.sample(WORDS, 10)}}},
+        'homepage': 'https://www.example.com/',
+        'homepage_is_newtabpage': False,
+        'NewTabPage': {'PrevNavigationTime': str(END_TIME - rng.randint(0, 10 ** 9))},
+        'profile': {'created_by_version': '120.0.6099.71', 'creation_time': str(created), 'exit_type': 'Crashed',
+                    'name': 'Person 1'},
+        'savefile': {'default_directory': 'C:\\Users\\user\\Documents'},
+        'session': {'restore_on_startup': 4, 'startup_urls': [f'https://{domain_name(rng)}/' for _ in range(2)]},
+    }
+    with open(os.path.join(profile_path, 'Preferences'), 'w', encoding='utf-8', newline='\n') as f:
+        json.dump(preferences, f, separators=(',', ':'), ensure_ascii=False)
+    return {'preferences': 1}
+
+
+def write_extensions(profile_path, sizes, seed):
+    """Extensions/<id>/<version>/manifest.json"""
+    rng = random.Random(f'{seed}:Extensions')
+    for _ in range(sizes['extensions']):
+        extension_id = ''.join(rng.choice('abcdefghijklmnop') for _ in range(32))
+        version = f'{rng.randint(1, 9)}.{rng.randint(0, 99)}.{rng.randint(0, 999)}'
+        folder = os.path.join(profile_path, 'Extensions', extension_id, f'{version}_0')
+        os.makedirs(folder, exist_ok=True)
+        manifest = {'author': 'Example Inc.', 'description': title_text(rng).replace('\x0b\x01', ''),
+                    'homepage_url': f'https://{domain_name(rng)}/', 'manifest_version': 3,
+                    'name': rng.choice(WORDS).title() + ' Helper', 'version': version}
+        with open(os.path.join(folder, 'manifest.json'), 'w', encoding='utf-8', newline='\n') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return {'extensions': sizes['extensions']}
+
+
+def generate_profile(profile_path, visits=MIN_VISITS, seed=SEED, on_status=None):
+    """
+    Write a synthetic profile. Its files replace any of the same name in the folder.
+    :param profile_path: profile folder (created if needed)
+    :param visits: number of visits in History; the other tables grow in proportion (see table_sizes)
+    :param seed: random seed; the same seed and number of visits always give the same records
+    :param on_status: called with a message as each file is written
+    :return: manifest: parameters and records written per file and table (also written to MANIFEST)
+    """
+    if visits < 1:
+        raise ValueError('visits must be at least 1')
+    os.makedirs(profile_path, exist_ok=True)
+    sizes = table_sizes(visits)
+    files = {}
+
+    def write(name, function, *args):
+        start = time.perf_counter()
+        result = function(profile_path, sizes, seed, *args)
+        if on_status is not None:
+            on_status(f'{name}: {time.perf_counter() - start:.1f} s')
+        return result
+
+    files['Web Data'], keyword_ids = write('Web Data', write_web_data)
+    files['History'] = write('History', write_history, keyword_ids)
+    files['Login Data'] = write('Login Data', write_login_data)
+    files['Network/Cookies'] = write('Network/Cookies', write_cookies)
+    files['Favicons'] = write('Favicons', write_favicons)
+    files['Shortcuts'] = write('Shortcuts', write_shortcuts)
+    files['Top Sites'] = write('Top Sites', write_top_sites)
+    files['Bookmarks'] = write('Bookmarks', write_bookmarks)
+    files['Preferences'] = write('Preferences', write_preferences)
+    files['Extensions'] = write('Extensions', write_extensions)
+
+    manifest = {'generator_version': GENERATOR_VERSION, 'seed': seed, 'visits': visits,
+                'sqlite_version': sqlite3.sqlite_version, 'files': files}
+    with open(os.path.join(profile_path, MANIFEST), 'w', encoding='utf-8', newline='\n') as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a deterministic synthetic Chromium profile.')
+    parser.add_argument('profile', help='profile folder to write (e.g. fixtures/10k/Default)')
+    parser.add_argument('-v', '--visits', type=int, default=MIN_VISITS,
+                        help=f'visits in History, from {MIN_VISITS:,} to {MAX_VISITS:,}; the other tables grow in '
+                             f'proportion (default: %(default)s)')
+    parser.add_argument('-s', '--seed', type=int, default=SEED, help='random seed (default: %(default)s)')
+    arguments = parser.parse_args(argv)
+    if not MIN_VISITS <= arguments.visits <= MAX_VISITS:
+        parser.error(f'--visits must be from {MIN_VISITS} to {MAX_VISITS}')
+
+    start = time.perf_counter()
+    manifest = generate_profile(arguments.profile, arguments.visits, arguments.seed, on_status=print)
+    records = sum(count for counts in manifest['files'].values() for count in counts.values())
+    print(f'{records:,} records written to {arguments.profile} in {time.perf_counter() - start:.1f} s')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,355 @@
+"""Columnar output: one Arrow IPC or Parquet file per worksheet, plus a manifest."""
+
+import datetime
+import json
+import math
+import os
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+from Classes.BrowserProfile import safe_file_name
+
+MANIFEST = 'manifest.json'
+
+
+def _import_pyarrow():
+    """pyarrow is an optional dependency, only needed for the columnar output formats."""
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError('The Arrow and Parquet output formats require pyarrow (pip install pyarrow).') from e
+    return pyarrow
+
+
+class ArrowWriterSession:
+    """
+    Write every worksheet of a run as its own Arrow IPC file in an output folder, one chunk at a time,
+    with a manifest.json describing the files (worksheet, file name, row count, columns and their types).
+
+    Same interface as ExcelWriterSession, so the scheduler and the engine do not care which one they
+    write to. Unlike a workbook there is no row limit, and the dtypes of the dataframes are kept:
+    integers (e.g. raw WebKit timestamps) stay int64, decoded times stay timestamps and decoded codes
+    stay categoricals (dictionary-encoded). Object columns are written as text, or as binary when they
+    only hold bytes (BLOBs). Object columns that mix types, like a decoded time that is "Never" when the
+    raw value is 0, are written as text.
+    """
+
+    FILE_FORMAT = 'arrow'
+    EXTENSION = '.arrow'
+
+    def __init__(self, output_folder: str, leading_sheets: tuple = ('Summary', 'Preferences'),
+                 should_continue: Callable[[], bool] = lambda: True):
+        """
+        Create the output folder, removing the files of a previous run into it (those its manifest lists).
+
+        Args:
+            output_folder: Output folder (includes path). Created if it does not exist.
+            leading_sheets: Worksheets listed first in the manifest, in this order, whenever they get written.
+            should_continue: Same as for the other writer sessions; a chunk is written in a single call,
+                             so it is never stopped part-way.
+        """
+        self.pa = _import_pyarrow()
+        self.output_folder = output_folder
+        self.should_continue = should_continue
+        self._leading_sheets = tuple(leading_sheets)
+        self._files: dict[str, dict] = {}  # worksheet name -> file name, writer, schema, row count, ...
+        self._order: list[str] = []  # worksheet names, in the order they should be listed
+        self._closed = False
+
+        os.makedirs(output_folder, exist_ok=True)
+        self._remove_previous_output()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def write(self, dataframe: pd.DataFrame, worksheet_name: str) -> int:
+        """
+        Write a dataframe to a new file.
+
+        Args:
+            dataframe: Dataframe to write (no index).
+            worksheet_name: Name of the worksheet it holds.
+
+        Returns:
+            The number of records written.
+        """
+        return self.write_chunks([dataframe], worksheet_name)
+
+    def write_chunks(self, chunks: Iterable[pd.DataFrame], worksheet_name: str) -> int:
+        """
+        Write a sequence of dataframes with the same columns to a new file, one chunk at a time.
+
+        Args:
+            chunks: Dataframes to write. The columns and their types are taken from the first chunk.
+            worksheet_name: Name of the worksheet they hold.
+
+        Returns:
+            The number of records written.
+        """
+        if worksheet_name in self._files:
+            raise ValueError(f"Sheet '{worksheet_name}' already exists.")
+
+        record_count = 0
+        for chunk in chunks:
+            record_count += self.write_chunk(chunk, worksheet_name)
+
+        if worksheet_name not in self._files:  # no chunks at all
+            self.write_chunk(pd.DataFrame(), worksheet_name)
+        return record_count
+
+    def write_chunk(self, chunk: pd.DataFrame, worksheet_name: str) -> int:
+        """
+        Append one dataframe to a worksheet's file. The first chunk creates the file, with its schema taken
+        from that chunk; later chunks are converted to that schema (which is widened if they do not fit).
+
+        Args:
+            chunk: Dataframe to append.
+            worksheet_name: Name of the worksheet.
+
+        Returns:
+            The number of records written.
+        """
+        output = self._files.get(worksheet_name)
+        dictionaries = output['dictionaries'] if output else {}
+        table = self._table(chunk, output, dictionaries)
+
+        if output is None:
+            file_name = safe_file_name(worksheet_name) + self.EXTENSION
+            output = {
+                'file': file_name,
+                'writer': self._open_writer(os.path.join(self.output_folder, file_name), table.schema),
+                'schema': table.schema,
+                'rows': 0,
+                'all_null': [True] * table.num_columns,  # columns with no value so far: their type is a guess
+                # columns whose integers so far all fit in a float64 exactly (see _common_type)
+                'exact_in_double': [True] * table.num_columns,
+                'dictionaries': dictionaries,  # column position -> values of the categorical column so far
+            }
+            self._files[worksheet_name] = output
+            self._order.append(worksheet_name)
+
+        output['writer'].write_table(table)
+        output['rows'] += len(chunk)
+        for i, column in enumerate(table.columns):
+            output['all_null'][i] = output['all_null'][i] and column.null_count == len(column)
+            if self.pa.types.is_integer(column.type):
+                output['exact_in_double'][i] = output['exact_in_double'][i] and self._exact_in_double(column)
+        return len(chunk)
+
+    def has_worksheet(self, worksheet_name: str) -> bool:
+        """Return True if something has already been written to worksheet_name."""
+        return worksheet_name in self._files
+
+    def order_sheets(self, worksheet_names: list) -> None:
+        """
+        List the given worksheets, in this order, right after the leading worksheets in the manifest.
+
+        Args:
+            worksheet_names: Names of worksheets, in the order they should appear.
+        """
+        listed = [name for name in worksheet_names if name in self._files and name not in self._leading_sheets]
+        others = [name for name in self._order if name not in listed and name not in self._leading_sheets]
+        self._order = [name for name in self._leading_sheets if name in self._files] + listed + others
+
+    def close(self) -> None:
+        """Close the files and write the manifest."""
+        if self._closed:
+            return
+        self._closed = True
+
+        for output in self._files.values():
+            output['writer'].close()
+        self.order_sheets([])  # leading worksheets first
+
+        manifest = {
+            'format': self.FILE_FORMAT,
+            'created_utc': datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'worksheets': [
+                {
+                    'worksheet': worksheet_name,
+                    'file': self._files[worksheet_name]['file'],
+                    'rows': self._files[worksheet_name]['rows'],
+                    'columns': [
+                        {'name': field.name, 'type': str(field.type)}
+                        for field in self._files[worksheet_name]['schema']
+                    ],
+                }
+                for worksheet_name in self._order
+            ],
+        }
+        with open(os.path.join(self.output_folder, MANIFEST), 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=1)
+
+    def _open_writer(self, path: str, schema):
+        return self.pa.ipc.new_file(path, schema, options=self.pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+
+    def _read_table(self, path: str):
+        with self.pa.OSFile(path, 'rb') as source:
+            return self.pa.ipc.open_file(source).read_all()
+
+    def _remove_previous_output(self) -> None:
+        """Delete the files listed by the manifest of a previous run into the same folder"""
+        manifest_path = os.path.join(self.output_folder, MANIFEST)
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as file:
+                previous = json.load(file)
+        except (OSError, ValueError):
+            return
+
+        for worksheet in previous.get('worksheets', []):
+            try:
+                os.remove(os.path.join(self.output_folder, os.path.basename(worksheet['file'])))
+            except (OSError, KeyError, TypeError):
+                pass
+        os.remove(manifest_path)
+
+    def _table(self, dataframe: pd.DataFrame, output: dict | None, dictionaries: dict):
+        """
+        Convert a dataframe to an Arrow table, one column at a time (by position: names can repeat).
+        For a later chunk (output given), the table has the file's schema, widened first if need be.
+        """
+        pa = self.pa
+        arrays = [self._column_array(dataframe.iloc[:, i], dictionaries, i) for i in range(dataframe.shape[1])]
+
+        if output is None:
+            # Arrow and Parquet readers expect unique column names
+            unique_names = []
+            for name in (str(column) for column in dataframe.columns):
+                unique_name, suffix = name, 2
+                while unique_name in unique_names:
+                    unique_name, suffix = f'{name} ({suffix})', suffix + 1
+                unique_names.append(unique_name)
+            return pa.Table.from_arrays(arrays, names=unique_names)
+
+        schema = output['schema']
+        if len(arrays) != len(schema):
+            raise ValueError(f'Chunk has {len(arrays)} columns instead of {len(schema)}.')
+
+        widened = pa.schema([
+            field.with_type(self._common_type(field.type, array, all_null, exact_in_double))
+            for field, array, all_null, exact_in_double in zip(schema, arrays, output['all_null'],
+                                                                output['exact_in_double'])
+        ])
+        if not widened.equals(schema):
+            self._rewrite(output, widened)
+
+        return pa.Table.from_arrays([self._cast(array, field.type) for array, field in zip(arrays, widened)],
+                                    schema=widened)
+
+    def _column_array(self, series: pd.Series, dictionaries: dict, position: int):
+        """Convert a column to an Arrow array of the matching type"""
+        pa = self.pa
+
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Each chunk's categories are added to the column's dictionary so far, so that every batch's
+            # dictionary extends the previous one (an Arrow IPC file cannot replace a dictionary, only add to it)
+            dictionary = dictionaries.setdefault(position, {'values': [], 'positions': {}})
+            for category in series.cat.categories:
+                if category not in dictionary['positions']:
+                    dictionary['positions'][category] = len(dictionary['values'])
+                    dictionary['values'].append(category)
+            mapping = np.array([dictionary['positions'][category] for category in series.cat.categories] or [0],
+                               dtype=np.int32)
+            codes = series.cat.codes.to_numpy()
+            indices = pa.array(mapping[np.where(codes < 0, 0, codes)], mask=codes < 0)
+            values = pa.array(dictionary['values'], type=None if dictionary['values'] else pa.string())
+            return pa.DictionaryArray.from_arrays(indices, values)
+        if series.dtype == object:
+            return self._object_array(series.tolist())
+        return pa.Array.from_pandas(series)  # numbers, booleans, datetimes and nullable integers
+
+    def _common_type(self, file_type, array, file_all_null: bool, file_exact_in_double: bool):
+        """
+        Type that holds both what the file has so far and a later chunk's column. Chunks of one column can
+        disagree: integers come back as float64 in a chunk computed with NaN for missing values, and a column
+        that is NULL throughout a chunk comes back as text.
+
+        Integers stay int64 when the chunk's floats are whole numbers (NaN becomes null). Otherwise numbers are
+        widened to float64 only if every integer, written or in the chunk, fits in it exactly, and to text if
+        not: a raw timestamp (17 digits) must not lose its last digits.
+        """
+        pa = self.pa
+        if array.type.equals(file_type) or array.null_count == len(array):
+            return file_type
+        if file_all_null:
+            return array.type
+        if self._is_number(file_type) and self._is_number(array.type):
+            if pa.types.is_integer(file_type) and pa.types.is_floating(array.type) and self._whole_numbers(array):
+                return file_type
+            if not (pa.types.is_floating(file_type) or pa.types.is_floating(array.type)):
+                return file_type
+            if file_exact_in_double and (pa.types.is_floating(array.type) or self._exact_in_double(array)):
+                return pa.float64()
+        return pa.string()
+
+    def _whole_numbers(self, array) -> bool:
+        """True if the floats of array (missing values aside) are all whole numbers that fit in an int64"""
+        values = array.to_numpy(zero_copy_only=False)  # NaN where missing
+        values = values[~np.isnan(values)]
+        return bool(np.all(np.floor(values) == values) and np.all(np.abs(values) < 2.0 ** 63))
+
+    def _exact_in_double(self, array) -> bool:
+        """True if every integer of array (missing values aside) can be held exactly by a float64"""
+        if array.null_count == len(array):
+            return True
+        bounds = self.pa.compute.min_max(array)
+        return -2 ** 53 <= bounds['min'].as_py() and bounds['max'].as_py() <= 2 ** 53
+
+    def _cast(self, array, field_type):
+        """Convert an array to field_type (see _common_type for when numbers are converted)"""
+        if array.type.equals(field_type):
+            return array
+        safe = not (self._is_number(array.type) and self._is_number(field_type))
+        return array.cast(field_type, safe=safe)
+
+    def _rewrite(self, output: dict, schema) -> None:
+        """Rewrite what has been written to a file so far with a wider schema, then keep appending to it"""
+        pa = self.pa
+        path = os.path.join(self.output_folder, output['file'])
+        output['writer'].close()
+        written = self._read_table(path)
+        columns = [self._cast(column, field.type) for column, field in zip(written.columns, schema)]
+        written = pa.Table.from_arrays(columns, schema=schema)
+        output['writer'] = self._open_writer(path, schema)
+        output['writer'].write_table(written)
+        output['schema'] = schema
+
+    def _is_number(self, arrow_type) -> bool:
+        return self.pa.types.is_integer(arrow_type) or self.pa.types.is_floating(arrow_type)
+
+    def _object_array(self, values: list):
+        """Binary when every value is bytes (BLOBs), text otherwise"""
+        pa = self.pa
+        values = [None if self._is_missing(value) else value for value in values]
+        present = [value for value in values if value is not None]
+
+        if present and all(isinstance(value, (bytes, bytearray, memoryview)) for value in present):
+            return pa.array([None if value is None else bytes(value) for value in values], type=pa.binary())
+        return pa.array([value if value is None or isinstance(value, str) else str(value) for value in values],
+                        type=pa.string())
+
+    @staticmethod
+    def _is_missing(value) -> bool:
+        return value is None or value is pd.NaT or value is pd.NA or (isinstance(value, float) and math.isnan(value))
+
+
+class ParquetWriterSession(ArrowWriterSession):
+    """Same as ArrowWriterSession, writing one Parquet file per worksheet (each chunk is a row group)."""
+
+    FILE_FORMAT = 'parquet'
+    EXTENSION = '.parquet'
+
+    def _open_writer(self, path: str, schema):
+        return self.pa.parquet.ParquetWriter(path, schema)
+
+    def _read_table(self, path: str):
+        return self.pa.parquet.read_table(path)
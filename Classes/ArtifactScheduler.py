@@ -0,0 +1,229 @@
+"""Concurrent artifact execution with a single writer thread."""
+
+import contextlib
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
+
+import pandas as pd
+
+
+class ArtifactResult:
+    """Outcome of one artifact: the worksheets it wrote (with record counts) and the error, if any."""
+
+    def __init__(self, artifact_name: str):
+        self.artifact_name = artifact_name
+        self.worksheets: list[tuple[str, int]] = []  # (worksheet name, record count), in the order produced
+        self.error: Exception | None = None
+        self.skipped = False  # True if processing was stopped before the artifact started
+        self.stopped = False  # True if processing was stopped while the artifact was running
+        # Worksheets cut short by the stop, with the records written to them (not in worksheets)
+        self.partial_worksheets: list[tuple[str, int]] = []
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None
+
+
+class ArtifactScheduler:
+    """
+    Run artifacts concurrently on a pool of reader threads while a single writer thread writes
+    their results to the output.
+
+    Each artifact belongs to a group (typically the database file it reads). Artifacts of the same
+    group run one after the other on the same reader thread, in the order given, so that they reuse
+    that file's connection and page cache; different groups run in parallel. Reading SQLite releases
+    the GIL, so threads give real concurrency without having to pickle dataframes between processes.
+
+    Readers push (worksheet, chunk) messages onto a bounded queue. The writer is the only thread that
+    touches the output: it appends each chunk to its worksheet as it arrives (write-only worksheets can
+    be written in any interleaving) and, once everything is done, puts the worksheets back in the order
+    the artifacts were given, so the output does not depend on which artifact finished first.
+    """
+
+    def __init__(self, workbook, max_workers: int = 4, queue_size: int = 16,
+                 should_continue: Callable[[], bool] = lambda: True,
+                 on_start: Callable[[str], None] | None = None,
+                 on_done: Callable[[ArtifactResult], None] | None = None,
+                 metrics=None):
+        """
+        Args:
+            workbook: Output session (e.g. ExcelWriterSession) providing write_chunk, has_worksheet
+                      and order_sheets.
+            max_workers: Number of reader threads.
+            queue_size: Maximum number of chunks waiting to be written. Bounds memory use when the
+                        readers are faster than the writer.
+            should_continue: Called before each artifact and between chunks, by the readers and by the
+                             writer; returning False stops processing. Chunks still queued when it does
+                             are dropped rather than written, and the worksheets cut short are listed in
+                             ArtifactResult.partial_worksheets rather than ArtifactResult.worksheets.
+            on_start: Called with the artifact name when an artifact starts (from a reader thread).
+            on_done: Called with the ArtifactResult when an artifact is finished (from the writer thread).
+            metrics: RunMetrics that gets the time spent in each artifact's producer ('read') and writing its
+                     chunks ('write'). The artifacts must have been started in it (e.g. from on_start).
+        """
+        self.workbook = workbook
+        self.max_workers = max(1, max_workers)
+        self.should_continue = should_continue
+        self.on_start = on_start
+        self.on_done = on_done
+        self.metrics = metrics
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+
+    def run(self, artifacts: list[tuple[str, str, Callable[[], Iterable[tuple]]]]) -> list[ArtifactResult]:
+        """
+        Run the artifacts and write their worksheets.
+
+        Args:
+            artifacts: (artifact name, group, producer) tuples, in the order their worksheets should
+                       appear in the output. producer() returns an iterable of
+                       (worksheet name, iterable of dataframes) or
+                       (worksheet name, iterable of dataframes, record count) tuples, the latter when
+                       the number of records to report differs from the number of rows written.
+
+        Returns:
+            One ArtifactResult per artifact, in the order given.
+        """
+        results = [ArtifactResult(name) for name, _, _ in artifacts]
+
+        groups: dict[str, list[int]] = {}  # group -> artifact indexes, in order
+        for index, (_, group, _) in enumerate(artifacts):
+            groups.setdefault(group, []).append(index)
+
+        writer = threading.Thread(target=self._write, args=(results,), daemon=True)
+        writer.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = [pool.submit(self._read_group, indexes, artifacts, results) for indexes in groups.values()]
+                for future in futures:
+                    future.result()
+        finally:
+            self._queue.put(None)  # tells the writer there is nothing more to come
+            writer.join()
+
+        self.workbook.order_sheets([ws for result in results
+                                    for ws, _ in result.worksheets + result.partial_worksheets])
+        return results
+
+    def _read_group(self, indexes: list[int], artifacts: list, results: list[ArtifactResult]) -> None:
+        """Run the artifacts of one group, one after the other (reader thread)."""
+        for index in indexes:
+            name, _, producer = artifacts[index]
+            result = results[index]
+
+            if not self.should_continue():
+                result.skipped = True
+                self._queue.put(('done', index, None, None))
+                continue
+
+            if self.on_start:
+                self.on_start(name)
+
+            worksheet_name = None  # worksheet being produced, until its 'end' is sent
+            finished = False
+            try:
+                for output in self._timed(producer, name):
+                    worksheet_name, chunks = output[0], output[1]
+                    record_count = output[2] if len(output) > 2 else None
+                    self._queue.put(('start', index, worksheet_name, None))
+                    for chunk in self._timed(lambda: chunks, name):
+                        if result.failed or not self.should_continue():
+                            break
+                        self._queue.put(('chunk', index, worksheet_name, chunk))
+                    else:
+                        self._queue.put(('end', index, worksheet_name, record_count))
+                        worksheet_name = None
+                    if result.failed or not self.should_continue():
+                        break  # before the producer starts on its next worksheet
+                else:
+                    finished = True
+            except Exception as error:
+                if result.error is None:
+                    result.error = error
+
+            if not finished and not self.should_continue():
+                # Cut short by the stop: the worksheet being produced (if any) is not complete
+                self._queue.put(('stopped', index, worksheet_name, None))
+
+            self._queue.put(('done', index, None, None))
+
+    def _write(self, results: list[ArtifactResult]) -> None:
+        """Write chunks as they arrive, in whatever order the readers produce them (writer thread)."""
+        record_counts: dict[tuple[int, str], int] = {}
+        cut_short: set[tuple[int, str]] = set()  # worksheets with chunks dropped or partly written because of a stop
+
+        while True:
+            message = self._queue.get()
+            if message is None:
+                break
+            kind, index, worksheet_name, payload = message
+            result = results[index]
+
+            try:
+                if kind == 'start':
+                    if self.workbook.has_worksheet(worksheet_name):
+                        raise ValueError(f"Sheet '{worksheet_name}' already exists.")
+                    record_counts[(index, worksheet_name)] = 0
+
+                elif kind == 'chunk' and not result.failed and not self.should_continue():
+                    cut_short.add((index, worksheet_name))
+
+                elif kind == 'chunk' and not result.failed:
+                    with self._working_on(result.artifact_name):
+                        start = time.perf_counter()
+                        written = self.workbook.write_chunk(payload, worksheet_name)
+                    record_counts[(index, worksheet_name)] += written
+                    if written < len(payload):  # the writer was stopped part-way through the chunk
+                        cut_short.add((index, worksheet_name))
+                    if self.metrics is not None:
+                        self.metrics.add(result.artifact_name, 'write', time.perf_counter() - start)
+                        self.metrics.sample_memory()
+
+                elif kind == 'stopped' or (kind == 'end' and (index, worksheet_name) in cut_short):
+                    # Neither complete nor, if nothing was written to it, created as an empty worksheet
+                    result.stopped = True
+                    if (index, worksheet_name) in record_counts and self.workbook.has_worksheet(worksheet_name):
+                        result.partial_worksheets.append((worksheet_name, record_counts[(index, worksheet_name)]))
+
+                elif kind == 'end' and not result.failed:
+                    if not self.workbook.has_worksheet(worksheet_name):  # the producer yielded no chunks
+                        self.workbook.write_chunk(pd.DataFrame(), worksheet_name)
+                    record_count = record_counts[(index, worksheet_name)] if payload is None else payload
+                    result.worksheets.append((worksheet_name, record_count))
+
+                elif kind == 'done' and self.on_done:
+                    self.on_done(result)
+
+            except Exception as error:
+                if result.error is None:
+                    result.error = error
+
+    def _working_on(self, artifact_name: str):
+        """Context in which what the calling thread measures goes to artifact_name (see RunMetrics)."""
+        if self.metrics is None:
+            return contextlib.nullcontext()
+        return self.metrics.working_on(artifact_name)
+
+    def _timed(self, iterable: Callable[[], Iterable], artifact_name: str):
+        """Iterate over iterable(), adding the time spent producing each item to the artifact's 'read' time."""
+        if self.metrics is None:
+            yield from iterable()
+            return
+
+        with self._working_on(artifact_name):
+            start = time.perf_counter()
+            iterator = iter(iterable())
+            self.metrics.add(artifact_name, 'read', time.perf_counter() - start)
+        while True:
+            with self._working_on(artifact_name):
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    self.metrics.add(artifact_name, 'read', time.perf_counter() - start)
+                    self.metrics.sample_memory()
+            yield item
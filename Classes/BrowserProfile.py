@@ -0,0 +1,116 @@
+"""A browser profile folder found on disk, and how to tell which browser and user it belongs to."""
+
+import json
+import os
+import re
+
+# Browser -> path fragments (lower case, with forward slashes) of its User Data folder on Windows, macOS and
+# Linux. Checked in this order, so more specific names come before the ones they contain.
+BROWSERS = [
+    ('Edge', ('microsoft/edge', 'microsoft edge', 'microsoft-edge')),
+    ('Brave', ('bravesoftware/brave-browser',)),
+    ('Opera GX', ('opera software/opera gx',)),
+    ('Opera', ('opera software/opera', 'com.operasoftware.opera', '.config/opera')),
+    ('Vivaldi', ('/vivaldi',)),
+    ('Chromium', ('/chromium/',)),
+    ('Chrome', ('google/chrome', 'google-chrome')),
+]
+
+# Files of a Chromium profile folder. A folder that has at least MIN_PROFILE_MARKERS of them is taken to be a
+# profile (a single one is too common a name, e.g. a folder that happens to hold a file called History). The same
+# rule is used for the folders of a User Data folder (see ProfileSweep) and of an evidence tree (see ProfileCrawler).
+PROFILE_MARKERS = frozenset(('History', 'Preferences', 'Web Data', 'WebAssistDatabase'))
+MIN_PROFILE_MARKERS = 2
+
+# Folders whose subfolders are named after the users of the machine (Windows, macOS, Linux, Windows XP)
+USER_FOLDERS = ('users', 'home', 'documents and settings')
+
+# Characters that cannot appear in a file name on Windows
+_UNSAFE_FILE_NAME = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+
+class BrowserProfile:
+    """A profile folder, with what is known about it (from Local State and from its path)."""
+
+    def __init__(self, folder: str, path: str, name: str = '', user_name: str = '', in_local_state: bool = True,
+                 browser: str = '', user: str = '', output_name: str | None = None):
+        """
+        Args:
+            folder: Name of the profile folder (e.g. "Default", "Profile 1").
+            path: Full path of the profile folder.
+            name: Profile name shown by the browser (profile.info_cache.<folder>.name in Local State).
+            user_name: Account signed in to the profile, if any (profile.info_cache.<folder>.user_name).
+            in_local_state: False for a profile folder on disk that Local State does not list
+                            (e.g. a profile that was deleted but whose folder was left behind).
+            browser: Browser the profile belongs to, if it can be told from its path (see BROWSERS).
+            user: User account of the machine the profile belongs to, if it can be told from its path.
+            output_name: Name of the profile's output file, without extension. Defaults to the folder name.
+        """
+        self.folder = folder
+        self.path = path
+        self.name = name
+        self.user_name = user_name
+        self.in_local_state = in_local_state
+        self.browser = browser
+        self.user = user
+        self.output_name = output_name or folder
+
+
+def read_local_state(user_data_path: str) -> tuple[dict, list]:
+    """
+    Read the profile list of a User Data folder's Local State file.
+    :param user_data_path: folder that holds Local State
+    :return: (profile.info_cache: folder -> info dict, profile.profiles_order), both empty if it cannot be read
+    """
+    try:
+        with open(os.path.join(user_data_path, 'Local State'), 'r', encoding='utf-8') as file:
+            profile_state = json.load(file).get('profile', {})
+        info_cache = profile_state.get('info_cache', {}) or {}
+        order = list(profile_state.get('profiles_order', []) or [])
+        return info_cache, order
+    except (OSError, ValueError, AttributeError):
+        return {}, []
+
+
+def is_profile_folder(file_names) -> bool:
+    """
+    Tell whether a folder is a browser profile from the names of the files in it.
+    :param file_names: names of (some of) the files of the folder, including at least those in PROFILE_MARKERS
+    :return: True if it has at least MIN_PROFILE_MARKERS of the PROFILE_MARKERS files
+    """
+    return len(PROFILE_MARKERS.intersection(file_names)) >= MIN_PROFILE_MARKERS
+
+
+def identify_browser(path: str) -> str:
+    """
+    Tell which browser a profile belongs to from its path.
+    :param path: profile folder
+    :return: browser name (see BROWSERS), or '' if the path does not say
+    """
+    normalized = path.replace('\\', '/').lower() + '/'
+    for browser, fragments in BROWSERS:
+        if any(fragment in normalized for fragment in fragments):
+            return browser
+    return ''
+
+
+def identify_user(path: str) -> str:
+    """
+    Tell which user account of the machine a profile belongs to from its path (the folder after Users, home, ...).
+    :param path: profile folder
+    :return: user name, or '' if the path does not say
+    """
+    parts = [part for part in re.split(r'[\\/]', path) if part]
+    for i, part in enumerate(parts[:-1]):
+        if part.lower() in USER_FOLDERS:
+            return parts[i + 1]
+    return ''
+
+
+def safe_file_name(name: str) -> str:
+    """
+    Replace the characters that cannot appear in a file name.
+    :param name: file name, without folder
+    :return: name with each such character replaced by '_'
+    """
+    return _UNSAFE_FILE_NAME.sub('_', name).strip(' .') or '_'
@@ -0,0 +1,48 @@
+"""Stop request shared by every thread of a run."""
+
+import threading
+from typing import Callable
+
+
+class CancellationToken:
+    """
+    Set once, from any thread (e.g. the GUI's Stop button), to stop a run. The threads doing the work poll
+    it (it can be passed wherever a should_continue callable is expected), and callbacks registered with
+    on_cancel are called at once to interrupt work that cannot poll it, such as a running SQLite query.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def __call__(self) -> bool:
+        """True while the run should continue (the should_continue convention)."""
+        return not self._event.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Request the run to stop and call the registered callbacks (once)."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """
+        Register a callback to call when the run is cancelled (right away if it already is).
+
+        Args:
+            callback: Called from the thread that cancels the run.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
@@ -0,0 +1,238 @@
+"""Storage of dataframe chunks in a SQLite file, as data only."""
+
+import datetime
+import json
+import math
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+
+class ChunkStore:
+    """
+    Keep dataframes in a SQLite file, one table per dataframe, and read them back with the same columns,
+    dtypes and values.
+
+    Nothing in the file is ever executed or unpickled: SQLite holds the values (integers, floats, text,
+    BLOBs and NULLs) and a description of each column, kept by the caller as JSON, holds what SQLite cannot
+    (the dtype, the categories of a categorical column). In object columns, values SQLite has no type for
+    (NaN next to None, timestamps, booleans, integers beyond 64 bits, numpy scalars, lists, ...) are stored
+    as text or numbers, with a tag in a companion column saying how to read them back. Values of any other
+    type are stored as their text. The index is not kept: dataframes are read back with a RangeIndex.
+    """
+
+    def __init__(self, database_file: str, read_only: bool = False):
+        """
+        Args:
+            database_file: SQLite file (created when writing).
+            read_only: Open an existing file to read from it.
+        """
+        if read_only:
+            path = database_file.replace('%', '%25').replace('?', '%3f').replace('#', '%23')
+            self._connection = sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+            self._connection.execute('PRAGMA trusted_schema = OFF')  # a foreign file cannot run SQL functions
+        else:
+            self._connection = sqlite3.connect(database_file, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode = OFF')  # a file that is not complete is discarded
+            self._connection.execute('PRAGMA synchronous = OFF')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def write(self, dataframe: pd.DataFrame, table_name: str) -> list[dict]:
+        """
+        Store a dataframe in a new table.
+
+        Args:
+            dataframe: Dataframe to store.
+            table_name: Name of the table (letters, digits and underscores).
+
+        Returns:
+            The description of its columns (JSON-serializable), to pass to read.
+        """
+        descriptions, columns = [], []
+        for position in range(dataframe.shape[1]):
+            description, values, tags = self._encode_column(dataframe.iloc[:, position])
+            description['name'] = dataframe.columns[position]
+            descriptions.append(description)
+            columns.append(values)
+            if tags is not None:
+                columns.append(tags)
+
+        names = [f'c{i}' for i in range(len(columns))] or ['c0']
+        self._connection.execute(f'CREATE TABLE "{table_name}" ({", ".join(names)})')
+        if columns:
+            placeholders = ', '.join('?' * len(columns))
+            self._connection.executemany(f'INSERT INTO "{table_name}" VALUES ({placeholders})', zip(*columns))
+        else:  # no columns: one row per record, so that the record count is kept
+            self._connection.executemany(f'INSERT INTO "{table_name}" VALUES (NULL)', [()] * len(dataframe))
+        self._connection.commit()
+        return descriptions
+
+    def read(self, table_name: str, descriptions: list[dict]) -> pd.DataFrame:
+        """
+        Read back a dataframe stored by write.
+
+        Args:
+            table_name: Name of its table.
+            descriptions: Description of its columns, as returned by write.
+
+        Returns:
+            The dataframe.
+        """
+        rows = self._connection.execute(f'SELECT * FROM "{table_name}" ORDER BY rowid').fetchall()
+        stored = list(zip(*rows)) if rows else None
+
+        arrays, position = [], 0
+        for description in descriptions:
+            values = list(stored[position]) if stored else []
+            tags = None
+            if description['kind'] == 'object':
+                tags = list(stored[position + 1]) if stored else []
+                position += 1
+            position += 1
+            arrays.append(self._decode_column(description, values, tags))
+
+        dataframe = pd.DataFrame({i: array for i, array in enumerate(arrays)}, index=pd.RangeIndex(len(rows)))
+        dataframe.columns = [description['name'] for description in descriptions]
+        return dataframe
+
+    def close(self) -> None:
+        self._connection.close()
+
+    @classmethod
+    def _encode_column(cls, series: pd.Series) -> tuple[dict, list, list | None]:
+        """(description, values to store, tags to store or None) of a column"""
+        dtype = series.dtype
+
+        if isinstance(dtype, pd.CategoricalDtype):
+            categories = [cls._encode_value(value) for value in dtype.categories.tolist()]
+            return ({'kind': 'category', 'categories': categories, 'ordered': bool(dtype.ordered)},
+                    series.cat.codes.tolist(), None)
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            return {'kind': 'datetime', 'dtype': str(dtype)}, series.array.asi8.tolist(), None
+        if isinstance(dtype, np.dtype) and dtype.kind in 'iub':
+            return {'kind': 'numpy', 'dtype': dtype.str}, series.tolist(), None
+        if isinstance(dtype, np.dtype) and dtype.kind == 'f':
+            # sqlite3 stores NaN as NULL, which is read back as NaN
+            return {'kind': 'numpy', 'dtype': dtype.str}, series.tolist(), None
+        if pd.api.types.is_extension_array_dtype(dtype) and dtype.kind in 'iufbO':  # Int64, boolean, string, ...
+            return ({'kind': 'extension', 'dtype': str(dtype)},
+                    [None if value is pd.NA else value for value in series.astype(object).tolist()], None)
+
+        values, tags = [], []
+        for value in series.astype(object).tolist():
+            value, tag = cls._encode_value(value)
+            values.append(value)
+            tags.append(tag)
+        return {'kind': 'object'}, values, tags
+
+    @classmethod
+    def _decode_column(cls, description: dict, values: list, tags: list | None):
+        kind = description['kind']
+
+        if kind == 'category':
+            categories = [cls._decode_value(value, tag) for value, tag in description['categories']]
+            codes = np.array(values, dtype=np.int64)
+            return pd.Categorical.from_codes(codes, categories=categories, ordered=description['ordered'])
+        if kind == 'datetime':
+            dtype = pd.api.types.pandas_dtype(description['dtype'])
+            unit = dtype.unit if isinstance(dtype, pd.DatetimeTZDtype) else np.datetime_data(dtype)[0]
+            naive = pd.Series(np.array(values, dtype=np.int64).view(f'datetime64[{unit}]'))
+            if isinstance(dtype, pd.DatetimeTZDtype):
+                return naive.dt.tz_localize('UTC').dt.tz_convert(dtype.tz)
+            return naive
+        if kind == 'numpy':
+            dtype = np.dtype(description['dtype'])
+            if dtype.kind == 'f':
+                return np.array([math.nan if value is None else value for value in values], dtype=dtype)
+            return np.array(values, dtype=dtype)
+        if kind == 'extension':
+            return pd.array(values, dtype=pd.api.types.pandas_dtype(description['dtype']))
+
+        if not any(tag is not None for tag in tags):
+            return pd.Series(values, dtype=object)
+        return pd.Series([cls._decode_value(value, tag) for value, tag in zip(values, tags)], dtype=object)
+
+    @staticmethod
+    def _encode_value(value) -> tuple:
+        """(value SQLite can store, tag saying how to read it back, or None when it is stored as it is)"""
+        if value is None or type(value) in (str, bytes):
+            return value, None
+        if type(value) is int:
+            return (value, None) if -2 ** 63 <= value < 2 ** 63 else (str(value), 'int')
+        if type(value) is float:
+            return (value, None) if not math.isnan(value) else (None, 'nan')
+        if value is pd.NA:
+            return None, 'na'
+        if value is pd.NaT:
+            return None, 'nat'
+        if isinstance(value, bool):
+            return int(value), 'bool'
+        if isinstance(value, pd.Timestamp):
+            return value.isoformat(), 'timestamp'
+        if isinstance(value, pd.Timedelta):
+            return value.value, 'timedelta64'
+        if isinstance(value, datetime.datetime):
+            return value.isoformat(), 'datetime'
+        if isinstance(value, datetime.date):
+            return value.isoformat(), 'date'
+        if isinstance(value, datetime.time):
+            return value.isoformat(), 'time'
+        if isinstance(value, datetime.timedelta):
+            return value // datetime.timedelta(microseconds=1), 'timedelta'
+        if isinstance(value, bytearray):
+            return bytes(value), 'bytearray'
+        if isinstance(value, np.generic) and value.dtype.kind in 'iufb':
+            return value.item(), f'numpy:{value.dtype.str}'
+        if isinstance(value, (list, dict)):
+            try:
+                return json.dumps(value), 'json'
+            except (TypeError, ValueError):
+                pass
+        if isinstance(value, str):  # subclass of str
+            return str(value), None
+        if isinstance(value, float):  # subclass of float (e.g. numpy.float64)
+            return ChunkStore._encode_value(float(value))
+        if isinstance(value, int):  # subclass of int
+            return ChunkStore._encode_value(int(value))
+        return str(value), None
+
+    @staticmethod
+    def _decode_value(value, tag):
+        if tag is None:
+            return value
+        if tag == 'int':
+            return int(value)
+        if tag == 'nan':
+            return math.nan
+        if tag == 'na':
+            return pd.NA
+        if tag == 'nat':
+            return pd.NaT
+        if tag == 'bool':
+            return bool(value)
+        if tag == 'timestamp':
+            return pd.Timestamp(value)
+        if tag == 'timedelta64':
+            return pd.Timedelta(value)
+        if tag == 'datetime':
+            return datetime.datetime.fromisoformat(value)
+        if tag == 'date':
+            return datetime.date.fromisoformat(value)
+        if tag == 'time':
+            return datetime.time.fromisoformat(value)
+        if tag == 'timedelta':
+            return datetime.timedelta(microseconds=value)
+        if tag == 'bytearray':
+            return bytearray(value)
+        if tag == 'json':
+            return json.loads(value)
+        if tag.startswith('numpy:'):
+            return np.dtype(tag[len('numpy:'):]).type(value)
+        raise ValueError(f'Unknown value tag: {tag}')
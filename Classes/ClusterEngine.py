@@ -0,0 +1,391 @@
+"""History Clusters worksheets derived from one cluster join, read in chunks."""
+
+import sqlite3
+from typing import Callable, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from Classes.ParserSettings import CHUNK_SIZE
+from Functions.sql_frames import read_sql_query
+from SQLite.history import chrome_history_clusters_duplicate_visits
+
+
+class ClusterEngine:
+    """
+    Build the six History Clusters worksheets (Clusters Overview, Contents, Search Term, Timeline,
+    Duplicate Visits and Comprehensive Export) from one join of clusters, clusters_and_visits, visits,
+    urls and the content/context annotation tables, instead of running six queries that each re-join them.
+
+    The join is read in chunks of whole clusters (it is ordered by cluster), so memory use is bounded by the
+    chunk size rather than by the size of History. The per-visit worksheets (Contents, Comprehensive Export)
+    are sorts of each chunk, written as they are read; the per-cluster ones (Search Term, Timeline) are
+    group-bys of each chunk, kept until the join has been read, and are as small as the number of clusters.
+    The join is read twice: once for Contents, which also groups the chunks for Search Term and Timeline,
+    and once for Comprehensive Export.
+
+    Columns, names and order are the same as the queries in SQLite/history.py, whose comments document each
+    of them. Timestamps and codes are left raw: they are decoded afterwards like any other worksheet (see
+    Functions/timestamps.py and Functions/code_tables.py).
+
+    should_continue is checked between worksheets, chunks and group-bys (which SQLite's interrupt cannot
+    reach); once it returns False, the worksheet being built raises sqlite3.OperationalError('interrupted'),
+    as an interrupted query does.
+    """
+
+    # Worksheets, in the order they are produced
+    WORKSHEETS = ['Clusters Overview', 'Clusters Contents', 'Clusters Search Term', 'Clusters Timeline',
+                  'Clusters Duplicate Visits', 'Clusters Comprehensive Export']
+
+    _VISITS_QUERY = """
+        SELECT
+            c.cluster_id,
+            c.label                                 AS cluster_label,
+            c.raw_label,
+            c.should_show_on_prominent_ui_surfaces  AS prominent,
+            cv.visit_id,
+            cv.score,
+            cv.engagement_score,
+            cv.url_for_display,
+            cv.normalized_url,
+            cv.url_for_deduping,
+            v.visit_time,
+            v.visit_duration,
+            v.from_visit,
+            v.transition,
+            u.id                                    AS url_id,
+            u.url,
+            u.title,
+            u.visit_count,
+            {annotation_columns}
+        FROM clusters c
+        JOIN clusters_and_visits cv
+            ON c.cluster_id = cv.cluster_id
+        JOIN visits v
+            ON cv.visit_id = v.id
+        JOIN urls u
+            ON v.url = u.id
+        {annotation_joins}
+        ORDER BY
+            c.cluster_id,
+            cv.visit_id
+    """
+
+    _CONTENT_ANNOTATION_COLUMNS = ['search_normalized_url', 'search_terms', 'visibility_score', 'categories',
+                                   'entities', 'related_searches', 'alternative_title', 'annotation_flags']
+    _CONTEXT_ANNOTATION_COLUMNS = ['context_annotation_flags', 'duration_since_last_visit', 'page_end_reason',
+                                   'total_foreground_duration']
+    # Numeric annotation columns: kept numeric (NaN for NULL) in a chunk where the LEFT JOIN left them all NULL
+    _NUMERIC_ANNOTATION_COLUMNS = ['visibility_score', 'annotation_flags', 'context_annotation_flags',
+                                   'duration_since_last_visit', 'page_end_reason', 'total_foreground_duration']
+
+    def __init__(self, conn: sqlite3.Connection, chunk_size: int = CHUNK_SIZE,
+                 should_continue: Callable[[], bool] = lambda: True):
+        """
+        Args:
+            conn: Connection to a History database.
+            chunk_size: Number of rows of the join read at a time (a chunk is extended to the end of its last
+                        cluster, so a cluster larger than this is read whole).
+            should_continue: Polled between worksheets, chunks and group-bys; returning False stops the
+                             worksheet being built.
+        """
+        self.conn = conn
+        self.chunk_size = chunk_size
+        self.should_continue = should_continue
+        self._summaries: list[tuple[pd.DataFrame, pd.DataFrame]] | None = None
+        self._tables: set[str] | None = None
+
+    def worksheets(self) -> Iterator[tuple[str, Iterable[pd.DataFrame]]]:
+        """
+        Yield (worksheet name, dataframes) for each cluster worksheet, in the order of WORKSHEETS. A worksheet
+        is only built as its dataframes are iterated over, and must be before the next one is asked for.
+
+        A worksheet that needs a table this version of the browser does not have raises
+        sqlite3.OperationalError once the worksheets before it have been built.
+        """
+        yield 'Clusters Overview', self._built(self.overview)
+        yield 'Clusters Contents', self.contents()
+        yield 'Clusters Search Term', self._built(self.search_term)
+        yield 'Clusters Timeline', self._built(self.timeline)
+        yield 'Clusters Duplicate Visits', self.duplicate_visits()
+        yield 'Clusters Comprehensive Export', self.comprehensive_export()
+
+    def _built(self, build: Callable[[], pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """A worksheet built in one piece, once it is asked for."""
+        self._check_stop()
+        yield build()
+
+    def overview(self) -> pd.DataFrame:
+        """One row per cluster with its keywords and number of visits."""
+        self._require('clusters', 'clusters_and_visits', 'cluster_keywords')
+        clusters = pd.read_sql_query(
+            'SELECT cluster_id, label, raw_label, should_show_on_prominent_ui_surfaces FROM clusters '
+            'ORDER BY cluster_id', self.conn)
+        # Counted on clusters_and_visits itself: visits that have since been deleted still count here
+        visit_counts = pd.read_sql_query('SELECT cluster_id, visit_id FROM clusters_and_visits', self.conn) \
+            .groupby('cluster_id')['visit_id'].nunique()
+        self._check_stop()
+        keywords = pd.read_sql_query('SELECT cluster_id, keyword, type FROM cluster_keywords', self.conn)
+
+        keywords = keywords.dropna(subset=['keyword', 'type'])  # NULL || ... is NULL, which GROUP_CONCAT skips
+        keyword_types = keywords['type']
+        if keyword_types.dtype.kind == 'f':  # the column held NULLs: back to integers for display
+            keyword_types = keyword_types.astype(np.int64)
+        keywords['keyword'] = keywords['keyword'].astype(str) + ' [type=' + keyword_types.astype(str) + ']'
+        keyword_lists = keywords.drop_duplicates(['cluster_id', 'keyword']) \
+            .groupby('cluster_id')['keyword'].agg(','.join)
+
+        cluster_ids = clusters['cluster_id']
+        return pd.DataFrame({
+            'cluster_id': cluster_ids,
+            'cluster_label': clusters['label'],
+            'raw_label': clusters['raw_label'],
+            'prominent (raw)': clusters['should_show_on_prominent_ui_surfaces'],
+            'visit_count': cluster_ids.map(visit_counts).fillna(0).astype(np.int64),
+            'keywords [with raw type]': cluster_ids.map(keyword_lists),
+        })
+
+    def contents(self) -> Iterator[pd.DataFrame]:
+        """
+        Every visit of every cluster, most relevant visits of each cluster first, one chunk at a time. The
+        chunks are also grouped for search_term and timeline on the way.
+        """
+        summaries = []
+        for visits in self._visit_chunks():
+            summaries.append(self._summarize(visits))
+            self._check_stop()
+            yield self._contents(visits)
+        self._summaries = summaries
+
+    def _contents(self, visits: pd.DataFrame) -> pd.DataFrame:
+        """Clusters Contents rows of a chunk of whole clusters."""
+        # Stable sort, so visits with the same score stay in visit order
+        visits = visits.sort_values(['cluster_id', 'score'], ascending=[True, False], kind='stable')
+        return pd.DataFrame({
+            'cluster_id': visits['cluster_id'],
+            'cluster_label': visits['cluster_label'],
+            'visit_id': visits['visit_id'],
+            'visit_time (raw)': visits['visit_time'],
+            'url': visits['url'],
+            'title': visits['title'],
+            'cluster_relevance_score': visits['score'],
+            'engagement_score': visits['engagement_score'],
+            'url_for_display': visits['url_for_display'],
+            'url_for_deduping': visits['url_for_deduping'],
+            'normalized_url': visits['normalized_url'],
+            'visit_duration (raw, microseconds)': visits['visit_duration'],
+            'visit_duration (decoded, seconds)': self._format(visits['visit_duration'] / 1000000.0, '%.2f'),
+            'transition (raw)': visits['transition'],
+            'transition_core (raw)': visits['transition'] & 0xFF,
+            'from_visit': visits['from_visit'],
+        }).reset_index(drop=True)
+
+    def search_term(self) -> pd.DataFrame:
+        """One row per cluster and search term, most recent first."""
+        self._require('content_annotations')
+        terms = pd.concat([terms for terms, _ in self._cluster_summaries()], ignore_index=True)
+        terms = terms.sort_values('earliest', ascending=False, kind='stable')
+
+        span = terms['latest'] - terms['earliest']
+        return pd.DataFrame({
+            'cluster_id': terms['cluster_id'],
+            'cluster_label': terms['cluster_label'],
+            'raw_label': terms['raw_label'],
+            'search_terms': terms['search_terms'],
+            'search_normalized_url': terms['search_normalized_url'],
+            'visits_with_this_term': terms['visits_with_this_term'],
+            'earliest_visit_time (raw)': terms['earliest'],
+            'latest_visit_time (raw)': terms['latest'],
+            'span (raw, microseconds)': span,
+            'span (decoded, minutes)': self._format(span / 1000000.0 / 60.0, '%.1f'),
+            'associated_urls': terms['associated_urls'],
+        }).reset_index(drop=True)
+
+    def timeline(self) -> pd.DataFrame:
+        """One row per cluster with its first and last visit, most recent first."""
+        clusters = pd.concat([clusters for _, clusters in self._cluster_summaries()], ignore_index=True)
+        clusters = clusters.sort_values('first_visit', ascending=False, kind='stable')
+
+        span = clusters['last_visit'] - clusters['first_visit']
+        return pd.DataFrame({
+            'cluster_id': clusters['cluster_id'],
+            'cluster_label': clusters['cluster_label'],
+            'prominent (raw)': clusters['prominent'],
+            'first_visit_time (raw)': clusters['first_visit'],
+            'last_visit_time (raw)': clusters['last_visit'],
+            'span (raw, microseconds)': span,
+            'span (decoded, minutes)': self._format(span / 1000000.0 / 60.0, '%.1f'),
+            'visit_count': clusters['visit_count'],
+            'unique_urls': clusters['unique_urls'],
+        }).reset_index(drop=True)
+
+    def duplicate_visits(self) -> Iterator[pd.DataFrame]:
+        """
+        Pairs of visits flagged as duplicates, one chunk at a time. This one does not involve the cluster join
+        (it reads cluster_visit_duplicates and looks its visits up by primary key), so it is still read with
+        its query.
+        """
+        self._check_stop()
+        sql_query, _ = chrome_history_clusters_duplicate_visits()
+        yield from read_sql_query(sql_query, self.conn, chunksize=self.chunk_size)
+
+    def comprehensive_export(self) -> Iterator[pd.DataFrame]:
+        """
+        Every visit of every cluster with all its annotations, in chronological order within each cluster,
+        one chunk at a time.
+        """
+        self._check_stop()
+        self._require('content_annotations', 'context_annotations')
+        for visits in self._visit_chunks():
+            self._check_stop()
+            yield self._comprehensive_export(visits)
+
+    def _comprehensive_export(self, visits: pd.DataFrame) -> pd.DataFrame:
+        """Clusters Comprehensive Export rows of a chunk of whole clusters."""
+        visits = visits.sort_values(['cluster_id', 'visit_time'], kind='stable')
+        return pd.DataFrame({
+            'cluster_id': visits['cluster_id'],
+            'cluster_label': visits['cluster_label'],
+            'raw_label': visits['raw_label'],
+            'prominent (raw)': visits['prominent'],
+            'visit_id': visits['visit_id'],
+            'visit_time (raw)': visits['visit_time'],
+            'url': visits['url'],
+            'title': visits['title'],
+            'total_url_visits': visits['visit_count'],
+            'relevance_score': visits['score'],
+            'engagement_score': visits['engagement_score'],
+            'url_for_display': visits['url_for_display'],
+            'normalized_url': visits['normalized_url'],
+            'url_for_deduping': visits['url_for_deduping'],
+            'visit_duration (raw, microseconds)': visits['visit_duration'],
+            'visit_duration (decoded, seconds)': self._format(visits['visit_duration'] / 1000000.0, '%.2f'),
+            'from_visit': visits['from_visit'],
+            'transition (raw)': visits['transition'],
+            'transition_core (raw)': visits['transition'] & 0xFF,
+            'search_normalized_url': visits['search_normalized_url'],
+            'search_terms': visits['search_terms'],
+            'visibility_score': visits['visibility_score'],
+            'page_categories': visits['categories'],
+            'page_entities': visits['entities'],
+            'related_searches': visits['related_searches'],
+            'alternative_title': visits['alternative_title'],
+            'annotation_flags (raw)': visits['annotation_flags'],
+            'context_flags (raw)': visits['context_annotation_flags'],
+            'duration_since_last_visit (raw, microseconds)': visits['duration_since_last_visit'],
+            'duration_since_last_visit (decoded, seconds)':
+                self._format(visits['duration_since_last_visit'] / 1000000.0, '%.2f'),
+            'page_end_reason (raw)': visits['page_end_reason'],
+            'total_foreground_duration (raw, microseconds)': visits['total_foreground_duration'],
+            'total_foreground_duration (decoded, seconds)':
+                self._format(visits['total_foreground_duration'] / 1000000.0, '%.2f'),
+        }).reset_index(drop=True)
+
+    def _visit_chunks(self) -> Iterator[pd.DataFrame]:
+        """
+        Run the cluster/visit/url/annotation join and yield its rows in chunks of whole clusters (the rows of
+        the last cluster of a chunk of the query are held back and yielded with the next one). Yields one
+        empty chunk, with the columns, if the join has no rows.
+        """
+        self._require('clusters', 'clusters_and_visits', 'visits', 'urls')
+        tables = self._table_names()
+
+        annotation_columns = []
+        annotation_joins = []
+        for table, alias, columns in (('content_annotations', 'ca', self._CONTENT_ANNOTATION_COLUMNS),
+                                      ('context_annotations', 'ctx', self._CONTEXT_ANNOTATION_COLUMNS)):
+            if table in tables:
+                # LEFT JOIN: not all visits have annotations
+                annotation_columns += [f'{alias}.{column}' for column in columns]
+                annotation_joins.append(f'LEFT JOIN {table} {alias} ON v.id = {alias}.visit_id')
+            else:
+                annotation_columns += [f'NULL AS {column}' for column in columns]
+
+        query = self._VISITS_QUERY.format(annotation_columns=',\n            '.join(annotation_columns),
+                                          annotation_joins='\n        '.join(annotation_joins))
+        pending = None
+        for chunk in read_sql_query(query, self.conn, chunksize=self.chunk_size):
+            self._check_stop()
+            if pending is not None:
+                chunk = pd.concat([pending, chunk], ignore_index=True)
+            if chunk.empty:
+                pending = chunk
+                continue
+            in_last_cluster = (chunk['cluster_id'] == chunk['cluster_id'].iloc[-1]).to_numpy()
+            pending = chunk[in_last_cluster]
+            if not in_last_cluster.all():
+                yield self._numeric_annotations(chunk[~in_last_cluster])
+        if pending is not None:
+            yield self._numeric_annotations(pending)
+
+    def _numeric_annotations(self, visits: pd.DataFrame) -> pd.DataFrame:
+        """Chunk with a fresh index and its numeric annotation columns made numeric (NaN where NULL)."""
+        visits = visits.reset_index(drop=True)
+        for column in self._NUMERIC_ANNOTATION_COLUMNS:
+            visits[column] = pd.to_numeric(visits[column])
+        return visits
+
+    def _cluster_summaries(self) -> list[tuple[pd.DataFrame, pd.DataFrame]]:
+        """Search term and timeline groups of every chunk of the join (see _summarize), reading the join for
+        them unless contents already has."""
+        if self._summaries is None:
+            self._summaries = [self._summarize(visits) for visits in self._visit_chunks()]
+        return self._summaries
+
+    def _summarize(self, visits: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Group a chunk of whole clusters for search_term and timeline. Both group by cluster (among other
+        things), so the groups of different chunks never overlap and can simply be concatenated.
+
+        Returns:
+            (one row per cluster and search term, one row per cluster), in the order they appear.
+        """
+        self._check_stop()
+        with_terms = visits[visits['search_terms'].notna() & (visits['search_terms'] != '')]
+        terms = with_terms.groupby(['cluster_id', 'search_terms'], sort=False).agg(
+            cluster_label=('cluster_label', 'first'),
+            raw_label=('raw_label', 'first'),
+            search_normalized_url=('search_normalized_url', 'first'),
+            visits_with_this_term=('visit_id', 'nunique'),
+            earliest=('visit_time', 'min'),
+            latest=('visit_time', 'max'),
+            associated_urls=('url', lambda urls: ','.join(dict.fromkeys(urls))),
+        ).reset_index()
+
+        self._check_stop()
+        clusters = visits.groupby('cluster_id', sort=False).agg(
+            cluster_label=('cluster_label', 'first'),
+            prominent=('prominent', 'first'),
+            first_visit=('visit_time', 'min'),
+            last_visit=('visit_time', 'max'),
+            visit_count=('visit_id', 'nunique'),
+            unique_urls=('url_id', 'nunique'),
+        ).reset_index()
+        return terms, clusters
+
+    def _check_stop(self) -> None:
+        """Raise the error an interrupted query raises if should_continue returns False."""
+        if not self.should_continue():
+            raise sqlite3.OperationalError('interrupted')
+
+    def _table_names(self) -> set[str]:
+        """Names of the tables of the database."""
+        if self._tables is None:
+            rows = self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+            self._tables = {row[0] for row in rows}
+        return self._tables
+
+    def _require(self, *tables: str) -> None:
+        """Raise the error the equivalent query would raise if one of the tables does not exist."""
+        for table in tables:
+            if table not in self._table_names():
+                raise sqlite3.OperationalError(f'no such table: {table}')
+
+    @staticmethod
+    def _format(values: pd.Series, format_string: str) -> pd.Series:
+        """printf-style formatting of a numeric column (like SQLite's printf), leaving missing values empty."""
+        formatted = pd.Series(None, index=values.index, dtype=object)
+        present = values.notna()
+        if present.any():
+            formatted[present] = np.char.mod(format_string, values[present].to_numpy(dtype=np.float64))
+        return formatted
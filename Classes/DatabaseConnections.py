@@ -0,0 +1,225 @@
+"""Per-run cache of read-only SQLite connections, one per database file."""
+
+import os
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import Future
+from typing import Callable
+
+# SQLite virtual machine instructions between two calls of the progress handler that checks for a stop request
+# (a few milliseconds of query time)
+PROGRESS_STEPS = 100000
+# Pages copied at a time by the backup of a snapshot, between two checks for a stop request
+BACKUP_PAGES = 4096
+
+
+class DatabaseConnections:
+    """
+    Open each SQLite database of a profile once and share that connection with every artifact
+    that reads from it (e.g. History is used by History, History Gaps, Downloads, Search Terms,
+    the cluster worksheets, ...), so that its page cache stays warm between queries.
+    """
+
+    # Indexes created on snapshots for the joins of the queries in SQLite/: (table, columns). Chromium already
+    # indexes most of these, but not every version does; an index is only added when the table exists and
+    # no existing index (or the rowid) already starts with these columns.
+    SNAPSHOT_INDEXES = [
+        # History
+        ('visits', ('url',)),
+        ('keyword_search_terms', ('url_id',)),
+        ('keyword_search_terms', ('keyword_id',)),
+        ('visit_source', ('id',)),
+        ('segments', ('id',)),
+        ('downloads_url_chains', ('id',)),
+        ('clusters_and_visits', ('cluster_id',)),
+        ('clusters_and_visits', ('visit_id',)),
+        ('cluster_keywords', ('cluster_id',)),
+        ('content_annotations', ('visit_id',)),
+        ('context_annotations', ('visit_id',)),
+        # Favicons
+        ('icon_mapping', ('icon_id',)),
+        ('favicon_bitmaps', ('icon_id',)),
+        # Web Data
+        ('address_type_tokens', ('guid', 'type')),
+        ('server_card_metadata', ('id',)),
+        ('masked_bank_accounts_metadata', ('instrument_id',)),
+        ('loyalty_card_merchant_domain', ('loyalty_card_id',)),
+    ]
+
+    def __init__(self, cache_size_kib: int = 65536, mmap_size: int = 268435456, snapshot: bool = False,
+                 snapshot_dir: str | None = None, should_continue: Callable[[], bool] | None = None,
+                 tracer=None):
+        """
+        Args:
+            cache_size_kib: Page cache size of each connection, in KiB (PRAGMA cache_size).
+            mmap_size: Maximum number of bytes of each database file to memory-map (PRAGMA mmap_size).
+                       0 disables memory-mapped I/O.
+            snapshot: Copy each database (with SQLite's backup API) and run the queries against the copy,
+                      after adding the indexes in SNAPSHOT_INDEXES, so that the large joins use index
+                      lookups instead of full scans. The evidence file is only read, once.
+            snapshot_dir: Directory for the copies (temporary files, deleted on close). None keeps them in
+                          memory.
+            should_continue: Polled while a query runs (and while a snapshot is copied); once it returns
+                             False, the statement is aborted with sqlite3.OperationalError('interrupted').
+            tracer: QueryTracer the connections report the statements they execute and their VM steps to.
+        """
+        self.cache_size_kib = cache_size_kib
+        self.mmap_size = mmap_size
+        self.snapshot = snapshot
+        self.snapshot_dir = snapshot_dir
+        self.should_continue = should_continue
+        self.tracer = tracer
+        # normalized db path -> connection, as a future: set once the thread that opens it is done
+        self._connections: dict[str, Future] = {}
+        self._snapshot_files: list[str] = []  # temporary copies to delete on close
+        self._lock = threading.Lock()  # guards the two above; held only to look up or add entries
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def get(self, db_file: str) -> sqlite3.Connection:
+        """
+        Return the connection to db_file, opening it on first use.
+
+        The file is opened read-only with immutable=1: SQLite does no locking and never writes to the
+        evidence (journal files are not processed), and a missing file raises sqlite3.OperationalError
+        instead of being created.
+
+        In snapshot mode, the returned connection is to a copy of the file instead (see __init__).
+
+        Connections may be used from any thread (SQLite is built in serialized threading mode,
+        sqlite3.threadsafety == 3), so artifacts running concurrently can share them.
+
+        The first thread to ask for a file opens it (copies it, in snapshot mode) while the others asking for
+        the same file wait for it; files are opened in parallel with each other, and connections already
+        open are returned without waiting. If the file cannot be opened, every thread waiting for it gets
+        the error, and the next call tries again.
+
+        Args:
+            db_file: Path to the SQLite database file.
+        """
+        key = os.path.normcase(os.path.abspath(db_file))
+        with self._lock:
+            future = self._connections.get(key)
+            opening = future is None
+            if opening:
+                future = self._connections[key] = Future()
+
+        if opening:
+            try:
+                future.set_result(self._open(db_file))
+            except BaseException as error:
+                with self._lock:
+                    del self._connections[key]
+                future.set_exception(error)
+        return future.result()
+
+    def interrupt(self) -> None:
+        """Abort the statements running on every connection (may be called from any thread)."""
+        with self._lock:
+            connections = self._opened()
+        for conn in connections:
+            conn.interrupt()
+
+    def close(self) -> None:
+        """Close every connection that was opened."""
+        with self._lock:
+            for conn in self._opened():
+                conn.close()
+            self._connections.clear()
+
+            for snapshot_file in self._snapshot_files:
+                try:
+                    os.remove(snapshot_file)
+                except OSError:
+                    pass
+            self._snapshot_files.clear()
+
+    def _opened(self) -> list[sqlite3.Connection]:
+        """Connections that are open, not those still being opened (call with self._lock held)."""
+        return [future.result() for future in self._connections.values()
+                if future.done() and future.exception() is None]
+
+    def _open(self, db_file: str) -> sqlite3.Connection:
+        """Open db_file read-only (or a snapshot of it) and apply the cache settings."""
+        # Characters with a meaning in a URI must be escaped in the path.
+        path = db_file.replace('%', '%25').replace('?', '%3f').replace('#', '%23')
+        conn = sqlite3.connect(f'file:{path}?mode=ro&immutable=1', uri=True, check_same_thread=False)
+        if self.snapshot:
+            conn = self._snapshot(conn)
+        conn.execute(f'PRAGMA cache_size = -{int(self.cache_size_kib)}')
+        conn.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+        self._watch(conn)
+        return conn
+
+    def _watch(self, conn: sqlite3.Connection) -> None:
+        """Make the statements of conn stop when should_continue returns False (and report them to the tracer)"""
+        if self.tracer is not None:
+            self.tracer.watch(conn)
+
+            def progress():
+                self.tracer.count_steps()
+                return self.should_continue is not None and not self.should_continue()
+
+            conn.set_progress_handler(progress, self.tracer.steps)
+        elif self.should_continue is not None:
+            # A non-zero return value makes SQLite abort the running statement
+            conn.set_progress_handler(lambda: not self.should_continue(), PROGRESS_STEPS)
+
+    def _snapshot(self, source: sqlite3.Connection) -> sqlite3.Connection:
+        """Copy the database of source into memory (or a temporary file), index the copy and close source."""
+        if self.snapshot_dir is None:
+            target = ':memory:'
+        else:
+            handle, target = tempfile.mkstemp(suffix='.sqlite', dir=self.snapshot_dir)
+            os.close(handle)
+            with self._lock:
+                self._snapshot_files.append(target)
+
+        def check_stop(status, remaining, total):
+            if self.should_continue is not None and not self.should_continue():
+                raise sqlite3.OperationalError('interrupted')
+
+        conn = sqlite3.connect(target, check_same_thread=False)
+        self._watch(conn)  # indexing a large copy takes a while too
+        try:
+            source.backup(conn, pages=BACKUP_PAGES, progress=check_stop)
+        except BaseException:
+            conn.close()
+            raise
+        finally:
+            source.close()
+
+        for table, columns in self.SNAPSHOT_INDEXES:
+            if self._needs_index(conn, table, columns):
+                index_name = f'snapshot_{table}_' + '_'.join(columns)
+                column_list = ', '.join(f'"{column}"' for column in columns)
+                conn.execute(f'CREATE INDEX "{index_name}" ON "{table}" ({column_list})')
+        conn.execute('ANALYZE')  # lets the query planner weigh the new indexes against the existing ones
+        conn.commit()
+        return conn
+
+    @staticmethod
+    def _needs_index(conn: sqlite3.Connection, table: str, columns: tuple) -> bool:
+        """True if table has all the columns and no index (or INTEGER PRIMARY KEY) already starts with them."""
+        table_info = conn.execute(f'PRAGMA table_info("{table}")').fetchall()  # cid, name, type, notnull, dflt, pk
+        if not table_info:
+            return False  # the table does not exist in this version of the browser
+        table_columns = {row[1] for row in table_info}
+        if not set(columns) <= table_columns:
+            return False
+
+        primary_key = [row for row in table_info if row[5] > 0]
+        if len(primary_key) == 1 and primary_key[0][1] == columns[0] and primary_key[0][2].upper() == 'INTEGER':
+            return False  # rowid alias
+
+        for index in conn.execute(f'PRAGMA index_list("{table}")').fetchall():  # seq, name, unique, origin, partial
+            index_columns = [row[2] for row in conn.execute(f'PRAGMA index_info("{index[1]}")').fetchall()]
+            if tuple(index_columns[:len(columns)]) == tuple(columns):
+                return False
+        return True
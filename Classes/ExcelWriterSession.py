@@ -0,0 +1,290 @@
+"""Single-pass, write-only Excel workbook writer."""
+
+import datetime
+import math
+from typing import Callable, Iterable
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+
+from Classes.ParserSettings import STOP_CHECK_ROWS
+from Classes.RunMetrics import measure
+from Functions.write_to_excel import sanitize_dataframe
+
+# Most rows a worksheet can hold (Excel 2007 and later), header row included
+MAX_ROWS = 1048576
+# Longest worksheet name Excel accepts
+MAX_SHEET_NAME = 31
+
+
+class ExcelWriterSession:
+    """
+    Write every worksheet of a run into one xlsx file that is opened once and saved once.
+
+    openpyxl's write-only mode streams each worksheet's rows to a temporary file instead of keeping
+    them in memory, so the cost of writing a worksheet no longer depends on how much has already
+    been written to the workbook (unlike re-opening the file in append mode for every worksheet).
+
+    A worksheet with more records than a worksheet can hold continues on numbered continuation
+    worksheets ("History (2)", "History (3)", ...), each with the header row, placed right after it.
+    """
+
+    def __init__(self, excel_file: str, leading_sheets: tuple = ('Summary', 'Preferences'), max_rows: int = MAX_ROWS,
+                 should_continue: Callable[[], bool] = lambda: True):
+        """
+        Create the (empty) output workbook.
+
+        Args:
+            excel_file: Output file (includes path). Overwritten if it already exists.
+            leading_sheets: Worksheets created up front so that they end up first in the workbook,
+                            in this order, whenever they get written. Any that are never written
+                            are dropped when the session is closed.
+            max_rows: Most rows written to one worksheet (header row included) before continuing on the next.
+            should_continue: Polled every STOP_CHECK_ROWS rows while a chunk is written; returning False
+                             stops writing the chunk (see write_chunk).
+        """
+        if max_rows < 2:
+            raise ValueError('max_rows must leave room for a header row and a record.')
+        self.excel_file = excel_file
+        self.max_rows = max_rows
+        self.should_continue = should_continue
+        self._workbook = openpyxl.Workbook(write_only=True)
+        self._sheets: dict[str, object] = {}  # worksheet name -> write-only worksheet
+        self._written: set[str] = set()  # worksheets that have received at least their header row
+        self._parts: dict[str, list[str]] = {}  # worksheet name -> its worksheet and continuation worksheets
+        self._part_rows: dict[str, int] = {}  # worksheet name -> rows (header included) of its last part
+        self._headers: dict[str, list] = {}  # worksheet name -> columns of its header row
+        self._closed = False
+        self._leading_sheets = tuple(leading_sheets)
+
+        for worksheet_name in leading_sheets:
+            self._sheets[worksheet_name] = self._workbook.create_sheet(worksheet_name)
+
+        border_side = Side(style='thin')
+        self._header_font = Font(bold=True)
+        self._header_border = Border(top=border_side, right=border_side, bottom=border_side, left=border_side)
+        self._header_alignment = Alignment(horizontal='center', vertical='top')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def write(self, dataframe: pd.DataFrame, worksheet_name: str) -> int:
+        """
+        Write a dataframe to a new worksheet.
+
+        Args:
+            dataframe: Dataframe to write (header row + one row per record, no index).
+            worksheet_name: Name of the worksheet.
+
+        Returns:
+            The number of records written.
+        """
+        return self.write_chunks([dataframe], worksheet_name)
+
+    def write_chunks(self, chunks: Iterable[pd.DataFrame], worksheet_name: str) -> int:
+        """
+        Write a sequence of dataframes with the same columns to a new worksheet, one chunk at a time,
+        so that only one chunk has to be held in memory.
+
+        The worksheet is only created once the first chunk has been produced and converted, so a query
+        that fails outright (missing table, locked database, ...) does not leave a worksheet behind.
+
+        Args:
+            chunks: Dataframes to write, e.g. as returned by pd.read_sql_query(..., chunksize=n).
+                    The header row is taken from the first chunk.
+            worksheet_name: Name of the worksheet.
+
+        Returns:
+            The number of records written.
+        """
+        if worksheet_name in self._written:
+            raise ValueError(f"Sheet '{worksheet_name}' already exists.")
+
+        record_count = 0
+        for chunk in chunks:
+            record_count += self.write_chunk(chunk, worksheet_name)
+
+        if worksheet_name not in self._written:  # no chunks at all
+            self.write_chunk(pd.DataFrame(), worksheet_name)
+        return record_count
+
+    def write_chunk(self, chunk: pd.DataFrame, worksheet_name: str) -> int:
+        """
+        Append one dataframe to a worksheet. The first chunk written to a worksheet creates it, with
+        its header row taken from that chunk; later chunks are appended below it.
+
+        The chunk is converted in full before any of it is written, so a bad value in the first chunk
+        does not leave an empty worksheet behind. Rows that do not fit in the worksheet go on to a new
+        continuation worksheet. If should_continue returns False while the chunk is written, the rest
+        of it is not.
+
+        Args:
+            chunk: Dataframe to append.
+            worksheet_name: Name of the worksheet.
+
+        Returns:
+            The number of records written (fewer than the chunk has if writing was stopped).
+        """
+        rows = self._dataframe_rows(chunk)
+        if worksheet_name in self._parts:
+            worksheet = self._sheets[self._parts[worksheet_name][-1]]
+        else:
+            worksheet = self._get_sheet(worksheet_name)
+            self._headers[worksheet_name] = list(chunk.columns)
+            self._parts[worksheet_name] = [worksheet_name]
+            worksheet.append(self._header_row(worksheet, chunk.columns))
+            self._part_rows[worksheet_name] = 1
+
+        start = 0
+        while start < len(rows):
+            if self._part_rows[worksheet_name] >= self.max_rows:
+                worksheet = self._continue_sheet(worksheet_name)
+            part = rows[start:start + min(STOP_CHECK_ROWS, self.max_rows - self._part_rows[worksheet_name])]
+            for row in part:
+                worksheet.append(row)
+            self._part_rows[worksheet_name] += len(part)
+            start += len(part)
+            if start < len(rows) and not self.should_continue():
+                break
+        return start
+
+    def has_worksheet(self, worksheet_name: str) -> bool:
+        """Return True if something has already been written to worksheet_name."""
+        return worksheet_name in self._written
+
+    def sheet_names(self, worksheet_name: str) -> list[str]:
+        """
+        Names of the worksheets a worksheet's records were written to.
+
+        Args:
+            worksheet_name: Name of the worksheet.
+
+        Returns:
+            The worksheet followed by its continuation worksheets, if it has any (empty if it was never written).
+        """
+        return list(self._parts.get(worksheet_name, []))
+
+    def order_sheets(self, worksheet_names: list) -> None:
+        """
+        Put the given worksheets, in this order, right after the leading worksheets (Summary, ...),
+        regardless of the order in which they were created. Worksheets not listed keep their relative
+        order after them. Continuation worksheets follow the worksheet they continue.
+
+        Args:
+            worksheet_names: Names of worksheets, in the order they should appear.
+        """
+        leading_count = 0
+        for worksheet_name in self._sheets:  # leading sheets are the first entries of the dict
+            if worksheet_name in self._leading_sheets:
+                leading_count += 1
+
+        position = leading_count
+        for worksheet_name in worksheet_names:
+            if worksheet_name not in self._sheets or worksheet_name in self._leading_sheets:
+                continue
+            for sheet_name in self._parts.get(worksheet_name, [worksheet_name]):
+                current = self._workbook.worksheets.index(self._sheets[sheet_name])
+                self._workbook.move_sheet(sheet_name, position - current)
+                position += 1
+
+    def close(self) -> None:
+        """Drop reserved worksheets that were never written and save the workbook."""
+        if self._closed:
+            return
+        self._closed = True
+
+        for worksheet_name, worksheet in self._sheets.items():
+            if worksheet_name not in self._written:
+                self._workbook.remove(worksheet)
+
+        if not self._workbook.worksheets:
+            # An xlsx file needs at least one worksheet.
+            self._workbook.create_sheet('Sheet1')
+
+        self._workbook.save(self.excel_file)
+
+    def _get_sheet(self, worksheet_name: str):
+        """Return the (reserved or new) worksheet to start writing to."""
+        self._written.add(worksheet_name)
+        if worksheet_name not in self._sheets:
+            self._sheets[worksheet_name] = self._workbook.create_sheet(worksheet_name)
+        return self._sheets[worksheet_name]
+
+    def _continue_sheet(self, worksheet_name: str):
+        """Start the next continuation worksheet of a worksheet that is full, with the same header row."""
+        number = len(self._parts[worksheet_name]) + 1
+        while True:
+            suffix = f' ({number})'
+            sheet_name = worksheet_name[:MAX_SHEET_NAME - len(suffix)] + suffix
+            if sheet_name not in self._sheets:
+                break
+            number += 1
+
+        worksheet = self._get_sheet(sheet_name)
+        worksheet.append(self._header_row(worksheet, self._headers[worksheet_name]))
+        self._parts[worksheet_name].append(sheet_name)
+        self._part_rows[worksheet_name] = 1
+        return worksheet
+
+    def _header_row(self, worksheet, columns) -> list:
+        """Header cells styled the same way pandas' to_excel styles them."""
+        header = []
+        for column in columns:
+            cell = WriteOnlyCell(worksheet, value=str(column))
+            cell.font = self._header_font
+            cell.border = self._header_border
+            cell.alignment = self._header_alignment
+            header.append(cell)
+        return header
+
+    def _dataframe_rows(self, dataframe: pd.DataFrame) -> list:
+        """Convert a dataframe to rows of values openpyxl can write, one column at a time."""
+        with measure('sanitize'):
+            sanitize_dataframe(dataframe)
+        columns = [self._column_values(dataframe.iloc[:, i]) for i in range(dataframe.shape[1])]
+        if not columns:
+            return [[] for _ in range(len(dataframe))]
+        return list(zip(*columns))
+
+    @staticmethod
+    def _column_values(series: pd.Series) -> list:
+        """
+        Convert a column to Python values the same way pandas' Excel writer does: numbers stay numbers,
+        dates stay dates, missing values become empty cells and anything else is written as text.
+        """
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            if getattr(series.dt, 'tz', None) is not None:
+                series = series.dt.tz_localize(None)  # Excel has no notion of time zones
+            values = series.astype(object).tolist()
+            return [None if value is pd.NaT else value.to_pydatetime() for value in values]
+
+        values = series.tolist()  # numpy scalars -> int / float / bool
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind == 'f':
+            return [None if math.isnan(value) else value for value in values]
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'iub':
+            return values
+
+        converted = []
+        for value in values:
+            if isinstance(value, np.generic):
+                value = value.item()  # numpy scalar left in an object column
+            if value is None or isinstance(value, str):
+                converted.append(value)
+            elif isinstance(value, float):
+                converted.append(None if math.isnan(value) else value)
+            elif value is pd.NaT or value is pd.NA:
+                converted.append(None)
+            elif isinstance(value, pd.Timestamp):
+                converted.append(value.tz_localize(None).to_pydatetime())
+            elif isinstance(value, (bool, int, datetime.date, datetime.time, datetime.timedelta)):
+                converted.append(value)
+            else:
+                converted.append(str(value))
+        return converted
@@ -0,0 +1,137 @@
+"""Content-addressed folder of the favicon images of a profile, written next to the output."""
+
+import hashlib
+import io
+import math
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+# Bytes read from a BLOB at a time
+BLOCK_SIZE = 1024 * 1024
+
+# Image formats, recognized by the first bytes of the image: (magic bytes, offset, file extension)
+IMAGE_FORMATS = [
+    (b'\x89PNG\r\n\x1a\n', 0, 'png'),
+    (b'\xff\xd8\xff', 0, 'jpg'),
+    (b'GIF87a', 0, 'gif'),
+    (b'GIF89a', 0, 'gif'),
+    (b'WEBP', 8, 'webp'),  # RIFF container
+    (b'\x00\x00\x01\x00', 0, 'ico'),
+    (b'\x00\x00\x02\x00', 0, 'cur'),
+    (b'BM', 0, 'bmp'),
+    (b'<svg', 0, 'svg'),
+    (b'<?xml', 0, 'svg'),
+]
+
+
+def detect_image_format(header: bytes) -> str:
+    """
+    File extension of an image, from its first bytes.
+    :param header: at least the first 16 bytes of the image
+    :return: extension ('png', 'ico', ...), 'bin' if the format is not recognized
+    """
+    for magic, offset, extension in IMAGE_FORMATS:
+        if header[offset:offset + len(magic)] == magic:
+            return extension
+    return 'bin'
+
+
+class FaviconStore:
+    """
+    Write each distinct favicon image of a profile once, to a folder where it is named after its SHA-256
+    (<folder>/<first 2 hex digits>/<sha256>.<format>), so that a worksheet only has to hold the hash and
+    the file's path instead of the image's bytes.
+
+    Images are read from the database with SQLite's incremental BLOB I/O, one block at a time, rather than
+    fetched with the rows of the query, so memory use does not depend on the size of the images or the
+    Favicons file. A bitmap mapped to many pages is only read once.
+    """
+
+    def __init__(self, folder: str, relative_to: str):
+        """
+        Args:
+            folder: Folder of the images (created when the first image is written). Images already in it,
+                    e.g. from an earlier run, are not written again.
+            relative_to: Folder the paths written to the worksheet are relative to (that of the output).
+        """
+        self.folder = folder
+        self.relative_to = relative_to
+        self._bitmaps: dict[int, tuple] = {}  # bitmap id -> (sha256, format, relative path)
+        self._written: set[str] = set()  # hashes of the images in the folder
+        self._lock = threading.Lock()
+
+    def add_bitmap_columns(self, dataframe: pd.DataFrame, conn: sqlite3.Connection, id_column: str = 'bitmap id',
+                           table: str = 'favicon_bitmaps', blob_column: str = 'image_data') -> pd.DataFrame:
+        """
+        Replace the bitmap ids of a chunk of the FavIcons query with the hash, format and path of each
+        bitmap's image, writing the images that are not in the folder yet.
+        :param dataframe: chunk with a column of favicon_bitmaps ids (NULL when a page has no bitmap)
+        :param conn: connection to the Favicons database
+        :param id_column: name of the column of ids, replaced by 'image SHA-256', 'image format' and 'image file'
+        :param table: table of the images
+        :param blob_column: column of the images
+        :return: the dataframe
+        """
+        position = dataframe.columns.get_loc(id_column)
+        images = [self.add_bitmap(conn, table, blob_column, bitmap_id) for bitmap_id in dataframe[id_column].tolist()]
+
+        dataframe.drop(columns=id_column, inplace=True)
+        for offset, name in enumerate(('image SHA-256', 'image format', 'image file')):
+            dataframe.insert(position + offset, name, [image[offset] for image in images])
+        return dataframe
+
+    def add_bitmap(self, conn: sqlite3.Connection, table: str, blob_column: str, bitmap_id) -> tuple:
+        """
+        Store one bitmap's image.
+        :return: (sha256, format, path relative to relative_to), Nones if there is no image
+        """
+        if bitmap_id is None or (isinstance(bitmap_id, float) and math.isnan(bitmap_id)):
+            return None, None, None
+        bitmap_id = int(bitmap_id)
+        if bitmap_id in self._bitmaps:
+            return self._bitmaps[bitmap_id]
+
+        if not hasattr(conn, 'blobopen'):  # Python 3.10: the image is read whole instead
+            row = conn.execute(f'SELECT "{blob_column}" FROM "{table}" WHERE rowid = ?', (bitmap_id,)).fetchone()
+            data = row[0] if row is not None else None
+            image = self._store(io.BytesIO(data)) if isinstance(data, bytes) and data else (None, None, None)
+        else:
+            try:
+                blob = conn.blobopen(table, blob_column, bitmap_id, readonly=True)
+            except sqlite3.OperationalError:  # NULL (or text) image_data
+                image = (None, None, None)
+            else:
+                with blob:
+                    image = self._store(blob) if len(blob) else (None, None, None)
+
+        self._bitmaps[bitmap_id] = image
+        return image
+
+    def _store(self, blob) -> tuple:
+        """Hash an image a block at a time, then copy it to the folder unless it is already there"""
+        digest = hashlib.sha256()
+        header = blob.read(16)
+        digest.update(header)
+        for block in iter(lambda: blob.read(BLOCK_SIZE), b''):
+            digest.update(block)
+        sha256 = digest.hexdigest()
+
+        image_format = detect_image_format(header)
+        path = os.path.join(self.folder, sha256[:2], f'{sha256}.{image_format}')
+
+        with self._lock:
+            if sha256 not in self._written and not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                temporary_file = f'{path}.{os.getpid()}-{threading.get_ident()}.tmp'
+                blob.seek(0)
+                with open(temporary_file, 'wb') as file:
+                    for block in iter(lambda: blob.read(BLOCK_SIZE), b''):
+                        file.write(block)
+                os.replace(temporary_file, path)
+            self._written.add(sha256)
+
+        relative_path = os.path.relpath(path, self.relative_to).replace(os.sep, '/')
+        return sha256, image_format, relative_path
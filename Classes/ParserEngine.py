@@ -0,0 +1,645 @@
+"""Parsing pipeline of a browser profile, independent of any user interface."""
+
+import glob
+import io
+import json
+import os
+import sys
+from typing import Callable
+
+import pandas as pd
+
+from Classes.ArtifactScheduler import ArtifactScheduler, ArtifactResult
+from Classes.CancellationToken import CancellationToken
+from Classes.ChromeExtensions import ChromeExtensions
+from Classes.ClusterEngine import ClusterEngine
+from Classes.DatabaseConnections import DatabaseConnections
+from Classes.FaviconStore import FaviconStore
+from Classes.ParserSettings import __version__, ARTIFACTS, CHUNK_SIZE, MAX_WORKERS, OUTPUT_FORMATS, writer_class
+from Classes.Preferences import Preferences
+from Classes.QueryTracer import QueryTracer
+from Classes.ResultCache import ResultCache
+from Classes.RunMetrics import RunMetrics, measure
+from Functions import code_tables, sql_frames, timestamps
+from Functions.code_tables import decode_codes
+from Functions.sql_frames import read_sql_query
+from Functions.timestamps import decode_timestamps
+from JSON import bookmarks
+from JSON.bookmarks import get_chromium_bookmarks
+from SQLite.cookies import chrome_cookies
+from SQLite.downloads import chrome_downloads, chrome_downloads_gaps
+from SQLite.favicons import chrome_favicons
+from SQLite.history import chrome_history, chrome_history_clusters_duplicate_visits, chrome_history_gaps
+from SQLite.logindata import chrome_login_data, chrome_login_data_gaps
+from SQLite.searchterms import chrome_keyword_historyquery
+from SQLite.shortcuts import chrome_shortcuts
+from SQLite.topsites import chrome_topsites
+from SQLite.WebData import (
+    chrome_autofill,
+    chrome_keywords,
+    chrome_masked_credit_cards,
+    chrome_masked_bank_accounts,
+    chrome_addresses, chrome_loyalty_cards
+)
+from SQLite.webasssist import edge_webassist
+
+
+class ParserEngine:
+    """
+    Parse the selected artifacts of one browser profile into one output file.
+
+    This is everything the GUI does once its Run button is pressed, without Tk: progress and status
+    messages are reported through callbacks, so the same engine drives the GUI, the command line and
+    any script that imports it.
+    """
+
+    # Artifact name -> whether it is selected by default, in the order the worksheets are written
+    ARTIFACTS = ARTIFACTS
+
+    # Output format -> writer session class (must provide write, write_chunk, has_worksheet, order_sheets, close),
+    # imported when a run needs it (see writer_class)
+    OUTPUT_FORMATS = OUTPUT_FORMATS
+
+    def __init__(self, profile_path: str, output_path: str, artifacts: list | None = None,
+                 output_format: str = 'xlsx', max_workers: int = MAX_WORKERS, chunk_size: int = CHUNK_SIZE,
+                 snapshot: bool = False, cache_dir: str | None = None, favicons_folder: str | None = None,
+                 metrics_file: str | None = None, trace_file: str | None = None,
+                 on_status: Callable[[str], None] | None = None,
+                 on_progress: Callable[[int, int, str], None] | None = None,
+                 should_continue: Callable[[], bool] = lambda: True):
+        """
+        Args:
+            profile_path: Browser profile folder (e.g. .../User Data/Default).
+            output_path: Output file (includes path). Overwritten if it already exists.
+            artifacts: Names of the artifacts to parse (see ARTIFACTS). Defaults to those selected by default.
+                       Their worksheets are written in the order of ARTIFACTS.
+            output_format: Key of OUTPUT_FORMATS.
+            max_workers: Number of artifacts processed concurrently.
+            chunk_size: Number of rows read from SQLite and written at a time.
+            snapshot: Copy each database to memory and index it before querying it (see DatabaseConnections).
+            cache_dir: Folder of a ResultCache (e.g. one per case). Artifacts whose input files and code have
+                       not changed since they were cached there are read back instead of parsed again.
+            favicons_folder: Folder the favicon images are written to, once each, named after their SHA-256
+                             (see FaviconStore). Defaults to "<output path without extension> Favicons".
+            metrics_file: JSON run report to write (see RunMetrics): the time each artifact spent opening,
+                          querying, decoding, sanitizing and writing, its records per second, the size of the
+                          files it read and its peak memory. These also get their own Summary columns.
+                          Memory tracing slows the run down; None (default) collects nothing.
+            trace_file: Text file to write a diagnostic trace of the SQLite queries to (see QueryTracer): the SQL
+                        each artifact ran, its elapsed time, VM steps, rows and query plan. None (default) traces
+                        nothing.
+            on_status: Called with each status message. May be called from worker threads.
+            on_progress: Called with (artifacts completed, total artifacts, message).
+            should_continue: Polled between artifacts and chunks and while SQLite queries run; returning False
+                             stops processing (see also cancel).
+
+        Raises:
+            ValueError: If an artifact or the output format is unknown.
+        """
+        if artifacts is None:
+            artifacts = [name for name, selected in self.ARTIFACTS.items() if selected]
+        unknown = [name for name in artifacts if name not in self.ARTIFACTS]
+        if unknown:
+            raise ValueError(f"Unknown artifact(s): {', '.join(unknown)}")
+        if output_format not in self.OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+
+        self.profile_path = profile_path
+        self.output_path = output_path
+        self.artifacts = [name for name in self.ARTIFACTS if name in artifacts]
+        self.output_format = output_format
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.snapshot = snapshot
+        self.cache = ResultCache(cache_dir) if cache_dir else None
+        self.favicons_folder = favicons_folder or os.path.splitext(output_path)[0] + ' Favicons'
+        self.on_status = on_status
+        self.on_progress = on_progress
+        self.cancellation = CancellationToken()
+        self.should_continue = lambda: not self.cancellation.cancelled and should_continue()
+        self.metrics_file = metrics_file
+        self.metrics = RunMetrics() if metrics_file else None
+        self.trace_file = trace_file
+        self.tracer: QueryTracer | None = None
+
+        self.connections: DatabaseConnections | None = None
+        self.results: list[ArtifactResult] = []
+        self.record_counts: list[tuple[str, int]] = []  # (worksheet name, record count), as in the Summary
+        self.completed_artifacts = 0
+
+    def run(self) -> bool:
+        """
+        Parse the artifacts and write the output file.
+
+        Returns:
+            True if every artifact was processed (including those that failed), False if processing was stopped.
+            Whatever was written before processing stopped is saved either way.
+
+        Raises:
+            Exception: If the output cannot be created or saved. Errors within an artifact are reported
+                       through on_status and recorded with 0 records instead.
+        """
+        total_artifacts = len(self.artifacts)
+        self.update_status(f"Starting to process {total_artifacts} selected artifacts...")
+        self.update_progress(0, total_artifacts, "Initializing...")
+
+        writer = None
+        completed = False
+        if self.metrics is not None:
+            self.metrics.start()
+        try:
+            # The output is opened once for the whole run and saved once when the session is closed
+            writer = writer_class(self.output_format)(self.output_path, should_continue=self.should_continue)
+            # Each database file is opened once and shared by every artifact that reads from it. In snapshot
+            # mode, each one is first copied to memory and indexed for the joins the queries make.
+            if self.trace_file:
+                self.tracer = QueryTracer(self.trace_file, title=f"SQLite trace of {os.path.abspath(self.profile_path)}"
+                                                                 f" (snapshot: {self.snapshot})")
+            self.connections = DatabaseConnections(snapshot=self.snapshot, should_continue=self.should_continue,
+                                                   tracer=self.tracer)
+            self.cancellation.on_cancel(self.connections.interrupt)
+
+            # Independent artifacts (different database files, JSON files, the Extensions scan) run
+            # concurrently on reader threads; a single writer thread writes their worksheets, which end up
+            # in the order the artifacts were selected
+            jobs = [self.artifact_job(artifact_name) for artifact_name in self.artifacts]
+            self.completed_artifacts = 0
+            scheduler = ArtifactScheduler(
+                writer,
+                max_workers=self.max_workers,
+                should_continue=self.should_continue,
+                on_start=self.artifact_started,
+                on_done=lambda result: self.artifact_done(result, total_artifacts),
+                metrics=self.metrics
+            )
+            self.results = scheduler.run([job for job in jobs if job is not None])
+
+            self.record_counts = []
+            for result in self.results:
+                self.record_counts.extend(result.worksheets)
+                if result.failed:
+                    self.record_counts.append((result.artifact_name, 0))
+
+            if not self.should_continue():
+                self.update_status("⚠ Processing was stopped by user.")
+                return False
+
+            # Summary and Preferences were reserved at the front of the output when it was opened
+            self.update_status("Creating summary worksheet...")
+            writer.write(self.summary(writer), "Summary")
+            self.update_status("Saving output...")
+            writer.close()
+
+            self.update_status("✅ All processing completed successfully!")
+            self.update_status(f"📁 Output saved to: {self.output_path}")
+            self.update_progress(total_artifacts, total_artifacts, "Completed!")
+            completed = True
+            return True
+
+        finally:
+            if self.connections is not None:
+                self.connections.close()
+                self.connections = None
+            if self.tracer is not None:
+                self.tracer.close()
+                self.tracer = None
+                self.update_status(f"🔎 Query trace saved to: {self.trace_file}")
+
+            # Saves whatever was written if processing was stopped or failed (no-op if already closed)
+            if writer is not None:
+                try:
+                    writer.close()
+                except Exception as e:
+                    self.update_status(f"❌ Could not save {self.output_path}: {str(e)}")
+
+            if self.metrics is not None:
+                self.metrics.stop()
+                try:
+                    self.write_run_report(completed)
+                    self.update_status(f"📊 Run report saved to: {self.metrics_file}")
+                except OSError as e:
+                    self.update_status(f"❌ Could not save {self.metrics_file}: {str(e)}")
+
+    def cancel(self) -> None:
+        """
+        Stop the run as soon as possible. May be called from any thread: running SQLite queries are interrupted,
+        no further chunk is written, and run() saves what was written and returns False.
+        """
+        self.cancellation.cancel()
+
+    def summary(self, writer=None) -> pd.DataFrame:
+        """
+        Summary worksheet: the record count of each worksheet, followed by the script version.
+        :param writer: output session; worksheets it split over continuation worksheets (workbooks only)
+                       get a "Continued In" column listing them
+        :return: dataframe
+        """
+        summary_df = pd.DataFrame(self.record_counts, columns=["Worksheet Name", "Record Count"])
+
+        # With metrics, each artifact's figures go on the row of its first worksheet
+        if self.metrics is not None:
+            metrics_rows = []
+            for result in self.results:
+                worksheet_count = len(result.worksheets) + result.failed
+                if worksheet_count == 0:
+                    continue
+                report = self.metrics.artifact_report(result.artifact_name, self.artifact_record_count(result))
+                metrics_rows.append(self.summary_metrics(report))
+                metrics_rows.extend([{}] * (worksheet_count - 1))
+            summary_df = summary_df.join(pd.DataFrame(metrics_rows, columns=self.SUMMARY_METRICS))
+
+        sheet_names = getattr(writer, 'sheet_names', None)
+        if sheet_names is not None:
+            continued_in = summary_df["Worksheet Name"].map(lambda name: ", ".join(sheet_names(name)[1:]))
+            if (continued_in != "").any():
+                summary_df["Continued In"] = continued_in
+
+        #Adding script version to this worksheet
+        version = pd.DataFrame(
+            [
+                ["",""],
+                ["------------------", "---------------"],
+                ["Script Version:", __version__],
+            ],
+            columns=["Worksheet Name", "Record Count"]
+        )
+
+        return pd.concat([summary_df, version], ignore_index=True)
+
+    # Summary columns of the metrics (see summary_metrics)
+    SUMMARY_METRICS = ["Artifact Seconds", "Records/s", "Open (s)", "Query (s)", "Decode (s)", "Sanitize (s)",
+                       "Write (s)", "Input Bytes", "Peak Memory (MB)"]
+
+    @staticmethod
+    def summary_metrics(report: dict | None) -> dict:
+        """
+        Summary columns of an artifact's metrics.
+        :param report: RunMetrics.artifact_report (None if the artifact did not run)
+        :return: dict of SUMMARY_METRICS
+        """
+        if report is None:
+            return {}
+        row = {"Artifact Seconds": round(report['seconds'], 3), "Records/s": report['records_per_second']}
+        for stage, seconds in report['stages'].items():
+            row[f"{stage.capitalize()} (s)"] = round(seconds, 3)
+        row["Input Bytes"] = report['input_bytes']
+        if report['peak_memory_bytes'] is not None:
+            row["Peak Memory (MB)"] = round(report['peak_memory_bytes'] / 2 ** 20, 1)
+        return row
+
+    @staticmethod
+    def artifact_record_count(result: ArtifactResult) -> int:
+        """Records an artifact produced, over all of its worksheets"""
+        return sum(record_count for _, record_count in result.worksheets)
+
+    def write_run_report(self, completed: bool) -> None:
+        """
+        Write the metrics of the run to metrics_file, as JSON.
+        :param completed: whether every artifact was processed (see run)
+        """
+        artifacts = []
+        for result in self.results:
+            artifacts.append({
+                'artifact': result.artifact_name,
+                'status': ('skipped' if result.skipped else 'stopped' if result.stopped
+                           else 'failed' if result.failed else 'ok'),
+                'error': str(result.error) if result.failed else None,
+                'worksheets': [{'name': ws, 'records': record_count} for ws, record_count in result.worksheets],
+                'partial_worksheets': [{'name': ws, 'records': record_count}
+                                       for ws, record_count in result.partial_worksheets],
+                **(self.metrics.artifact_report(result.artifact_name, self.artifact_record_count(result)) or {}),
+            })
+
+        report = {
+            'version': __version__,
+            'profile': os.path.abspath(self.profile_path),
+            'output': os.path.abspath(self.output_path),
+            'output_format': self.output_format,
+            'started_utc': self.metrics.started_utc.isoformat(),
+            'wall_seconds': round(self.metrics.wall_seconds, 6),
+            'max_workers': self.max_workers,
+            'chunk_size': self.chunk_size,
+            'snapshot': self.snapshot,
+            'completed': completed,
+            'peak_memory_bytes': self.metrics.peak_memory if self.metrics.trace_memory else None,
+            'artifacts': artifacts,
+        }
+        with open(self.metrics_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1, ensure_ascii=False)
+
+    def update_status(self, message: str) -> None:
+        if self.on_status is not None:
+            self.on_status(message)
+
+    def update_progress(self, current: int, total: int, message: str = "") -> None:
+        if self.on_progress is not None:
+            self.on_progress(current, total, message)
+
+    def sqlite_queries(self) -> dict:
+        """Artifact name -> [database file, query function] of the artifacts that are a single SQLite query"""
+        chromium_queries = {
+            "History": [f'{self.profile_path}/History', chrome_history],
+            "History Gaps": [f'{self.profile_path}/History', chrome_history_gaps],
+            "Downloads": [f'{self.profile_path}/History', chrome_downloads],
+            "Downloads Gaps": [f'{self.profile_path}/History', chrome_downloads_gaps],
+            "Autofill": [f'{self.profile_path}/Web Data', chrome_autofill],
+            "Addresses": [f'{self.profile_path}/Web Data', chrome_addresses],
+            "Keywords": [f'{self.profile_path}/Web Data', chrome_keywords],
+            "Credit Cards": [f'{self.profile_path}/Web Data', chrome_masked_credit_cards],
+            "Loyalty Cards": [f'{self.profile_path}/Web Data', chrome_loyalty_cards],
+            "Bank Accounts": [f'{self.profile_path}/Web Data', chrome_masked_bank_accounts],
+            "Login Data": [f'{self.profile_path}/Login Data', chrome_login_data],
+            "Login Data Gaps": [f'{self.profile_path}/Login Data', chrome_login_data_gaps],
+            "Shortcuts": [f'{self.profile_path}/Shortcuts', chrome_shortcuts],
+            "Top Sites": [f'{self.profile_path}/Top Sites', chrome_topsites],
+            "Cookies": [f'{self.profile_path}/Network/Cookies', chrome_cookies],
+            "FavIcons": [f'{self.profile_path}/Favicons', chrome_favicons]
+        }
+
+        edge_queries = {
+            "Web Assist (Edge)": [f'{self.profile_path}/WebAssistDatabase', edge_webassist]
+        }
+
+        return {**chromium_queries, **edge_queries}
+
+    def artifact_job(self, artifact_name: str):
+        """Return the (artifact name, group, producer) tuple the scheduler runs for an artifact"""
+        job = self.uncached_artifact_job(artifact_name)
+        # FavIcons is not cached: its images are written next to the output, which may be elsewhere next time
+        if job is None or self.cache is None or artifact_name == "FavIcons":
+            return job
+
+        name, group, produce = job
+        input_files, code = self.artifact_sources(artifact_name)
+        key = f'{os.path.abspath(self.profile_path)}|{artifact_name}'
+        produce = self.cache.wrap(
+            key, input_files, code, produce,
+            on_hit=lambda: self.update_status(f"♻ {artifact_name}: unchanged, reusing cached result")
+        )
+        return name, group, produce
+
+    def artifact_sources(self, artifact_name: str) -> tuple[list, list]:
+        """
+        What an artifact's result depends on, for the result cache.
+
+        Returns:
+            (files it reads, code it runs: SQL text and modules; see ResultCache.code_fingerprint)
+        """
+        # Every result goes through this module, the query reader and the decoders
+        code = [sys.modules[__name__], sql_frames, timestamps, code_tables]
+        history_file = f'{self.profile_path}/History'
+        sqlite_queries = self.sqlite_queries()
+
+        if artifact_name in sqlite_queries:
+            db_file, function = sqlite_queries[artifact_name]
+            return [db_file], code + [function()[0]]
+        elif artifact_name == "Search Terms":
+            return ([history_file, f'{self.profile_path}/Web Data'],
+                    code + [chrome_keyword_historyquery()[0], chrome_keywords()[0]])
+        elif artifact_name == "History Clusters":
+            return [history_file], code + [ClusterEngine, chrome_history_clusters_duplicate_visits()[0]]
+        elif artifact_name == "Bookmarks":
+            return [f'{self.profile_path}/Bookmarks', f'{self.profile_path}/Bookmarks.bak'], code + [bookmarks]
+        elif artifact_name == "Preferences":
+            return [f'{self.profile_path}/Preferences'], code + [Preferences]
+        elif artifact_name == "Extensions":
+            manifests = sorted(glob.glob(os.path.join(glob.escape(self.profile_path), 'Extensions', '*', '*',
+                                                      'manifest.json')))
+            return manifests, code + [ChromeExtensions]
+        return [], code
+
+    def uncached_artifact_job(self, artifact_name: str):
+        """Return the (artifact name, group, producer) tuple that parses an artifact"""
+        history_file = f'{self.profile_path}/History'
+        sqlite_queries = self.sqlite_queries()
+
+        # The favicon images go to their own folder; the worksheet gets their hash and path
+        if artifact_name == "FavIcons":
+            db_file, function = sqlite_queries[artifact_name]
+
+            def produce():
+                store = FaviconStore(self.favicons_folder, os.path.dirname(os.path.abspath(self.output_path)))
+                conn = self.connection(db_file)
+                chunks, ws = self.get_dataframe_chunks(db_file, function)
+                yield ws, (store.add_bitmap_columns(chunk, conn) for chunk in chunks)
+
+            return artifact_name, db_file, produce
+
+        # Check if it's a chromium or edge query
+        elif artifact_name in sqlite_queries:
+            db_file, function = sqlite_queries[artifact_name]
+
+            def produce():
+                chunks, ws = self.get_dataframe_chunks(db_file, function)
+                yield ws, chunks
+
+            return artifact_name, db_file, produce
+
+        # Handle special cases
+        elif artifact_name == "Search Terms":
+            def produce():
+                dataframe_searchterms, ws = self.process_search_terms()
+                yield ws, [dataframe_searchterms]
+
+            return artifact_name, history_file, produce
+
+        # The six cluster worksheets (overview, contents, search term, timeline, duplicate visits and
+        # comprehensive export) are derived from a single join of the cluster tables
+        elif artifact_name == "History Clusters":
+            def produce():
+                conn = self.connection(history_file)
+                engine = ClusterEngine(conn, self.chunk_size, self.should_continue)
+                for ws, dataframes in engine.worksheets():
+                    chunks = self.traced(f"{ws} (ClusterEngine)", history_file, conn,
+                                         lambda dataframes=dataframes: dataframes)
+                    yield ws, (self.decode_columns(chunk, ws) for chunk in chunks)
+
+            return artifact_name, history_file, produce
+
+        elif artifact_name == "Bookmarks":
+            def produce():
+                bookmarks_df, ws = self.process_bookmarks()
+                yield ws, [bookmarks_df]
+
+            return artifact_name, artifact_name, produce
+
+        elif artifact_name == "Preferences":
+            def produce():
+                yield "Preferences", [self.process_preferences()]
+
+            return artifact_name, artifact_name, produce
+
+        elif artifact_name == "Extensions":
+            def produce():
+                extensions_df, ws, extension_count = self.process_extensions()
+                yield ws, [extensions_df], extension_count
+
+            return artifact_name, artifact_name, produce
+
+        return None
+
+    def artifact_started(self, artifact_name: str) -> None:
+        """Report an artifact the scheduler starts (called from a reader thread)"""
+        if self.metrics is not None:
+            self.metrics.artifact_started(artifact_name, self.artifact_sources(artifact_name)[0])
+        self.update_status(f"Processing {artifact_name}...")
+
+    def artifact_done(self, result: ArtifactResult, total_artifacts: int) -> None:
+        """Report an artifact the scheduler has finished with (called from the writer thread)"""
+        if result.skipped:
+            return
+        if self.metrics is not None:
+            self.metrics.artifact_finished(result.artifact_name)
+
+        self.completed_artifacts += 1
+        self.update_progress(self.completed_artifacts, total_artifacts, f"Finished {result.artifact_name}")
+        for ws, record_count in result.worksheets:
+            self.update_status(f"✓ {ws}: {record_count} records processed")
+        for ws, record_count in result.partial_worksheets:
+            self.update_status(f"⚠ {ws}: stopped after {record_count} records")
+
+        if result.stopped or (result.failed and not self.should_continue()):
+            self.update_status(f"⚠ {result.artifact_name}: stopped")
+        elif result.failed:
+            self.update_status(f"❌ Failed to process {result.artifact_name}")
+            if "database is locked" in str(result.error):
+                self.update_status(f"   Database file is locked. Close the browser and try again.")
+
+    def get_dataframes(self, db_file, function):
+        """Get dataframes from SQLite database"""
+        query, worksheet_name = function()
+        conn = self.connection(db_file)
+        label = f"{worksheet_name} ({function.__name__})"
+        (dataframe,) = self.traced(label, db_file, conn, lambda: [read_sql_query(query, conn)])
+        return self.decode_columns(dataframe, worksheet_name), worksheet_name
+
+    def connection(self, db_file):
+        """Shared connection to a database file (opened, or copied to memory in snapshot mode, on first use)"""
+        with measure('open'):
+            return self.connections.get(db_file)
+
+    def traced(self, label, db_file, conn, read, count_rows=len):
+        """Iterate over read(), tracing the queries it runs on conn when tracing (see QueryTracer.traced)"""
+        if self.tracer is None:
+            return iter(read())
+        return self.tracer.traced(label, db_file, conn, read, count_rows)
+
+    @staticmethod
+    def decode_columns(dataframe, worksheet_name):
+        """Add the decoded timestamp and code columns of a worksheet to a dataframe fetched from its query"""
+        with measure('decode'):
+            decode_timestamps(dataframe, worksheet_name)
+            decode_codes(dataframe, worksheet_name)
+        return dataframe
+
+    def get_dataframe_chunks(self, db_file, function):
+        """Get dataframes from SQLite database, chunk_size rows at a time, without loading the whole result"""
+        query, worksheet_name = function()
+
+        def read_chunks():
+            conn = self.connection(db_file)
+            for chunk in self.traced(f"{worksheet_name} ({function.__name__})", db_file, conn,
+                                     lambda: read_sql_query(query, conn, chunksize=self.chunk_size)):
+                yield self.decode_columns(chunk, worksheet_name)
+
+        return read_chunks(), worksheet_name
+
+    def process_search_terms(self):
+        """Process search terms data"""
+        worksheet = 'Search Terms'
+        input_file = f'{self.profile_path}/History'
+        df_history, ws_history = self.get_dataframes(input_file, chrome_keyword_historyquery)
+
+        input_file = f'{self.profile_path}/Web Data'
+        df_keywords, ws_keyword = self.get_dataframes(input_file, chrome_keywords)
+
+        columns = [
+            'URL id', 'url', 'keyword id', 'keyword', 'search term', 'typed_count', 'date_created',
+            'Decoded date_created (UTC)', 'last_modified', 'Decoded last_modified (UTC)',
+            'last_visit_time (UTC)', 'Decoded last_visit_time (UTC)'
+        ]
+
+        if len(df_keywords) == 0:
+            return pd.DataFrame([[""] * len(columns)], columns=columns), worksheet
+
+        # Single hash join of the searches with the keywords table on the keyword id, instead of looking up
+        # each search's keyword one at a time. keywords.id is the primary key, so there is at most one match.
+        keyword_columns = ['keyword', 'date_created', 'Decoded date_created (UTC)',
+                           'last_modified', 'Decoded last_modified (UTC)']
+        keywords = df_keywords[['id'] + keyword_columns].rename(columns={'id': 'keywords.id'})
+        # object dtype keeps the raw timestamps as exact integers when a search has no matching keyword
+        keywords[keyword_columns] = keywords[keyword_columns].astype(object)
+
+        searches = df_history[df_history['keyword_id'].notna()]
+        df_searchterms = searches.merge(keywords, how='left', left_on='keyword_id', right_on='keywords.id')
+
+        # The keyword was deleted from Web Data (or never synced to it)
+        no_keyword = df_searchterms['keywords.id'].isna()
+        df_searchterms.loc[no_keyword, keyword_columns] = ''
+
+        df_searchterms = df_searchterms[[
+            'id', 'url', 'keyword_id', 'keyword', 'term', 'visit_count', 'date_created',
+            'Decoded date_created (UTC)', 'last_modified', 'Decoded last_modified (UTC)',
+            'last_visit_time', 'Decoded history.last_visit_time (UTC)'
+        ]]
+        df_searchterms.columns = columns
+        return df_searchterms, worksheet
+
+    def process_bookmarks(self):
+        """Process bookmarks data"""
+        ws = 'Bookmarks'
+        try:
+            bookmarks_df, ws = get_chromium_bookmarks(f'{self.profile_path}/Bookmarks')
+        except:
+            bookmarks_df = pd.DataFrame()
+
+        try:
+            bookmarks_backup_df, ws_bak = get_chromium_bookmarks(f'{self.profile_path}/Bookmarks.bak')
+        except:
+            bookmarks_backup_df = pd.DataFrame()
+
+        all_bookmarks = pd.concat([bookmarks_df, bookmarks_backup_df], ignore_index=True)
+        return all_bookmarks, ws
+
+    def process_extensions(self):
+        """Process extensions data"""
+        ws = 'Extensions'
+
+        extension_list = [[]]
+        extensions = ChromeExtensions(self.profile_path)
+        all_extensions = extensions.get_manifest_paths()
+        extension_count = extensions.get_extension_count()
+
+        if extension_count == 0:
+            extension_list = [["","","","","",""]]
+        else:
+            for ext_ID in all_extensions.keys():
+                extension_list.append([
+                    ext_ID,
+                    extensions.get_name(ext_ID),
+                    extensions.get_version(ext_ID),
+                    extensions.get_description(ext_ID),
+                    extensions.get_author(ext_ID),
+                    extensions.get_homepage_url(ext_ID)
+                ])
+
+        extensions_df = pd.DataFrame(extension_list)
+
+        extensions_df.columns = [
+            "ID",
+            "Name",
+            "Version",
+            "Description",
+            "Author",
+            "Homepage URL"
+        ]
+        return extensions_df, ws, extension_count
+
+    def process_preferences(self):
+        """Process preferences data"""
+        preferences = Preferences(f'{self.profile_path}/Preferences')
+        preferences_output = io.StringIO()
+        print(preferences, file=preferences_output)
+        preferences_data = preferences_output.getvalue().splitlines()
+        preferences_df = pd.DataFrame(preferences_data, columns=["Preferences Output"])
+        return preferences_df
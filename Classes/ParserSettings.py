@@ -0,0 +1,61 @@
+"""Settings of the parser that the front ends need before the engine (and pandas, openpyxl, ...) is loaded."""
+
+import importlib
+
+__version__ = '2026-Mar-1'
+
+# Number of rows pulled from SQLite and written to the output at a time (bounds memory use on large tables)
+CHUNK_SIZE = 50000
+
+# Rows written to the output between two checks for a stop request, within a chunk (a fraction of a second)
+STOP_CHECK_ROWS = 5000
+
+# Number of artifacts (database files, JSON files, ...) processed concurrently
+MAX_WORKERS = 4
+
+# Artifact name -> whether it is selected by default, in the order the worksheets are written
+ARTIFACTS = {
+    'History': True,
+    'History Gaps': True,
+    'History Clusters': True,
+    'Downloads': True,
+    'Downloads Gaps': True,
+    'Autofill': True,
+    'Addresses': True,
+    'Keywords': True,
+    'Credit Cards': True,
+    'Bank Accounts': True,
+    'Loyalty Cards': True,
+    'Login Data': True,
+    'Login Data Gaps': True,
+    'Shortcuts': True,
+    'Top Sites': True,
+    'Cookies': True,
+    'FavIcons': True,
+    'Search Terms': True,
+    'Bookmarks': True,
+    'Preferences': True,
+    'Extensions': True,
+    'Web Assist (Edge)': False,
+}
+
+# Output format -> writer session class, as "module.class" (see writer_class). The columnar formats write a
+# folder (one file per worksheet plus manifest.json) and need pyarrow; sqlite writes one database with a table
+# per worksheet.
+OUTPUT_FORMATS = {
+    'xlsx': 'Classes.ExcelWriterSession.ExcelWriterSession',
+    'sqlite': 'Classes.SqliteWriterSession.SqliteWriterSession',
+    'parquet': 'Classes.ArrowWriterSession.ParquetWriterSession',
+    'arrow': 'Classes.ArrowWriterSession.ArrowWriterSession',
+}
+
+
+def writer_class(output_format: str) -> type:
+    """
+    Writer session class of an output format, imported on first use (openpyxl is only loaded for xlsx output).
+    The class must provide write, write_chunk, has_worksheet, order_sheets and close.
+    :param output_format: key of OUTPUT_FORMATS
+    :return: class
+    """
+    module_name, class_name = OUTPUT_FORMATS[output_format].rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)
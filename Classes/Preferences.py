@@ -1,6 +1,7 @@
-from datetime import datetime, timedelta
 import json
 
+from Functions.timestamps import webkit_timestamp_to_datetime
+
 class Preferences:
     """
     This class accepts a "Preferences" file as input (with full path).
@@ -117,12 +118,7 @@ class Preferences:
     def profile_created_date(self):
         try:
             creation_time = self.prefs.get("profile").get("creation_time")
-            # WebKit timestamp is in microseconds since January 1, 1601
-            base_date = datetime(1601, 1, 1)
-            # Convert WebKit time (microseconds) to seconds
-            timestamp_in_seconds = int(creation_time) / 1_000_000
-            # Add to base date
-            human_readable_date = base_date + timedelta(seconds=timestamp_in_seconds)
+            human_readable_date = webkit_timestamp_to_datetime(creation_time)
             creation_time =  f'{creation_time} = {human_readable_date} UTC'
         except (KeyError, IndexError, AttributeError, TypeError):
             creation_time =  "not found"
@@ -132,12 +128,7 @@ class Preferences:
     def previousNavigationTime(self):
         try:
             prev_nav_time = self.prefs.get("NewTabPage").get("PrevNavigationTime")
-            # WebKit timestamp is in microseconds since January 1, 1601
-            base_date = datetime(1601, 1, 1)
-            # Convert WebKit time (microseconds) to seconds
-            timestamp_in_seconds = int(prev_nav_time) / 1_000_000
-            # Add to base date
-            human_readable_date = base_date + timedelta(seconds=timestamp_in_seconds)
+            human_readable_date = webkit_timestamp_to_datetime(prev_nav_time)
             prev_nav_time =  f'{prev_nav_time} = {human_readable_date} UTC'
         except (KeyError, IndexError, AttributeError, TypeError):
             prev_nav_time =  "not found"
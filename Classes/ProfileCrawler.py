@@ -0,0 +1,154 @@
+"""Parallel discovery of Chromium profile folders in an evidence tree (mounted image, triage export, ...)."""
+
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+from Classes.BrowserProfile import (
+    PROFILE_MARKERS, BrowserProfile, identify_browser, identify_user, is_profile_folder, read_local_state,
+    safe_file_name
+)
+
+# Folders never descended into: operating system folders that cannot hold a browser profile but hold a great
+# many files (compared case-insensitively, at any depth)
+SKIP_FOLDERS = frozenset((
+    'windows', '$recycle.bin', 'system volume information', '$extend', 'winsxs',
+    'proc', 'sys', 'dev', 'node_modules', '.git',
+))
+
+
+class ProfileCrawler:
+    """
+    Walk a folder tree with os.scandir on a pool of threads and report the browser profiles in it as they
+    are found.
+
+    Each folder is listed by its own task, so many folders are listed at once; on a mounted image or a
+    network share the time goes into waiting on the file system, which releases the GIL. A profile folder
+    is not descended into (its own subfolders, Cache, IndexedDB, Extensions, ..., hold no other profile).
+    Profiles are handed out as soon as they are found, so parsing can start while the crawl goes on.
+    """
+
+    def __init__(self, root: str, max_workers: int = 16, max_depth: int | None = None,
+                 skip_folders: frozenset = SKIP_FOLDERS):
+        """
+        Args:
+            root: Folder to search (e.g. the mount point of an image, or C:/Users).
+            max_workers: Number of folders listed at the same time.
+            max_depth: Deepest folder level searched below root (None: no limit).
+            skip_folders: Folder names (lower case) that are not descended into.
+        """
+        self.root = root
+        self.max_workers = max(1, max_workers)
+        self.max_depth = max_depth
+        self.skip_folders = skip_folders
+        self.errors: list[tuple[str, str]] = []  # (folder, error) of the folders that could not be listed
+        self.folders_scanned = 0
+
+    def crawl(self) -> Iterator[BrowserProfile]:
+        """
+        Search the tree.
+
+        Returns:
+            Iterator over the profiles found, in the order they are found. Stopping the iteration early
+            stops the crawl.
+        """
+        found = queue.Queue()
+        done = object()
+        lock = threading.Lock()
+        pending = [0]  # folders queued or being listed
+        stopped = threading.Event()
+        output_names = set()
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='crawler')
+
+        def submit(path, depth):
+            with lock:
+                pending[0] += 1
+            pool.submit(visit, path, depth)
+
+        def visit(path, depth):
+            try:
+                if not stopped.is_set():
+                    for subfolder in self._scan(path, depth, found, output_names, lock):
+                        submit(subfolder, depth + 1)
+            finally:
+                with lock:
+                    pending[0] -= 1
+                    finished = pending[0] == 0
+                if finished:
+                    found.put(done)
+
+        try:
+            submit(self.root, 0)
+            while True:
+                profile = found.get()
+                if profile is done:
+                    break
+                yield profile
+        finally:
+            stopped.set()
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _scan(self, path: str, depth: int, found: queue.Queue, output_names: set, lock: threading.Lock) -> list:
+        """List one folder: report it if it is a profile, otherwise return the subfolders to search."""
+        files = set()
+        subfolders = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_symlink() or getattr(entry, 'is_junction', lambda: False)():
+                            continue  # links can loop back up the tree (e.g. "Application Data" junctions)
+                        if entry.is_dir():
+                            subfolders.append(entry.path)
+                        elif entry.name in PROFILE_MARKERS:
+                            files.add(entry.name)
+                    except OSError:
+                        continue
+        except OSError as e:
+            with lock:
+                self.errors.append((path, str(e)))
+            return []
+
+        with lock:
+            self.folders_scanned += 1
+
+        if is_profile_folder(files):
+            profile = self._profile(path)
+            with lock:
+                output_name = profile.output_name
+                suffix = 2
+                while output_name.lower() in output_names:
+                    output_name = f'{profile.output_name} ({suffix})'
+                    suffix += 1
+                output_names.add(output_name.lower())
+                profile.output_name = output_name
+            found.put(profile)
+            return []
+
+        if self.max_depth is not None and depth >= self.max_depth:
+            return []
+        return [subfolder for subfolder in subfolders
+                if os.path.basename(subfolder).lower() not in self.skip_folders]
+
+    @staticmethod
+    def _profile(path: str) -> BrowserProfile:
+        """Describe a profile folder from its path and its User Data folder's Local State"""
+        folder = os.path.basename(os.path.normpath(path))
+        user_data_path = os.path.dirname(os.path.normpath(path))
+
+        info_cache, _ = read_local_state(user_data_path)
+        info = info_cache.get(folder, {}) or {}
+        # Opera keeps its single profile in the User Data folder itself, next to Local State
+        in_local_state = folder in info_cache or os.path.isfile(os.path.join(path, 'Local State'))
+
+        browser = identify_browser(path)
+        if not browser and os.path.isfile(os.path.join(path, 'WebAssistDatabase')):
+            browser = 'Edge'
+        user = identify_user(path)
+        output_name = safe_file_name(' - '.join(part for part in (user, browser, folder) if part))
+
+        return BrowserProfile(folder, path, info.get('name', ''), info.get('user_name', ''), in_local_state,
+                              browser=browser, user=user, output_name=output_name)
@@ -0,0 +1,236 @@
+"""Parse many browser profiles, one output file per profile, on a process pool."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterable
+
+import pandas as pd
+
+from Classes.BrowserProfile import (
+    PROFILE_MARKERS, BrowserProfile, identify_browser, identify_user, is_profile_folder, read_local_state
+)
+from Classes.ParserEngine import ParserEngine
+from Classes.ParserSettings import MAX_WORKERS, writer_class
+
+
+def find_profiles(user_data_path: str) -> list[BrowserProfile]:
+    """
+    List the profiles of a User Data folder.
+
+    The profiles Local State knows about come first, in the browser's order (profile.profiles_order, then
+    profile.info_cache), followed by any other subfolder that has a profile's marker files (see is_profile_folder).
+
+    Args:
+        user_data_path: The browser's User Data folder (the one that holds Local State).
+
+    Returns:
+        The profiles whose folder exists.
+    """
+    info_cache, order = read_local_state(user_data_path)
+    browser = identify_browser(user_data_path)
+    user = identify_user(user_data_path)
+
+    profiles = []
+    seen = set()
+    for folder in order + [folder for folder in info_cache if folder not in order]:
+        path = os.path.join(user_data_path, folder)
+        if folder in seen or not os.path.isdir(path):
+            continue
+        seen.add(folder)
+        info = info_cache.get(folder, {}) or {}
+        profiles.append(BrowserProfile(folder, path, info.get('name', ''), info.get('user_name', ''),
+                                       browser=browser, user=user))
+
+    with os.scandir(user_data_path) as entries:
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            if entry.name in seen or not entry.is_dir():
+                continue
+            if is_profile_folder(marker for marker in PROFILE_MARKERS
+                                 if os.path.isfile(os.path.join(entry.path, marker))):
+                profiles.append(BrowserProfile(entry.name, entry.path, in_local_state=False,
+                                               browser=browser, user=user))
+
+    return profiles
+
+
+def parse_profile(profile_path: str, output_path: str, options: dict) -> dict:
+    """
+    Parse one profile with ParserEngine. Runs in a worker process, so it takes and returns plain data.
+
+    Args:
+        profile_path: Profile folder.
+        output_path: Output file of the profile.
+        options: Keyword arguments for ParserEngine (artifacts, output_format, max_workers, snapshot, ...).
+
+    Returns:
+        {'completed': bool, 'record_counts': [(worksheet, count), ...], 'errors': [message, ...]}
+    """
+    errors = []
+
+    def on_status(message):
+        if message.startswith('❌'):
+            errors.append(message.lstrip('❌ '))
+
+    engine = ParserEngine(profile_path, output_path, on_status=on_status, **options)
+    try:
+        completed = engine.run()
+    except Exception as e:
+        completed = False
+        errors.append(f'Critical error: {str(e)}')
+    return {'completed': completed, 'record_counts': engine.record_counts, 'errors': errors}
+
+
+class ProfileSweep:
+    """
+    Parse every profile of a User Data folder into its own output file, several profiles at a time in
+    separate processes, and write an index of the profiles and their record counts.
+
+    Profiles share nothing (each has its own databases), so they are spread over processes rather than
+    threads: the pandas work of one profile does not hold up the others. Within a profile, ParserEngine
+    still runs its artifacts on threads.
+    """
+
+    INDEX_NAME = 'Profiles Index'  # file name of the index, without extension
+
+    def __init__(self, user_data_path: str, output_folder: str, artifacts: list | None = None,
+                 output_format: str = 'xlsx', processes: int | None = None,
+                 max_workers: int = MAX_WORKERS, snapshot: bool = False, cache_dir: str | None = None,
+                 on_status: Callable[[str], None] | None = None,
+                 should_continue: Callable[[], bool] = lambda: True):
+        """
+        Args:
+            user_data_path: The browser's User Data folder, or the folder the profiles given to run() were found in.
+            output_folder: Folder that receives one output file per profile plus the index (created if needed).
+            artifacts: Artifacts to parse in each profile (see ParserEngine.ARTIFACTS). Defaults to the default selection.
+            output_format: Key of ParserEngine.OUTPUT_FORMATS, used for the profiles and the index.
+            processes: Number of profiles parsed at the same time. Defaults to the number of CPUs.
+            max_workers: Number of artifacts of a profile processed concurrently.
+            snapshot: Copy each database to memory and index it before querying it.
+            cache_dir: ResultCache folder shared by the profiles (entries are kept per profile path).
+            on_status: Called with each status message.
+            should_continue: Called before each profile is started; returning False stops the sweep.
+
+        Raises:
+            ValueError: If an artifact or the output format is unknown.
+        """
+        # Validate the options once, up front, rather than in every worker process
+        ParserEngine('', '', artifacts=artifacts, output_format=output_format)
+
+        self.user_data_path = user_data_path
+        self.output_folder = output_folder
+        self.processes = processes or os.cpu_count() or 1
+        self.options = {
+            'artifacts': artifacts,
+            'output_format': output_format,
+            'max_workers': max_workers,
+            'snapshot': snapshot,
+            'cache_dir': cache_dir,
+        }
+        self.on_status = on_status
+        self.should_continue = should_continue
+
+    def output_path(self, name: str) -> str:
+        """Output file of a profile (from its output name) or of the index."""
+        return os.path.join(self.output_folder, f"{name}.{self.options['output_format']}")
+
+    def run(self, profiles: Iterable[BrowserProfile] | None = None) -> pd.DataFrame:
+        """
+        Parse the profiles, then write the index.
+
+        Args:
+            profiles: Profiles to parse, e.g. ProfileCrawler(...).crawl(). Each one is handed to a worker process
+                      as soon as it is produced, so an iterator that is still searching overlaps with parsing.
+                      Defaults to the profiles of the User Data folder (see find_profiles).
+
+        Returns:
+            The index: one row per profile with its name, account, output file, status and record count.
+        """
+        if profiles is None:
+            profiles = find_profiles(self.user_data_path)
+        os.makedirs(self.output_folder, exist_ok=True)
+
+        queued = []
+        results = {}  # output name -> result of parse_profile
+        with ProcessPoolExecutor(max_workers=self.processes) as pool:
+            futures = {}
+            for profile in profiles:
+                if not self.should_continue():
+                    break
+                queued.append(profile)
+                futures[pool.submit(parse_profile, profile.path, self.output_path(profile.output_name),
+                                    self.options)] = profile
+                self.update_status(f"Queued {profile.path}")
+            self.update_status(f"Found {len(queued)} profile(s) in {self.user_data_path}")
+
+            for future in as_completed(futures):
+                profile = futures[future]
+                if not self.should_continue():
+                    for pending in futures:
+                        pending.cancel()
+                try:
+                    results[profile.output_name] = future.result()
+                except Exception as e:  # the worker process died, or the result could not be sent back
+                    results[profile.output_name] = {'completed': False, 'record_counts': [], 'errors': [str(e)]}
+
+                result = results[profile.output_name]
+                record_count = sum(count for _, count in result['record_counts'])
+                marker = '✓' if result['completed'] and not result['errors'] else '❌'
+                self.update_status(f"{marker} {profile.output_name}: {record_count} records")
+                for error in result['errors']:
+                    self.update_status(f"   {error}")
+
+        index = self.index(queued, results)
+        self.write_index(index, queued, results)
+        self.update_status(f"📁 Index saved to: {self.output_path(self.INDEX_NAME)}")
+        return index
+
+    def index(self, profiles: list[BrowserProfile], results: dict) -> pd.DataFrame:
+        """Index worksheet: one row per profile found"""
+        rows = []
+        for profile in profiles:
+            result = results.get(profile.output_name)
+            if result is None:
+                status = 'Not processed'
+            elif not result['completed']:
+                status = 'Stopped' if not result['errors'] else 'Failed'
+            elif result['errors']:
+                status = 'Completed with errors'
+            else:
+                status = 'Completed'
+
+            rows.append([
+                profile.user,
+                profile.browser,
+                profile.folder,
+                profile.name,
+                profile.user_name,
+                'Yes' if profile.in_local_state else 'No',
+                profile.path,
+                self.output_path(profile.output_name) if result is not None else '',
+                status,
+                sum(count for _, count in result['record_counts']) if result is not None else 0,
+                '; '.join(result['errors']) if result is not None else '',
+            ])
+
+        return pd.DataFrame(rows, columns=[
+            'User', 'Browser', 'Profile Folder', 'Profile Name', 'User Name', 'Listed in Local State',
+            'Profile Path', 'Output File', 'Status', 'Total Records', 'Errors'
+        ])
+
+    def write_index(self, index: pd.DataFrame, profiles: list[BrowserProfile], results: dict) -> None:
+        """Write the index and a worksheet of the record counts of every worksheet, one column per profile"""
+        counts = {}
+        for profile in profiles:
+            for worksheet, count in results.get(profile.output_name, {}).get('record_counts', []):
+                counts.setdefault(worksheet, {})[profile.output_name] = count
+        record_counts = pd.DataFrame.from_dict(counts, orient='index',
+                                               columns=[profile.output_name for profile in profiles]).astype('Int64')
+        record_counts = record_counts.rename_axis('Worksheet Name').reset_index()
+
+        with writer_class(self.options['output_format'])(self.output_path(self.INDEX_NAME), leading_sheets=('Profiles', 'Record Counts')) as writer:
+            writer.write(index, 'Profiles')
+            writer.write(record_counts, 'Record Counts')
+
+    def update_status(self, message: str) -> None:
+        if self.on_status is not None:
+            self.on_status(message)
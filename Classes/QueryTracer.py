@@ -0,0 +1,165 @@
+"""Diagnostic trace of the SQLite queries of a run: SQL, time, VM steps and query plans."""
+
+import datetime
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Iterable, Iterator
+
+# SQLite virtual machine instructions between two calls of the progress handler that counts them; the step
+# counts are rounded to this
+TRACE_STEPS = 100
+
+# Query plan lines of a table (or index) read from end to end (not of a subquery's materialized result)
+FULL_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW|\()(\S+)')
+# Query plan lines of a table SQLite indexes on the fly for a join, on every run of the query
+AUTOMATIC_INDEX = re.compile(r'^SEARCH (\S+) USING AUTOMATIC')
+
+
+class QueryTracer:
+    """
+    Record, for every query an artifact runs, the SQL SQLite executed (from the connection's trace callback),
+    the time spent running it and fetching its rows, the number of virtual machine steps it took (counted
+    by the connection's progress handler) and its EXPLAIN QUERY PLAN, and write them to a text trace file,
+    e.g. to see which joins do full scans on a given piece of evidence.
+
+    The connections report to the tracer (see DatabaseConnections), and the thread running a query tells it
+    which query it is running (see traced), so that artifacts running concurrently on different threads,
+    even on the same connection, are traced separately. Statements run outside a traced query (PRAGMAs,
+    snapshot indexes, ...) are not recorded.
+    """
+
+    def __init__(self, trace_file: str, title: str = ""):
+        """
+        Args:
+            trace_file: Text file the trace is written to (overwritten).
+            title: First line of the file (e.g. the profile traced).
+        """
+        self.trace_file = trace_file
+        self.steps = TRACE_STEPS
+        self._current = threading.local()  # thread -> query it is running
+        self._lock = threading.Lock()
+        self._file = open(trace_file, 'w', encoding='utf-8')
+        self._file.write(f'{title}\nStarted {datetime.datetime.now().isoformat(timespec="seconds")}\n')
+        self._file.flush()
+
+    def close(self) -> None:
+        """Close the trace file (queries finishing afterwards are not written)."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def watch(self, conn: sqlite3.Connection) -> None:
+        """Report the statements conn executes to the tracer (its progress handler must call count_steps)."""
+        conn.set_trace_callback(self._statement)
+
+    def count_steps(self) -> None:
+        """Progress handler hook: self.steps more VM steps were run (by the calling thread's statement)."""
+        query = getattr(self._current, 'query', None)
+        if query is not None:
+            query['steps'] += self.steps
+
+    def traced(self, label: str, db_file: str, conn: sqlite3.Connection, read: Callable[[], Iterable],
+               count_rows: Callable = len) -> Iterator:
+        """
+        Trace the queries run while reading from an iterable, e.g. the chunks of pd.read_sql_query.
+
+        Only the time spent getting each item is counted, not what the caller does with it between two items.
+        The query's record is written once the iterable is exhausted (or fails, or is closed).
+
+        Args:
+            label: What is queried (e.g. the worksheet name).
+            db_file: Database file conn is connected to.
+            conn: Connection the queries run on, to get their query plans.
+            read: Returns the iterable; called within the trace.
+            count_rows: Number of rows of an item (len for a dataframe).
+
+        Yields:
+            The items of read().
+        """
+        query = {'label': label, 'db_file': db_file, 'statements': [], 'seconds': 0.0, 'steps': 0, 'rows': 0}
+        error = None
+        try:
+            iterator = self._timed(query, lambda: iter(read()))
+            while True:
+                try:
+                    item = self._timed(query, lambda: next(iterator))
+                except StopIteration:
+                    break
+                query['rows'] += count_rows(item)
+                yield item
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._write(query, conn, error)
+
+    def _timed(self, query: dict, function: Callable):
+        """Call function while the calling thread is running query"""
+        self._current.query = query
+        start = time.perf_counter()
+        try:
+            return function()
+        finally:
+            query['seconds'] += time.perf_counter() - start
+            self._current.query = None
+
+    def _statement(self, sql: str) -> None:
+        """Trace callback: the calling thread executes sql."""
+        query = getattr(self._current, 'query', None)
+        if query is not None and sql not in query['statements']:
+            query['statements'].append(sql)
+
+    @staticmethod
+    def query_plan(conn: sqlite3.Connection, sql: str) -> list[str]:
+        """
+        EXPLAIN QUERY PLAN of a statement, as indented lines (as the sqlite3 shell shows it).
+
+        Args:
+            conn: Connection to the database the statement runs on.
+            sql: Statement.
+
+        Returns:
+            Lines of the plan, or the error SQLite gave.
+        """
+        try:
+            rows = conn.execute(f'EXPLAIN QUERY PLAN {sql}').fetchall()  # id, parent, notused, detail
+        except sqlite3.Error as e:
+            return [f'(no plan: {e})']
+
+        depths = {0: -1}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depths[node_id] = depths.get(parent, -1) + 1
+            lines.append('   ' * depths[node_id] + detail)
+        return lines
+
+    def _write(self, query: dict, conn: sqlite3.Connection, error: Exception | None) -> None:
+        """Write the record of a finished query to the trace file."""
+        plans = [(sql, self.query_plan(conn, sql)) for sql in query['statements']]
+        plan_lines = [line.strip() for _, plan in plans for line in plan]
+        full_scans = sorted({match.group(1) for line in plan_lines if (match := FULL_SCAN.match(line))})
+        automatic_indexes = sorted({match.group(1) for line in plan_lines
+                                    if (match := AUTOMATIC_INDEX.match(line))})
+
+        lines = [
+            f"\n==== {query['label']} ====",
+            f"Database:          {query['db_file']}",
+            f"Status:            {'ok' if error is None else f'failed: {error}'}",
+            f"Elapsed:           {query['seconds']:.6f} s",
+            f"Rows:              {query['rows']}",
+            f"VM steps:          {query['steps']} (counted in steps of {self.steps})",
+            f"Full scans:        {', '.join(full_scans) or 'none'}",
+            f"Automatic indexes: {', '.join(automatic_indexes) or 'none'}",
+        ]
+        for sql, plan in plans:
+            lines.append("\n-- SQL")
+            lines.extend('   ' + line for line in sql.strip().splitlines())
+            lines.append("-- Query plan")
+            lines.extend('   ' + line for line in plan)
+
+        with self._lock:
+            if not self._file.closed:
+                self._file.write('\n'.join(lines) + '\n')
+                self._file.flush()
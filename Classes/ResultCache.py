@@ -0,0 +1,230 @@
+"""Persistent cache of artifact results, reused while their input files and code are unchanged."""
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import Future
+from typing import Callable, Iterable, Iterator
+
+from Classes.ChunkStore import ChunkStore
+
+MANIFEST = 'manifest.json'
+CHUNKS = 'chunks.sqlite'
+FORMAT = 2  # entries of any other format (e.g. the pickled chunks of format 1) are never read, only replaced
+
+
+class ResultCache:
+    """
+    Keep the dataframes an artifact produced in a cache folder (one per case), so that running the parser
+    again on the same evidence (another artifact selection, another output file, ...) reads them back
+    instead of querying and decoding again.
+
+    An artifact's entry records a fingerprint of each input file (size, modification time and SHA-256)
+    and a hash of the code that produced it (its SQL and the source of the modules involved). The entry is
+    reused only if both still match. When a file's size and modification time are unchanged, its stored
+    hash is trusted rather than computed again, unless verify_hashes is set. A file read by several artifacts
+    (e.g. History) is hashed once per ResultCache, however many of them fingerprint it at the same time.
+
+    The chunks are stored as data only, in one SQLite file per entry (see ChunkStore), with the dtypes of their
+    columns in the manifest: loading an entry never runs code from the cache folder, so a cache that was
+    tampered with can change the results it gives back, not take over the parser. Keep the cache with the case
+    and as trusted as the evidence. An entry is only committed once the artifact has produced all of its
+    chunks, so a failed or stopped run never leaves a partial result behind.
+    """
+
+    def __init__(self, cache_dir: str, verify_hashes: bool = False):
+        """
+        Args:
+            cache_dir: Cache folder (created if needed). May be shared by several profiles and processes.
+            verify_hashes: Hash every input file on each run, even when its size and modification time
+                           are unchanged.
+        """
+        self.cache_dir = cache_dir
+        self.verify_hashes = verify_hashes
+        # (path, size, modification time) -> SHA-256, as a future: set once the thread that hashes it is done
+        self._hashes: dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def wrap(self, key: str, input_files: list[str], code: list, producer: Callable[[], Iterable[tuple]],
+             on_hit: Callable[[], None] | None = None) -> Callable[[], Iterator[tuple]]:
+        """
+        Wrap an artifact's producer (see ArtifactScheduler.run) so that it is served from the cache when possible.
+
+        Args:
+            key: Identifies the artifact (e.g. profile path and artifact name). One entry is kept per key.
+            input_files: Files the artifact reads. Missing files are part of the fingerprint too.
+            code: SQL text, modules, classes or functions the result depends on (see code_fingerprint).
+            producer: The artifact's producer.
+            on_hit: Called when the cached result is used.
+
+        Returns:
+            A producer yielding the same (worksheet name, dataframes[, record count]) tuples.
+        """
+        entry_dir = os.path.join(self.cache_dir, hashlib.sha256(key.encode('utf-8')).hexdigest()[:32])
+
+        def produce():
+            code_hash = self.code_fingerprint(code)
+            manifest = self._read_manifest(entry_dir)
+            inputs = self._fingerprint_files(input_files, manifest['inputs'] if manifest else {})
+
+            if manifest is not None and manifest['code'] == code_hash and self._same_inputs(manifest['inputs'], inputs):
+                if manifest['inputs'] != inputs:  # same content, new modification times: remember them
+                    manifest['inputs'] = inputs
+                    self._write_manifest(entry_dir, manifest)
+                if on_hit is not None:
+                    on_hit()
+                yield from self._replay(entry_dir, manifest)
+            else:
+                yield from self._record(entry_dir, {'key': key, 'code': code_hash, 'inputs': inputs}, producer())
+
+        return produce
+
+    @staticmethod
+    def code_fingerprint(parts: list) -> str:
+        """
+        Hash the code a result depends on.
+        :param parts: strings (e.g. SQL) are hashed as they are; modules, classes and functions by their source
+        :return: hex digest
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            if not isinstance(part, str):
+                part = inspect.getsource(inspect.getmodule(part) if not inspect.ismodule(part) else part)
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _fingerprint_files(self, paths: list[str], previous: dict) -> dict:
+        """Size, modification time and SHA-256 of each file (None if it does not exist)"""
+        fingerprints = {}
+        for path in paths:
+            path = os.path.abspath(path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                fingerprints[path] = None
+                continue
+
+            fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+            known = previous.get(path)
+            if (not self.verify_hashes and known
+                    and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns):
+                fingerprint['sha256'] = known['sha256']
+            else:
+                fingerprint['sha256'] = self._file_hash(path, stat.st_size, stat.st_mtime_ns)
+            fingerprints[path] = fingerprint
+        return fingerprints
+
+    def _file_hash(self, path: str, size: int, mtime_ns: int) -> str:
+        """SHA-256 of a file, computed by the first artifact that asks for it; the others wait for it"""
+        key = (path, size, mtime_ns)
+        with self._lock:
+            future = self._hashes.get(key)
+            hashing = future is None
+            if hashing:
+                future = self._hashes[key] = Future()
+
+        if hashing:
+            try:
+                future.set_result(self._hash_file(path))
+            except BaseException as error:
+                with self._lock:
+                    del self._hashes[key]
+                future.set_exception(error)
+        return future.result()
+
+    @staticmethod
+    def _same_inputs(cached: dict, current: dict) -> bool:
+        """True if the same files have the same content (modification times may differ, e.g. after a copy)"""
+        if cached.keys() != current.keys():
+            return False
+        for path, fingerprint in current.items():
+            known = cached[path]
+            if fingerprint is None or known is None:
+                if fingerprint is not known:
+                    return False
+            elif (known['size'], known['sha256']) != (fingerprint['size'], fingerprint['sha256']):
+                return False
+        return True
+
+    @staticmethod
+    def _hash_file(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _read_manifest(entry_dir: str) -> dict | None:
+        try:
+            with open(os.path.join(entry_dir, MANIFEST), 'r', encoding='utf-8') as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return manifest if isinstance(manifest, dict) and manifest.get('format') == FORMAT else None
+
+    @staticmethod
+    def _write_manifest(directory: str, manifest: dict) -> None:
+        temporary_file = os.path.join(directory, f'{MANIFEST}.{os.getpid()}-{threading.get_ident()}.tmp')
+        with open(temporary_file, 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=1)
+        os.replace(temporary_file, os.path.join(directory, MANIFEST))
+
+    @staticmethod
+    def _replay(entry_dir: str, manifest: dict) -> Iterator[tuple]:
+        """Yield the cached worksheets, reading one chunk at a time"""
+        def chunks(worksheet_number, columns):
+            with ChunkStore(os.path.join(entry_dir, CHUNKS), read_only=True) as store:
+                for chunk_number, chunk_columns in enumerate(columns):
+                    yield store.read(f'chunk_{worksheet_number}_{chunk_number}', chunk_columns)
+
+        for worksheet_number, output in enumerate(manifest['outputs']):
+            chunk_iterator = chunks(worksheet_number, output['columns'])
+            if output['record_count'] is None:
+                yield output['worksheet'], chunk_iterator
+            else:
+                yield output['worksheet'], chunk_iterator, output['record_count']
+
+    def _record(self, entry_dir: str, manifest: dict, outputs: Iterable[tuple]) -> Iterator[tuple]:
+        """Pass the producer's output through, storing each chunk before it is written"""
+        temporary_dir = f'{entry_dir}.{os.getpid()}-{threading.get_ident()}.tmp'
+        shutil.rmtree(temporary_dir, ignore_errors=True)
+        os.makedirs(temporary_dir)
+        chunk_store = ChunkStore(os.path.join(temporary_dir, CHUNKS))
+        manifest['format'] = FORMAT
+        manifest['outputs'] = []
+        complete = []  # one flag per worksheet: were all of its chunks produced and stored?
+
+        def store(worksheet_number, chunks):
+            output = manifest['outputs'][worksheet_number]
+            for chunk in chunks:
+                # Stored before it is yielded: the writer may modify the chunk in place
+                output['columns'].append(chunk_store.write(chunk, f"chunk_{worksheet_number}_{len(output['columns'])}"))
+                yield chunk
+            complete[worksheet_number] = True
+
+        committed = False
+        try:
+            for output in outputs:
+                worksheet_name, chunks = output[0], output[1]
+                record_count = output[2] if len(output) > 2 else None
+                worksheet_number = len(manifest['outputs'])
+                manifest['outputs'].append({'worksheet': worksheet_name, 'columns': [], 'record_count': record_count})
+                complete.append(False)
+                yield (worksheet_name, store(worksheet_number, chunks)) + tuple(output[2:])
+
+            if all(complete):
+                chunk_store.close()
+                self._write_manifest(temporary_dir, manifest)
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                os.replace(temporary_dir, entry_dir)
+                committed = True
+        finally:
+            chunk_store.close()
+            if not committed:
+                shutil.rmtree(temporary_dir, ignore_errors=True)
@@ -0,0 +1,181 @@
+"""Time, throughput, input size and memory use of each artifact of a run."""
+
+import contextlib
+import datetime
+import os
+import threading
+import time
+import tracemalloc
+
+# Thread -> metrics and artifact it is currently working for (see RunMetrics.working_on)
+_current = threading.local()
+
+
+@contextlib.contextmanager
+def measure(stage: str):
+    """
+    Time a stage of the artifact the calling thread is working on (e.g. with measure('decode'): ...).
+    Does nothing when no RunMetrics is collecting on this thread, so code can be instrumented unconditionally.
+    """
+    metrics = getattr(_current, 'metrics', None)
+    if metrics is None:
+        yield
+        return
+    artifact_name = _current.artifact_name
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(artifact_name, stage, time.perf_counter() - start)
+
+
+class RunMetrics:
+    """
+    Collect, for each artifact of a run, how long each stage took, how many rows it produced and how fast,
+    the size of the files it read and the peak memory allocated while it ran.
+
+    Stages:
+        open      opening (or copying, in snapshot mode) the database files
+        query     running the queries and building the dataframes (or parsing the JSON files, ...)
+        decode    decoding timestamps and codes
+        sanitize  removing the characters the output cannot hold
+        write     writing to the output
+
+    Open, decode and sanitize are timed where they happen, with measure(); the scheduler times the reading
+    (everything the artifact's producer does) and the writing, and query is what reading leaves once open
+    and decode are taken out. Memory is traced with tracemalloc while the run is collected (which slows
+    Python allocations down noticeably). Artifacts that run concurrently share the process's memory, so
+    an artifact's peak is the highest peak seen while it ran, whichever artifact allocated it; with a
+    single worker it is the artifact's own.
+    """
+
+    STAGES = ('open', 'query', 'decode', 'sanitize', 'write')
+
+    def __init__(self, trace_memory: bool = True):
+        """
+        Args:
+            trace_memory: Trace memory allocations with tracemalloc (peak memory is not reported otherwise).
+        """
+        self.trace_memory = trace_memory
+        self._artifacts: dict[str, dict] = {}
+        self._running: set[str] = set()
+        self._lock = threading.Lock()
+        self._started_tracing = False
+        self.started_utc = None
+        self.wall_seconds = None
+        self.peak_memory = 0
+        self._start = None
+
+    def start(self) -> None:
+        """Start collecting (call before the run)."""
+        self.started_utc = datetime.datetime.now(datetime.timezone.utc)
+        self._start = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self) -> None:
+        """Stop collecting (call after the run)."""
+        self.sample_memory()
+        self.wall_seconds = time.perf_counter() - self._start
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def artifact_started(self, artifact_name: str, input_files: list | None = None) -> None:
+        """
+        An artifact starts. What the threads working on it measure is attributed to it (see working_on).
+
+        Args:
+            artifact_name: Name of the artifact.
+            input_files: Files it reads (their sizes are reported).
+        """
+        self.sample_memory()
+        sources = []
+        for path in input_files or []:
+            try:
+                sources.append({'file': path, 'bytes': os.path.getsize(path)})
+            except OSError:
+                pass  # missing file: the artifact fails or skips it
+
+        with self._lock:
+            self._artifacts[artifact_name] = {
+                'start': time.perf_counter(),
+                'seconds': None,
+                'stages': dict.fromkeys(self.STAGES + ('read',), 0.0),
+                'sources': sources,
+                'peak_memory': 0,
+            }
+            self._running.add(artifact_name)
+
+    def artifact_finished(self, artifact_name: str) -> None:
+        """An artifact's last chunk has been written (or it failed, or was stopped)."""
+        self.sample_memory()
+        with self._lock:
+            artifact = self._artifacts.get(artifact_name)
+            if artifact is not None:
+                artifact['seconds'] = time.perf_counter() - artifact['start']
+            self._running.discard(artifact_name)
+
+    @contextlib.contextmanager
+    def working_on(self, artifact_name: str):
+        """Attribute what the calling thread measures (see measure) to artifact_name while in this context."""
+        previous = getattr(_current, 'metrics', None), getattr(_current, 'artifact_name', None)
+        _current.metrics, _current.artifact_name = self, artifact_name
+        try:
+            yield
+        finally:
+            _current.metrics, _current.artifact_name = previous
+
+    def add(self, artifact_name: str, stage: str, seconds: float) -> None:
+        """Add time to a stage of an artifact ('read' is the total time spent in the artifact's producer)."""
+        with self._lock:
+            artifact = self._artifacts.get(artifact_name)
+            if artifact is not None:
+                artifact['stages'][stage] = artifact['stages'].get(stage, 0.0) + seconds
+
+    def sample_memory(self) -> None:
+        """Attribute the peak traced memory since the last sample to every artifact running now."""
+        if not tracemalloc.is_tracing():
+            return
+        with self._lock:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            self.peak_memory = max(self.peak_memory, peak)
+            for artifact_name in self._running:
+                artifact = self._artifacts[artifact_name]
+                artifact['peak_memory'] = max(artifact['peak_memory'], peak)
+
+    def artifact_report(self, artifact_name: str, record_count: int) -> dict | None:
+        """
+        Metrics of one artifact.
+
+        Args:
+            artifact_name: Name of the artifact.
+            record_count: Records it produced (all of its worksheets).
+
+        Returns:
+            {'seconds', 'records', 'records_per_second', 'stages': {stage: seconds}, 'sources': [{'file',
+            'bytes'}], 'input_bytes', 'peak_memory_bytes'}, or None if the artifact did not run.
+        """
+        with self._lock:
+            artifact = self._artifacts.get(artifact_name)
+            if artifact is None:
+                return None
+            stages = dict(artifact['stages'])
+            seconds = artifact['seconds']
+            if seconds is None:
+                seconds = time.perf_counter() - artifact['start']
+
+        read = stages.pop('read')
+        stages['query'] = max(0.0, read - stages['open'] - stages['decode'])
+        stages['write'] = max(0.0, stages['write'] - stages['sanitize'])  # writing includes sanitizing
+        return {
+            'seconds': round(seconds, 6),
+            'records': record_count,
+            'records_per_second': round(record_count / seconds, 1) if seconds > 0 else None,
+            'stages': {stage: round(stages[stage], 6) for stage in self.STAGES},
+            'sources': artifact['sources'],
+            'input_bytes': sum(source['bytes'] for source in artifact['sources']),
+            'peak_memory_bytes': artifact['peak_memory'] if self.trace_memory else None,
+        }
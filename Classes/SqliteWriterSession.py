@@ -0,0 +1,343 @@
+"""Case database output: every worksheet as a table of one SQLite file, with indexes and full-text search."""
+
+import datetime
+import itertools
+import math
+import os
+import re
+import sqlite3
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+from Classes.ParserSettings import STOP_CHECK_ROWS
+
+# Rows inserted between commits: large transactions make bulk inserts fast
+ROWS_PER_TRANSACTION = 500000
+
+# Columns that get an index, by name (case insensitive): ids, URLs and timestamps
+INDEXED_COLUMNS = re.compile(r'(^|[ ._])id$|url|time|date', re.IGNORECASE)
+
+# Columns whose text goes into the full-text search table: URLs, titles and search terms
+SEARCHED_COLUMNS = re.compile(r'url|title|term|keyword', re.IGNORECASE)
+
+WORKSHEETS_TABLE = '_worksheets'
+SEARCH_TABLE = '_search'
+
+
+def _quote(identifier: str) -> str:
+    """Quote a table or column name for SQLite"""
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+class SqliteWriterSession:
+    """
+    Write every worksheet of a run as a table of one SQLite database, so that a case can be queried
+    with SQL instead of filtered in Excel, whatever its size.
+
+    Same interface as ExcelWriterSession. Each table has one column per dataframe column, declared
+    with the matching SQLite type (INTEGER, REAL, TEXT or BLOB). A float column (e.g. integers with NULLs,
+    which SQLite hands back as float64) is declared INTEGER while all its values are whole numbers; if a
+    later chunk has one that is not, the column is REAL and its table is rebuilt with that type when the
+    session is closed. Decoded times are stored as ISO 8601
+    text ("YYYY-MM-DD HH:MM:SS.ffffff"), which sorts chronologically and works with SQLite's date
+    functions. Rows are bulk-inserted in large transactions, and the indexes are only built when the
+    session is closed, once all the rows are in:
+
+    - an index on every id, URL and timestamp column;
+    - an FTS5 table, _search(worksheet, column_name, source_rowid, value), over the URL, title and
+      search term columns of every table (when the SQLite library has FTS5), e.g.
+      SELECT worksheet, source_rowid, value FROM _search WHERE _search MATCH 'bank';
+    - a _worksheets table listing the tables in the order of the Excel output, with their row counts.
+
+    A worksheet written without any column (e.g. one that got no chunks) is listed in _worksheets with 0
+    records but has no table, since a SQLite table needs at least one column.
+    """
+
+    def __init__(self, database_file: str, leading_sheets: tuple = ('Summary', 'Preferences'),
+                 should_continue: Callable[[], bool] = lambda: True):
+        """
+        Create the (empty) output database.
+
+        Args:
+            database_file: Output file (includes path). Overwritten if it already exists.
+            leading_sheets: Worksheets listed first in _worksheets, in this order, whenever they get written.
+            should_continue: Polled every STOP_CHECK_ROWS rows while a chunk is inserted; returning False
+                             stops inserting the chunk (see write_chunk).
+        """
+        self.database_file = database_file
+        self.should_continue = should_continue
+        self._leading_sheets = tuple(leading_sheets)
+        self._tables: dict[str, dict] = {}  # worksheet name -> columns, SQL types, insert statement, row count
+        self._order: list[str] = []
+        self._pending_rows = 0
+        self._closed = False
+
+        if os.path.exists(database_file):
+            os.remove(database_file)
+        # Only ever used by one thread at a time (created here, written by the scheduler's writer thread)
+        self._connection = sqlite3.connect(database_file, check_same_thread=False, isolation_level=None)
+        # A new file that is written in one go: no rollback journal or fsync needed
+        self._connection.execute('PRAGMA journal_mode = OFF')
+        self._connection.execute('PRAGMA synchronous = OFF')
+        self._connection.execute('PRAGMA cache_size = -65536')
+        self._connection.execute('BEGIN')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def write(self, dataframe: pd.DataFrame, worksheet_name: str) -> int:
+        """
+        Write a dataframe to a new table.
+
+        Args:
+            dataframe: Dataframe to write (no index).
+            worksheet_name: Name of the worksheet (and table).
+
+        Returns:
+            The number of records written.
+        """
+        return self.write_chunks([dataframe], worksheet_name)
+
+    def write_chunks(self, chunks: Iterable[pd.DataFrame], worksheet_name: str) -> int:
+        """
+        Write a sequence of dataframes with the same columns to a new table, one chunk at a time.
+
+        Args:
+            chunks: Dataframes to write. The columns and their types are taken from the first chunk.
+            worksheet_name: Name of the worksheet (and table).
+
+        Returns:
+            The number of records written.
+        """
+        if worksheet_name in self._tables:
+            raise ValueError(f"Sheet '{worksheet_name}' already exists.")
+
+        record_count = 0
+        for chunk in chunks:
+            record_count += self.write_chunk(chunk, worksheet_name)
+
+        if worksheet_name not in self._tables:  # no chunks at all
+            self.write_chunk(pd.DataFrame(), worksheet_name)
+        return record_count
+
+    def write_chunk(self, chunk: pd.DataFrame, worksheet_name: str) -> int:
+        """
+        Append one dataframe to a worksheet's table. The first chunk creates the table, with its columns
+        and their types taken from that chunk. If should_continue returns False while the chunk is
+        inserted, the rest of it is not.
+
+        Args:
+            chunk: Dataframe to append.
+            worksheet_name: Name of the worksheet (and table).
+
+        Returns:
+            The number of records written (fewer than the chunk has if writing was stopped).
+        """
+        table = self._tables.get(worksheet_name)
+        if table is None or not table['names'] and chunk.shape[1]:
+            table = self._create_table(chunk, worksheet_name)
+
+        for i, sql_type in enumerate(table['types']):
+            if sql_type == 'INTEGER' and chunk.dtypes.iloc[i].kind == 'f' \
+                    and self._sql_type(chunk.iloc[:, i]) == 'REAL':
+                table['types'][i] = 'REAL'  # declared from a first chunk of whole numbers only
+
+        columns = [self._column_values(chunk.iloc[:, i], table['types'][i]) for i in range(chunk.shape[1])]
+        written = 0 if columns else len(chunk)  # rows without columns have nothing to insert
+        rows = zip(*columns)
+        while written < len(chunk):
+            batch = list(itertools.islice(rows, STOP_CHECK_ROWS))
+            self._connection.executemany(table['insert'], batch)
+            written += len(batch)
+            if written < len(chunk) and not self.should_continue():
+                break
+        table['rows'] += written
+
+        self._pending_rows += written
+        if self._pending_rows >= ROWS_PER_TRANSACTION:
+            self._connection.execute('COMMIT')
+            self._connection.execute('BEGIN')
+            self._pending_rows = 0
+        return written
+
+    def has_worksheet(self, worksheet_name: str) -> bool:
+        """Return True if something has already been written to worksheet_name."""
+        return worksheet_name in self._tables
+
+    def order_sheets(self, worksheet_names: list) -> None:
+        """
+        List the given worksheets, in this order, right after the leading worksheets in _worksheets.
+
+        Args:
+            worksheet_names: Names of worksheets, in the order they should appear.
+        """
+        listed = [name for name in worksheet_names if name in self._tables and name not in self._leading_sheets]
+        others = [name for name in self._order if name not in listed and name not in self._leading_sheets]
+        self._order = [name for name in self._leading_sheets if name in self._tables] + listed + others
+
+    def close(self) -> None:
+        """Build the indexes, the full-text search table and the list of worksheets, then close the database."""
+        if self._closed:
+            return
+        self._closed = True
+
+        try:
+            self.order_sheets([])  # leading worksheets first
+            self._redeclare_widened_columns()
+            self._create_indexes()
+            self._create_search_table()
+
+            self._connection.execute(f'CREATE TABLE {WORKSHEETS_TABLE} '
+                                     '(position INTEGER PRIMARY KEY, worksheet TEXT, record_count INTEGER)')
+            self._connection.executemany(f'INSERT INTO {WORKSHEETS_TABLE} VALUES (?, ?, ?)',
+                                         [(position, name, self._tables[name]['rows'])
+                                          for position, name in enumerate(self._order, start=1)])
+            self._connection.execute('COMMIT')
+            self._connection.execute('ANALYZE')
+        finally:
+            self._connection.close()
+
+    def _create_table(self, chunk: pd.DataFrame, worksheet_name: str) -> dict:
+        """Create a worksheet's table from its first chunk"""
+        names = []
+        for name in (str(column) for column in chunk.columns):
+            unique_name, suffix = name, 2
+            while unique_name.lower() in (existing.lower() for existing in names):  # SQLite names ignore case
+                unique_name, suffix = f'{name} ({suffix})', suffix + 1
+            names.append(unique_name)
+        types = [self._sql_type(chunk.iloc[:, i]) for i in range(chunk.shape[1])]
+
+        if names:  # no columns: the worksheet is only listed in _worksheets (see the class docstring)
+            definitions = ', '.join(f'{_quote(name)} {sql_type}' for name, sql_type in zip(names, types))
+            self._connection.execute(f'CREATE TABLE {_quote(worksheet_name)} ({definitions})')
+
+        table = {
+            'names': names,
+            'types': types,
+            'declared_types': list(types),  # as in CREATE TABLE; types may have been widened since
+            'insert': f'INSERT INTO {_quote(worksheet_name)} VALUES ({", ".join("?" * len(names))})',
+            'rows': 0,
+        }
+        if worksheet_name not in self._tables:
+            self._order.append(worksheet_name)
+        self._tables[worksheet_name] = table
+        return table
+
+    @staticmethod
+    def _sql_type(series: pd.Series) -> str:
+        """SQLite type of a column, from its dtype (and values, for object and float columns)"""
+        dtype = series.dtype
+        if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+            return 'INTEGER'
+        if pd.api.types.is_float_dtype(dtype):
+            # Integer columns with NULLs come back from SQLite as float64
+            values = series.dropna().to_numpy()
+            integral = len(values) > 0 and np.all(np.mod(values, 1) == 0) and np.all(np.abs(values) < 2 ** 53)
+            return 'INTEGER' if integral else 'REAL'
+        if pd.api.types.is_datetime64_any_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+            return 'TEXT'
+        present = [value for value in series.tolist() if value is not None and not SqliteWriterSession._is_missing(value)]
+        if present and all(isinstance(value, (bytes, bytearray, memoryview)) for value in present):
+            return 'BLOB'
+        if present and all(isinstance(value, (int, np.integer)) and not isinstance(value, bool) for value in present):
+            return 'INTEGER'
+        return 'TEXT'
+
+    @staticmethod
+    def _column_values(series: pd.Series, sql_type: str) -> list:
+        """Convert a column to values sqlite3 can bind, one column at a time"""
+        dtype = series.dtype
+
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            if getattr(series.dt, 'tz', None) is not None:
+                series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+            text = series.dt.strftime('%Y-%m-%d %H:%M:%S.%f')
+            return text.where(series.notna(), None).tolist()
+
+        if isinstance(dtype, np.dtype) and dtype.kind in 'iub':
+            return series.tolist()
+
+        if isinstance(dtype, np.dtype) and dtype.kind == 'f':
+            values = series.tolist()
+            if sql_type == 'INTEGER':
+                return [None if math.isnan(value) else int(value) if value.is_integer() else value
+                        for value in values]
+            return [None if math.isnan(value) else value for value in values]
+
+        converted = []
+        for value in series.astype(object).tolist():
+            if isinstance(value, np.generic):
+                value = value.item()  # numpy scalar left in an object column
+            if value is None or isinstance(value, (str, bytes, float)) and not (isinstance(value, float) and math.isnan(value)):
+                converted.append(value)
+            elif SqliteWriterSession._is_missing(value):
+                converted.append(None)
+            elif isinstance(value, bool):
+                converted.append(int(value))
+            elif isinstance(value, int):
+                converted.append(value if -2 ** 63 <= value < 2 ** 63 else str(value))
+            elif isinstance(value, (bytearray, memoryview)):
+                converted.append(bytes(value))
+            elif isinstance(value, (datetime.datetime, pd.Timestamp)):
+                converted.append(value.strftime('%Y-%m-%d %H:%M:%S.%f'))
+            else:
+                converted.append(str(value))
+        return converted
+
+    @staticmethod
+    def _is_missing(value) -> bool:
+        return value is pd.NaT or value is pd.NA or (isinstance(value, float) and math.isnan(value))
+
+    def _redeclare_widened_columns(self) -> None:
+        """Rebuild the tables with INTEGER columns that turned out to hold fractional values, declaring them REAL"""
+        for worksheet_name in self._order:
+            table = self._tables[worksheet_name]
+            if table['types'] == table['declared_types']:
+                continue
+            rebuilt = f'{WORKSHEETS_TABLE}_rebuilt'
+            definitions = ', '.join(f'{_quote(name)} {sql_type}'
+                                    for name, sql_type in zip(table['names'], table['types']))
+            self._connection.execute(f'CREATE TABLE {_quote(rebuilt)} ({definitions})')
+            self._connection.execute(f'INSERT INTO {_quote(rebuilt)} '
+                                     f'SELECT * FROM {_quote(worksheet_name)} ORDER BY rowid')
+            self._connection.execute(f'DROP TABLE {_quote(worksheet_name)}')
+            self._connection.execute(f'ALTER TABLE {_quote(rebuilt)} RENAME TO {_quote(worksheet_name)}')
+            table['declared_types'] = list(table['types'])
+
+    def _create_indexes(self) -> None:
+        """Index the id, URL and timestamp columns of every table"""
+        for worksheet_name in self._order:
+            table = self._tables[worksheet_name]
+            if table['rows'] == 0:
+                continue
+            for name in table['names']:
+                if INDEXED_COLUMNS.search(name):
+                    index_name = re.sub(r'\W+', '_', f'idx_{worksheet_name}_{name}')
+                    self._connection.execute(f'CREATE INDEX IF NOT EXISTS {_quote(index_name)} '
+                                             f'ON {_quote(worksheet_name)} ({_quote(name)})')
+
+    def _create_search_table(self) -> None:
+        """Fill the FTS5 table with the URL, title and search term text of every table"""
+        try:
+            self._connection.execute(f'CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5('
+                                     'worksheet UNINDEXED, column_name UNINDEXED, source_rowid UNINDEXED, value)')
+        except sqlite3.OperationalError:
+            return  # SQLite library built without FTS5
+
+        for worksheet_name in self._order:
+            table = self._tables[worksheet_name]
+            for name, sql_type in zip(table['names'], table['types']):
+                if sql_type != 'TEXT' or not SEARCHED_COLUMNS.search(name):
+                    continue
+                self._connection.execute(
+                    f'INSERT INTO {SEARCH_TABLE} (worksheet, column_name, source_rowid, value) '
+                    f'SELECT ?, ?, rowid, {_quote(name)} FROM {_quote(worksheet_name)} '
+                    f"WHERE {_quote(name)} IS NOT NULL AND {_quote(name)} != ''",
+                    (worksheet_name, name)
+                )
@@ -0,0 +1,69 @@
+"""Status, progress and other events posted by worker threads for a user interface thread."""
+
+import collections
+import datetime
+import threading
+from typing import Callable
+
+
+class UiEvents:
+    """What accumulated in a UiEventQueue since it was last drained."""
+
+    def __init__(self, messages: list, dropped: int, progress: tuple | None, calls: list):
+        self.messages = messages  # (time posted, message), oldest first
+        self.dropped = dropped  # messages discarded because too many were waiting
+        self.progress = progress  # latest (current, total, message), None if no progress was posted
+        self.calls = calls  # (function, args), in the order posted
+
+    def __bool__(self) -> bool:
+        return bool(self.messages or self.dropped or self.progress is not None or self.calls)
+
+
+class UiEventQueue:
+    """
+    Collect the events of worker threads so that the user interface thread can apply them in batches,
+    e.g. from a Tk timer, instead of each worker touching widgets (which Tk does not allow) and forcing
+    a repaint for every message.
+
+    Progress updates are coalesced: only the latest one is kept. Status messages are all kept, up to
+    max_pending; beyond that the oldest are dropped (and counted), so a burst of messages cannot grow
+    the queue without bound while the interface is busy.
+    """
+
+    def __init__(self, max_pending: int = 10000):
+        """
+        Args:
+            max_pending: Most status messages kept between two drains.
+        """
+        self._messages = collections.deque(maxlen=max_pending)
+        self._dropped = 0
+        self._progress = None
+        self._calls = []
+        self._lock = threading.Lock()
+
+    def post_status(self, message: str) -> None:
+        """Queue a status message (from any thread), time-stamped now."""
+        with self._lock:
+            if len(self._messages) == self._messages.maxlen:
+                self._dropped += 1
+            self._messages.append((datetime.datetime.now(), message))
+
+    def post_progress(self, current: int, total: int, message: str = "") -> None:
+        """Queue a progress update (from any thread), replacing any update not applied yet."""
+        with self._lock:
+            self._progress = (current, total, message)
+
+    def post_call(self, function: Callable, *args) -> None:
+        """Queue a function to call on the interface thread (e.g. to show a dialog when a run ends)."""
+        with self._lock:
+            self._calls.append((function, args))
+
+    def drain(self) -> UiEvents:
+        """Take every event posted so far (interface thread)."""
+        with self._lock:
+            events = UiEvents(list(self._messages), self._dropped, self._progress, self._calls)
+            self._messages.clear()
+            self._dropped = 0
+            self._progress = None
+            self._calls = []
+        return events
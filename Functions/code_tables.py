@@ -0,0 +1,317 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# A code table: the label of each known code, the mask applied to the raw value before the lookup (None to use
+# it as is), the label of codes that are not in the table (formatted with {value}; None leaves the cell blank)
+# and the label of missing (NULL) raw values (None leaves the cell blank).
+CodeTable = namedtuple('CodeTable', ['labels', 'mask', 'unknown', 'missing'], defaults=[None, None, None])
+
+_NEW_VALUE = 'New value!: {value} Check source code for meaning!'
+
+# Core page transition types (lowest byte of visits.transition)
+# https://cs.chromium.org/chromium/src/ui/base/page_transition_types.h
+TRANSITION_CORE = CodeTable({
+    0: 'Clicked on a link',
+    1: 'Typed URL',
+    2: 'Clicked on suggestion in the UI',
+    3: 'Auto subframe navigation',
+    4: 'User manual subframe navigation',
+    5: 'User typed text in URL bar, then selected an entry that did not look like a URL',
+    6: 'Top level navigation',
+    7: 'User submitted form data',
+    8: 'User reloaded page (either hitting ENTER in address bar, or hitting reload button',
+    9: 'URL generated from a replaceable keyword other than default search provider',
+    10: 'Corresponds to a visit generated for a keyword.',
+}, mask=0xFF, unknown=_NEW_VALUE)
+
+# Same codes, with the shorter wording used by the History Clusters worksheets
+TRANSITION_CORE_SHORT = CodeTable({
+    0: 'Clicked on a link',
+    1: 'Typed URL',
+    2: 'Clicked on suggestion in the UI',
+    3: 'Auto subframe navigation',
+    4: 'User manual subframe navigation',
+    5: 'User typed text in URL bar, selected non-URL entry',
+    6: 'Top level navigation',
+    7: 'User submitted form data',
+    8: 'User reloaded page',
+    9: 'URL from replaceable keyword (not default search)',
+    10: 'Visit generated for a keyword',
+}, mask=0xFF, unknown='Unknown: {value}')
+
+# Page transition qualifiers (upper bits of visits.transition): mask -> name of the History worksheet column
+TRANSITION_QUALIFIERS = {
+    0x00800000: 'URL Blocked',
+    0x01000000: 'Navigated using Forward/Back button',
+    0x02000000: 'From Address Bar',
+    0x04000000: 'Navigated to the home page.',
+    0x08000000: 'Transaction originated from an external application.',
+    0x10000000: 'Beginning of a navigation chain.',
+    0x20000000: 'Last transition in a redirect chain.',
+    0x40000000: 'Redirects caused by JS.',
+    0x80000000: 'Redirects sent from the server by HTTP headers.',
+    0xC0000000: 'Used to test whether a transition involves a redirect.',  # 'yes' only when both redirect bits are set, as in the original SQL
+}
+
+# Same qualifiers, with the column names used by the History Clusters worksheets
+TRANSITION_QUALIFIERS_SHORT = {
+    0x00800000: 'URL Blocked',
+    0x01000000: 'Forward/Back button',
+    0x02000000: 'From Address Bar',
+    0x04000000: 'Home page navigation',
+    0x08000000: 'From external application',
+    0x10000000: 'Start of redirect chain',
+    0x20000000: 'End of redirect chain',
+    0x40000000: 'JS redirect',
+    0x80000000: 'Server redirect (HTTP header)',
+    0xC0000000: 'Any redirect involved',
+}
+
+# visit_source.source; visits without a visit_source record were browsed locally
+# https://cs.chromium.org/chromium/src/components/history/core/browser/history_types.h
+VISIT_SOURCE = CodeTable({
+    0: 'Synced',
+    1: 'Local',
+    2: 'Extension',
+    3: 'Firefox Imported',
+    4: 'IE Imported',
+    5: 'Safari Imported',
+}, unknown=_NEW_VALUE, missing='Local')
+
+DOWNLOAD_STATE = CodeTable({
+    1: 'Complete',
+    2: 'Interrupted',
+}, unknown=_NEW_VALUE)
+
+# https://source.chromium.org/chromium/chromium/src/+/main:components/download/public/common/download_danger_type.h
+DOWNLOAD_DANGER_TYPE = CodeTable({
+    0: 'Not Dangerous',
+    1: 'Dangerous File',
+    2: 'Dangerous URL',
+    3: 'Dangerous Content',
+    4: 'Maybe Dangerous Content',
+    5: 'Uncommon Content',
+    6: 'User Validated',
+    7: 'Dangerous Host',
+    8: 'Potentially Unwanted',
+    9: 'Allow Listed by Policy',
+    10: 'ASYNC Scanning',
+    11: 'Blocked Password Protected',
+    12: 'Blocked too Large',
+    13: 'Sensitive Content Warning',
+    14: 'Sensitive Content Block',
+    15: 'Deep Scanned Safe',
+    16: 'Deep Scanned Opened Dangerous',
+    17: 'Prompt for Scanning',
+    18: 'Blocked Unsupported',  # Deprecated
+    19: 'Dangerous Account Compromise',
+    20: 'Deep Scanned Failed',
+    21: 'Prompt for Local Password Scanning',
+    22: 'ASYNC Local Password Scanning',
+    23: 'Blocked Scan Failed',
+}, unknown=_NEW_VALUE)
+
+# https://source.chromium.org/chromium/chromium/src/+/main:components/download/public/common/download_interrupt_reason_values.h
+DOWNLOAD_INTERRUPT_REASON = CodeTable({
+    0: 'Not Interrupted',
+    # File errors
+    1: 'File Error',
+    2: 'Access Denied',
+    3: 'Disk Full',
+    5: 'Path Too Long',
+    6: 'File Too Large',
+    7: 'Virus',
+    10: 'Temporary Problem',
+    11: 'Blocked',
+    12: 'File Security Check Failed',
+    13: 'On resume, file too short',
+    14: 'Hash Mismatch',
+    15: 'Source and target of download the same',
+    # Network errors
+    20: 'Network Error',
+    21: 'Operation Timed Out',
+    22: 'Connection Lost',
+    23: 'Server Down',
+    24: 'Network Invalid Request',
+    # Server responses
+    30: 'Server Failed',
+    31: 'Server does not support range requests',
+    32: "Obsolete (shouldn't see this error)",
+    33: 'Unable to get file',
+    34: "Server didn't authorize access",
+    35: 'Server Certificate Problem',
+    36: 'Server access forbidden',
+    37: 'Server Unreachable',
+    38: 'Server content length mismatch',
+    39: 'Server cross origin redirect',
+    # User input
+    40: 'User canceled the download',
+    41: 'User shut down the browser',
+    # Crash
+    50: 'Browser crashed',
+}, unknown=_NEW_VALUE)
+
+# favicons.icon_type
+# https://cs.chromium.org/chromium/src/components/favicon_base/favicon_types.h
+ICON_TYPE = CodeTable({
+    0: 'INVALID',
+    1: 'FAVICON',
+    2: 'TOUCH_ICON',
+    3: 'TOUCH_PRECOMPOSED_ICON',
+    4: 'WEB_MANIFEST_ICON',
+}, unknown=_NEW_VALUE)
+
+# logins.password_type
+# https://source.chromium.org/chromium/chromium/src/+/main:components/password_manager/core/browser/password_manager_metrics_util.h
+PASSWORD_TYPE = CodeTable({
+    0: 'Saved by password manager.',
+    1: 'Will sync if sync is enabled.',
+    2: 'Passwords other than Synced ones.',
+    3: 'Captured from enterprise login page.',
+    4: 'Unknown type.',
+}, unknown='Unknown value. Check Chromium source code!')
+
+# clusters.should_show_on_prominent_ui_surfaces
+PROMINENT = CodeTable({
+    1: 'Yes',
+    0: 'No',
+}, unknown='Unknown: {value}')
+
+# context_annotations.page_end_reason
+# https://source.chromium.org/chromium/chromium/src/+/main:components/page_load_metrics/browser/page_end_reason.h
+PAGE_END_REASON = CodeTable({
+    0: 'END_OTHER',
+    1: 'END_RELOAD',
+    2: 'END_NAVIGATION',
+    3: 'END_STOP',
+    4: 'END_CLOSE',
+    5: 'END_NEW_NAVIGATION',
+}, unknown='Unknown: {value}')
+
+
+def qualifier_table(mask):
+    """
+    Code table of a transition qualifier: 'yes' if all the bits of the mask are set, blank otherwise.
+    :param mask: bit(s) of the qualifier
+    :return: CodeTable
+    """
+    return CodeTable({mask: 'yes'}, mask=mask)
+
+
+def qualifier_columns(raw_column, after, qualifiers):
+    """
+    Entries of CODE_COLUMNS for a series of transition qualifier columns, one after the other.
+    :param raw_column: column holding the raw transition
+    :param after: column after which the first qualifier column is placed
+    :param qualifiers: {mask: decoded column name}
+    :return: list of (raw column, decoded column, code table, after) tuples
+    """
+    entries = []
+    for mask, decoded_column in qualifiers.items():
+        entries.append((raw_column, decoded_column, qualifier_table(mask), after))
+        after = decoded_column
+    return entries
+
+
+# Raw code columns of each worksheet that are decoded after the query is fetched:
+# worksheet -> [(raw column, decoded column, code table, column the decoded column is placed after)]
+CODE_COLUMNS = {
+    'History': [
+        ('source', 'Visit Source', VISIT_SOURCE, 'source'),
+        ('transition', 'Transition Type', TRANSITION_CORE, 'transition'),
+        *qualifier_columns('transition', 'Transition Type', TRANSITION_QUALIFIERS),
+    ],
+    'Shortcuts': [
+        ('transition', 'Transition Type', TRANSITION_CORE, 'transition'),
+    ],
+    'Clusters Overview': [
+        ('prominent (raw)', 'prominent (decoded)', PROMINENT, 'prominent (raw)'),
+    ],
+    'Clusters Contents': [
+        ('transition_core (raw)', 'transition_core (decoded)', TRANSITION_CORE_SHORT, 'transition_core (raw)'),
+        *qualifier_columns('transition (raw)', 'transition_core (decoded)',
+                           {mask: TRANSITION_QUALIFIERS_SHORT[mask]
+                            for mask in (0x01000000, 0x02000000, 0x10000000, 0x20000000)}),
+    ],
+    'Clusters Timeline': [
+        ('prominent (raw)', 'prominent (decoded)', PROMINENT, 'prominent (raw)'),
+    ],
+    'Clusters Comprehensive Export': [
+        ('prominent (raw)', 'prominent (decoded)', PROMINENT, 'prominent (raw)'),
+        ('transition_core (raw)', 'transition_core (decoded)', TRANSITION_CORE_SHORT, 'transition_core (raw)'),
+        *qualifier_columns('transition (raw)', 'transition_core (decoded)', TRANSITION_QUALIFIERS_SHORT),
+        ('page_end_reason (raw)', 'page_end_reason (decoded)', PAGE_END_REASON, 'page_end_reason (raw)'),
+    ],
+    'Downloads': [
+        ('state', 'Decoded state', DOWNLOAD_STATE, 'state'),
+        ('danger_type', 'Decoded danger_type', DOWNLOAD_DANGER_TYPE, 'danger_type'),
+        ('interrupt_reason', 'Decoded interrupt_reason', DOWNLOAD_INTERRUPT_REASON, 'interrupt_reason'),
+    ],
+    'FavIcons': [
+        ('icon_type', 'Icon Type (decoded)', ICON_TYPE, 'icon_type'),
+    ],
+    'Login Data': [
+        ('password_type', 'Decoded password_type', PASSWORD_TYPE, 'password_type'),
+    ],
+}
+
+
+def decode_column(values, table):
+    """
+    Decode a column of raw codes with a code table, as one hash lookup over the whole column.
+    SQLite does not enforce column types, so a raw value may also be text or a BLOB: one that is not a number
+    is shown as a code that is not in the table.
+    :param values: raw codes (Series; integers, or floats when the column has missing values)
+    :param table: CodeTable
+    :return: categorical Series of labels, with the same index as values
+    """
+    present = values.notna().to_numpy()
+    numbers = pd.to_numeric(values, errors='coerce')  # NaN where the value is not a number
+    numeric = present & numbers.notna().to_numpy()
+    if numbers.dtype.kind == 'f':
+        numeric &= np.isfinite(numbers.to_numpy())
+    codes = np.zeros(len(values), dtype=np.int64)
+    codes[numeric] = numbers[numeric].astype(np.int64).to_numpy()
+    if table.mask is not None:
+        codes &= table.mask
+
+    labels = pd.Series(codes, index=values.index).map(table.labels).astype(object)
+    labels[~numeric] = None
+
+    categories = list(dict.fromkeys(table.labels.values()))
+    unknown = numeric & labels.isna().to_numpy()
+    if unknown.any() and table.unknown is not None:
+        unknown_labels = {code: table.unknown.format(value=code) for code in np.unique(codes[unknown])}
+        labels[unknown] = pd.Series(codes[unknown]).map(unknown_labels).to_numpy()
+        categories += [label for label in unknown_labels.values() if label not in categories]
+    not_numbers = present & ~numeric
+    if not_numbers.any() and table.unknown is not None:
+        not_number_labels = [table.unknown.format(value=value) for value in values[not_numbers]]
+        labels[not_numbers] = not_number_labels
+        categories += [label for label in dict.fromkeys(not_number_labels) if label not in categories]
+    labels[~present] = table.missing
+    if table.missing is not None and table.missing not in categories:
+        categories.append(table.missing)
+
+    return labels.astype(pd.CategoricalDtype(categories))
+
+
+def decode_codes(dataframe, worksheet):
+    """
+    Add the decoded code columns of a worksheet (see CODE_COLUMNS) to a dataframe, in place.
+    Raw columns are left untouched; worksheets without code columns, and raw columns the query did not return,
+    are left as they are.
+    :param dataframe: dataframe (or chunk) returned by the worksheet's query
+    :param worksheet: name of the worksheet
+    :return: the dataframe
+    """
+    for raw_column, decoded_column, table, after in CODE_COLUMNS.get(worksheet, []):
+        if raw_column not in dataframe.columns or after not in dataframe.columns \
+                or decoded_column in dataframe.columns:
+            continue
+        position = dataframe.columns.get_loc(after) + 1
+        dataframe.insert(position, decoded_column, decode_column(dataframe[raw_column], table))
+
+    return dataframe
@@ -0,0 +1,52 @@
+import pandas as pd
+
+
+def read_sql_query(sql, conn, chunksize=None):
+    """
+    Read the result of a query into a dataframe, like pd.read_sql_query, except that integer columns with
+    missing (NULL) values are read as nullable Int64 instead of float64. A double cannot hold every 17-digit
+    integer (e.g. WebKit timestamps) exactly, so going through float64 would change the raw values.
+    :param sql: query
+    :param conn: sqlite3 connection
+    :param chunksize: number of rows per dataframe; None reads the whole result into one dataframe
+    :return: dataframe, or iterator over dataframes (at least one, possibly empty) if chunksize is given
+    """
+    if chunksize is not None:
+        return _read_chunks(sql, conn, chunksize)
+
+    cursor = conn.execute(sql)
+    try:
+        return _dataframe(cursor.fetchall(), cursor.description)
+    finally:
+        cursor.close()
+
+
+def _read_chunks(sql, conn, chunksize):
+    """The dataframes of read_sql_query, chunksize rows at a time"""
+    cursor = conn.execute(sql)
+    try:
+        rows = cursor.fetchmany(chunksize)
+        yield _dataframe(rows, cursor.description)  # even if the result is empty, for its columns
+        while rows:
+            rows = cursor.fetchmany(chunksize)
+            if rows:
+                yield _dataframe(rows, cursor.description)
+    finally:
+        cursor.close()
+
+
+def _dataframe(rows, description):
+    """
+    Dataframe of rows fetched from SQLite, with float64 columns that only hold integers and NULLs made Int64.
+    :param rows: list of tuples
+    :param description: cursor.description of the query
+    :return: dataframe
+    """
+    dataframe = pd.DataFrame.from_records(rows, columns=[column[0] for column in description], coerce_float=True)
+    for position in range(dataframe.shape[1]):
+        if dataframe.dtypes.iloc[position].kind != 'f':
+            continue
+        values = [row[position] for row in rows]
+        if not any(isinstance(value, float) for value in values):
+            dataframe.isetitem(position, pd.array(values, dtype='Int64'))
+    return dataframe
@@ -0,0 +1,191 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+# Kinds of raw timestamps
+WEBKIT = 'webkit'  # microseconds since 1601-01-01 00:00:00 UTC (Chromium's base::Time, a.k.a. WebKit/Windows time)
+UNIX = 'unix'  # seconds since 1970-01-01 00:00:00 UTC
+
+WEBKIT_EPOCH_OFFSET = 11644473600  # seconds between 1601-01-01 and 1970-01-01
+_WEBKIT_EPOCH = datetime.datetime(1601, 1, 1)
+
+# Range of datetime64[us] values that can also be represented as a Python datetime (years 1 to 9999)
+_MIN_MICROSECONDS = -62135596800 * 1_000_000
+_MAX_MICROSECONDS = 253402300799 * 1_000_000 + 999_999
+
+# Raw timestamp columns of each worksheet that are decoded after the query is fetched:
+# worksheet -> [(raw column, decoded column, kind[, value shown instead when the raw value is 0])].
+# The decoded column is placed right after the raw one.
+TIMESTAMP_COLUMNS = {
+    'History': [
+        ('visit_time', 'Decoded visit_time (UTC)', WEBKIT),
+        ('last_visit_time', 'Decoded last_visit_time (UTC)', WEBKIT),
+    ],
+    'Clusters Contents': [
+        ('visit_time (raw)', 'visit_time (decoded UTC)', WEBKIT),
+    ],
+    'Clusters Search Term': [
+        ('earliest_visit_time (raw)', 'earliest_visit_time (decoded UTC)', WEBKIT),
+        ('latest_visit_time (raw)', 'latest_visit_time (decoded UTC)', WEBKIT),
+    ],
+    'Clusters Timeline': [
+        ('first_visit_time (raw)', 'first_visit_time (decoded UTC)', WEBKIT),
+        ('last_visit_time (raw)', 'last_visit_time (decoded UTC)', WEBKIT),
+    ],
+    'Clusters Duplicate Visits': [
+        ('canonical_visit_time (raw)', 'canonical_visit_time (decoded UTC)', WEBKIT),
+        ('duplicate_visit_time (raw)', 'duplicate_visit_time (decoded UTC)', WEBKIT),
+    ],
+    'Clusters Comprehensive Export': [
+        ('visit_time (raw)', 'visit_time (decoded UTC)', WEBKIT),
+    ],
+    'Search Terms': [
+        ('last_visit_time', 'Decoded history.last_visit_time (UTC)', WEBKIT),
+    ],
+    'Keywords': [
+        ('date_created', 'Decoded date_created (UTC)', WEBKIT),
+        ('last_modified', 'Decoded last_modified (UTC)', WEBKIT),
+        ('last_visited', 'Decoded last_visited (UTC)', WEBKIT),
+    ],
+    'Credit Cards': [
+        ('use_date', 'Decoded use_date (UTC)', WEBKIT),
+    ],
+    'Bank Accounts': [
+        ('use_date', 'Decoded use_date (UTC)', WEBKIT),
+    ],
+    'Autofill Profile': [
+        ('date_modified', 'Decoded date_modified (UTC)', UNIX),
+        ('use_date', 'Decoded use_date (UTC)', UNIX),
+    ],
+    'Addresses': [
+        ('use_date', 'Decoded use_date (UTC)', UNIX),
+        ('date_modified', 'Decoded date_modified (UTC)', UNIX),
+    ],
+    'Autofill': [
+        ('date_created', 'Decoded date_created (UTC)', UNIX),
+        ('date_last_used', 'Decoded date_last_used (UTC)', UNIX),
+    ],
+    'Downloads': [
+        ('start_time', 'Decoded start_time (UTC)', WEBKIT),
+        ('end_time', 'Decoded end_time (UTC)', WEBKIT, 0),
+        ('last_access_time', 'Decoded last_access_time (UTC)', WEBKIT, 'Not opened via Chrome'),
+    ],
+    'Cookies': [
+        ('creation_utc', 'Decoded creation_utc (UTC)', WEBKIT),
+        ('last_access_utc', 'Decoded last_access_utc (UTC)', WEBKIT),
+        ('last_update_utc', 'Decoded last_update_utc (UTC)', WEBKIT),
+        ('expires_utc', 'Decoded expires_utc(UTC)', WEBKIT),
+    ],
+    'FavIcons': [
+        ('last_updated', 'Decoded last_updated (UTC)', WEBKIT, 0),
+        ('last_requested', 'Decoded last_requested (UTC)', WEBKIT, 0),
+    ],
+    'Login Data': [
+        ('date_created', 'Decoded date_created (UTC)', WEBKIT),
+        ('date_last_used', 'Decoded date_last_used (UTC)', WEBKIT, 'Synced. Not used on this device.'),
+        ('date_password_modified', 'Decoded date_password_modified (UTC)', WEBKIT, 'Never'),
+    ],
+    'Shortcuts': [
+        ('last_access_time', 'Decoded last_access_time (UTC))', WEBKIT),
+    ],
+    'WebAssist': [
+        ('last_visited_time', 'decoded last_visited_time (UTC)', UNIX),
+    ],
+}
+
+
+def webkit_to_datetime(values):
+    """
+    Convert a column of WebKit timestamps (microseconds since 1601-01-01 UTC) to datetime64[us], in one operation.
+    0 (Chromium's "null" time), missing values, text and values out of range become NaT.
+    :param values: raw timestamps (Series, array or list; integers, floats or numeric text)
+    :return: Series of datetime64[us] (naive, UTC), with the same index as values if it is a Series
+    """
+    microseconds, valid = _to_int64(values)
+    valid &= microseconds >= _MIN_MICROSECONDS + WEBKIT_EPOCH_OFFSET * 1_000_000  # cannot wrap around below
+    return _to_datetime(microseconds - WEBKIT_EPOCH_OFFSET * 1_000_000, valid, values)
+
+
+def unix_to_datetime(values):
+    """
+    Convert a column of Unix timestamps (seconds since 1970-01-01 UTC) to datetime64[us], in one operation.
+    0, missing values, text and values out of range become NaT.
+    :param values: raw timestamps (Series, array or list; integers, floats or numeric text)
+    :return: Series of datetime64[us] (naive, UTC), with the same index as values if it is a Series
+    """
+    seconds, valid = _to_int64(values)
+    valid &= np.abs(seconds) <= _MAX_MICROSECONDS // 1_000_000  # so that the multiplication cannot overflow
+    return _to_datetime(np.where(valid, seconds, 0) * 1_000_000, valid, values)
+
+
+def webkit_timestamp_to_datetime(webkit_timestamp):
+    """
+    Convert a single WebKit timestamp to a datetime, using integer arithmetic so that no microseconds are lost.
+    :param webkit_timestamp: microseconds since 1601-01-01 UTC (int or numeric text)
+    :return: naive datetime (UTC)
+    """
+    return _WEBKIT_EPOCH + datetime.timedelta(microseconds=int(webkit_timestamp))
+
+
+def decode_timestamps(dataframe, worksheet):
+    """
+    Add the decoded timestamp columns of a worksheet (see TIMESTAMP_COLUMNS) to a dataframe, in place.
+    Each decoded column is inserted right after its raw column, which is left untouched.
+    Worksheets without timestamp columns, and raw columns the query did not return, are left as they are.
+    :param dataframe: dataframe (or chunk) returned by the worksheet's query
+    :param worksheet: name of the worksheet
+    :return: the dataframe
+    """
+    for raw_column, decoded_column, kind, *when_zero in TIMESTAMP_COLUMNS.get(worksheet, []):
+        if raw_column not in dataframe.columns or decoded_column in dataframe.columns:
+            continue
+        decode = webkit_to_datetime if kind == WEBKIT else unix_to_datetime
+        decoded = decode(dataframe[raw_column])
+        if when_zero:
+            # a missing raw value (NA in an Int64 column) is not 0: its decoded value stays empty
+            decoded = decoded.astype(object).where(dataframe[raw_column].ne(0).fillna(True), when_zero[0])
+        position = dataframe.columns.get_loc(raw_column) + 1
+        dataframe.insert(position, decoded_column, decoded)
+
+    return dataframe
+
+
+def _to_int64(values):
+    """
+    Convert raw timestamps to int64 without going through floating point when they are integers
+    (WebKit timestamps need 17 digits, more than a double can hold exactly).
+    :param values: raw timestamps
+    :return: (int64 array, boolean array of the values that are valid, non-zero numbers)
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+
+    if pd.api.types.is_extension_array_dtype(series.dtype) and series.dtype.kind in 'iu':  # e.g. Int64
+        numbers = series.fillna(0).to_numpy(dtype=np.int64)
+        return numbers, numbers != 0
+
+    if series.dtype.kind in 'iu':
+        numbers = series.to_numpy(dtype=np.int64)
+        return numbers, numbers != 0
+
+    if series.dtype.kind == 'f':
+        floats = series.to_numpy(dtype=np.float64)
+        valid = np.isfinite(floats) & (np.abs(floats) <= np.iinfo(np.int64).max / 2)
+        numbers = np.where(valid, floats, 0).round().astype(np.int64)
+        return numbers, valid & (numbers != 0)
+
+    # Object column: integers, numeric text (e.g. JSON values) or anything else
+    text = series.astype(str).str.strip()
+    valid = text.str.fullmatch(r'-?\d{1,18}').fillna(False).to_numpy(dtype=bool)
+    numbers = np.zeros(len(series), dtype=np.int64)
+    numbers[valid] = text[valid].to_numpy(dtype=str).astype(np.int64)
+    return numbers, valid & (numbers != 0)
+
+
+def _to_datetime(microseconds, valid, values):
+    """Build the datetime64[us] Series from microseconds since 1970-01-01, with NaT where not valid."""
+    valid = valid & (microseconds >= _MIN_MICROSECONDS) & (microseconds <= _MAX_MICROSECONDS)
+    decoded = np.where(valid, microseconds, 0).astype('datetime64[us]')
+    decoded[~valid] = np.datetime64('NaT')
+    index = values.index if isinstance(values, pd.Series) else None
+    return pd.Series(decoded, index=index)
@@ -1,6 +1,45 @@
 import os.path
+import re
+
 import pandas as pd
 
+
+# Control characters that are illegal in XML (and therefore in xlsx). openpyxl raises IllegalCharacterError
+# if any cell contains bytes 0x00-0x08, 0x0B, 0x0C, or 0x0E-0x1F. These can appear in free-text fields pulled
+# from SQLite (e.g. content_annotations.related_searches, search_terms). Tabs (0x09), newlines (0x0A) and
+# carriage returns (0x0D) are valid in XML and are kept.
+ILLEGAL_CHARACTERS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def sanitize_dataframe(dataframe):
+    """
+    Strip control characters that are illegal in XML (and therefore in xlsx) from the dataframe, in place.
+
+    Only string (object) columns are looked at, by position (column names can repeat). Each column's strings
+    are first scanned all at once; only the cells of the columns that do have illegal characters are rewritten,
+    so the cost stays low when, as usual, there are none. Safe to call on each chunk of a streamed worksheet.
+    :param dataframe: dataframe to sanitize
+    :return: the sanitized dataframe
+    """
+    for position in range(dataframe.shape[1]):
+        column = dataframe.iloc[:, position]
+        if column.dtype != object:
+            continue
+
+        values = column.tolist()
+        strings = [value for value in values if type(value) is str]
+        # One regex scan over the whole column (newline is legal, so it cannot create a false match)
+        if not strings or not ILLEGAL_CHARACTERS.search('\n'.join(strings)):
+            continue
+
+        for i, value in enumerate(values):
+            if type(value) is str and ILLEGAL_CHARACTERS.search(value):
+                values[i] = ILLEGAL_CHARACTERS.sub('', value)
+        dataframe.isetitem(position, pd.Series(values, index=column.index, dtype=object))
+
+    return dataframe
+
+
 def write_excel(dataframe, worksheet_name, excel_file):
     """
     Write the dataframe to an Excel file
@@ -13,18 +52,7 @@ def write_excel(dataframe, worksheet_name, excel_file):
     white = f'\033[00m'
     green = f'\033[92m'
 
-    # Sanitize control characters that are illegal in XML (and therefore in xlsx).
-    # openpyxl raises IllegalCharacterError if any cell contains bytes 0x00-0x08,
-    # 0x0B, 0x0C, or 0x0E-0x1F.  These can appear in free-text fields pulled from
-    # SQLite (e.g. content_annotations.related_searches, search_terms).
-    # This strips them while preserving tabs (0x09), newlines (0x0A), and
-    # carriage returns (0x0D) which are valid in XML.
-    # Only applied to string (object) columns to avoid disrupting numeric dtypes.
-    str_cols = dataframe.select_dtypes(include=['object']).columns
-    if len(str_cols) > 0:
-        dataframe[str_cols] = dataframe[str_cols].replace(
-            {r'[\x00-\x08\x0b\x0c\x0e-\x1f]': ''}, regex=True
-        )
+    sanitize_dataframe(dataframe)
 
     if os.path.isfile(excel_file):  # if the Excel file already exists
         # Append to existing Excel file
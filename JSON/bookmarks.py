@@ -1,19 +1,8 @@
 import json
 import pandas as pd
-import tkinter as tk
-from tkinter import filedialog
-from datetime import datetime, timedelta
+from Functions.timestamps import webkit_to_datetime
 from Functions.write_to_excel import write_excel
 
-def convert_webkit_timestamp(webkit_timestamp):
-    # WebKit timestamp is in microseconds since January 1, 1601
-    base_date = datetime(1601, 1, 1)
-    # Convert WebKit time (microseconds) to seconds
-    timestamp_in_seconds = webkit_timestamp / 1_000_000
-    # Add to base date
-    human_readable_date = base_date + timedelta(seconds=timestamp_in_seconds)
-    return human_readable_date
-
 def get_chromium_bookmarks(bookmark_path):
     rows = []
     if "Bookmarks.bak" in bookmark_path:
@@ -30,36 +19,26 @@ def get_chromium_bookmarks(bookmark_path):
         items = folder.get("children", [])
         for item in items:
             if item.get("type") == "folder":
-                date_last_used = convert_webkit_timestamp(int(item.get('date_last_used'))) \
-                    if int(item.get('date_last_used')) > 0 else ""
                 rows.append([worksheet,
                              'folder',
                              fpath,
                              int(item.get('id')),
                              item.get('name'),
                              item.get('date_added'),
-                             convert_webkit_timestamp(int(item.get('date_added'))),
                              item.get('date_last_used'),
-                             date_last_used,
                              item.get('date_modified'),
-                             convert_webkit_timestamp(int(item.get('date_modified'))),
                              ''
                     ])
 
                 parse_bookmark_folder(item, fpath + "/" + item.get('name'),  level + 1)
             elif item.get("type") == "url":
-                date_last_used = convert_webkit_timestamp(int(item.get('date_last_used'))) \
-                    if int(item.get('date_last_used')) > 0 else ""
                 rows.append([worksheet,
                              'url',
                              fpath,
                              int(item.get('id')),
                              item.get('name'),
                              item.get('date_added'),
-                             convert_webkit_timestamp(int(item.get('date_added'))),
                              item.get('date_last_used'),
-                             date_last_used,
-                             '',
                              '',
                              item.get('url')
                     ])
@@ -70,14 +49,22 @@ def get_chromium_bookmarks(bookmark_path):
     for root_key, root_folder in roots.items():
         parse_bookmark_folder(root_folder, root_key, 0)
 
-    bookmarks = pd.DataFrame(rows)
-    bookmarks.columns = ['Source','Type', 'Folder Path', 'ID', 'Name', 'Date added', 'Converted Date added (UTC)',
-                         'Date last used', 'Converted Date last used (UTC)', 'Date Modified (folders only)',
-                         'Converted Date Modified (UTC)','URL']
+    bookmarks = pd.DataFrame(rows, columns=['Source','Type', 'Folder Path', 'ID', 'Name', 'Date added',
+                                            'Date last used', 'Date Modified (folders only)', 'URL'])
+    # WebKit timestamps (stored as text in the JSON) are converted for the whole column at once,
+    # next to their raw value. 0 (e.g. never used) is left blank.
+    for raw_column, converted_column in (('Date added', 'Converted Date added (UTC)'),
+                                         ('Date last used', 'Converted Date last used (UTC)'),
+                                         ('Date Modified (folders only)', 'Converted Date Modified (UTC)')):
+        bookmarks.insert(bookmarks.columns.get_loc(raw_column) + 1, converted_column,
+                         webkit_to_datetime(bookmarks[raw_column]))
     bookmarks.sort_values(['Folder Path','Type'], ascending=[True, True], inplace=True)
     return bookmarks, worksheet
 
 if __name__ == '__main__':
+    import tkinter as tk
+    from tkinter import filedialog
+
     red = f'\033[91m'
     white = f'\033[00m'
     green = f'\033[92m'
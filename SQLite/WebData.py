@@ -17,10 +17,8 @@ def chrome_autofill():
         SELECT name AS "Name",
             value AS "User Input",
             count AS "# of times used",
-            date_created,
-            datetime(date_created,'unixepoch') AS 'Decoded date_created (UTC)',
+            date_created, /* timestamps are decoded after the query runs, see Functions/timestamps.py */
             date_last_used,
-            datetime(date_last_used,'unixepoch') AS 'Decoded date_last_used (UTC)',
             count AS "Count"
 
         FROM autofill
@@ -58,21 +56,9 @@ def chrome_keywords():
                 short_name,
                 keyword,
                 url,
-                date_created,
-                CASE date_created
-                    WHEN 0 THEN ""
-                    ELSE datetime(date_created/1000000-11644473600,'unixepoch')
-                END	AS "Decoded date_created (UTC)",
+                date_created, /* timestamps are decoded after the query runs, see Functions/timestamps.py */
                 keywords.last_modified,
-                CASE last_modified
-                    WHEN 0 THEN ""
-                    ELSE datetime(last_modified/1000000-11644473600,'unixepoch')
-                END AS "Decoded last_modified (UTC)",
-                keywords.last_visited,
-                CASE last_visited
-                    WHEN 0 THEN ""
-                    ELSE datetime(last_visited/1000000-11644473600,'unixepoch')
-                END AS "Decoded last_visited (UTC)"
+                keywords.last_visited
             
         FROM keywords
     """
@@ -101,8 +87,7 @@ def chrome_masked_credit_cards():
                         mcc.exp_month,
                         mcc.exp_year,
                         scm.use_count,
-                        scm.use_date,
-                        DATETIME(scm.use_date/1000000-11644473600,'unixepoch') AS "Decoded use_date (UTC)",
+                        scm.use_date, /* decoded after the query runs, see Functions/timestamps.py */
                         scm.billing_address_id AS "Billing Address ID",
                         mcc.bank_name,
                         mcc.nickname,
@@ -142,8 +127,7 @@ def chrome_masked_bank_accounts():
                 mba.account_type AS "Account Type",
                 mba.nickname,
 				mbam.use_count,
-				mbam.use_date,
-				DATETIME(mbam.use_date/1000000-11644473600,'unixepoch') AS "Decoded use_date (UTC)"
+				mbam.use_date /* decoded after the query runs, see Functions/timestamps.py */
 
         FROM masked_bank_accounts AS mba
 		LEFT JOIN masked_bank_accounts_metadata AS mbam ON mba.instrument_id == mbam.instrument_id 
@@ -198,9 +182,8 @@ def autofill_profile():
         
         SELECT use_count,
             origin,
-            date_modified,
-            datetime(date_modified,'unixepoch') AS 'Decoded date_modified (UTC)',
-            use_date,  datetime(use_date,'unixepoch') AS 'Decoded use_date (UTC)',
+            date_modified, /* timestamps are decoded after the query runs, see Functions/timestamps.py */
+            use_date,
             autofill_profiles.guid,
             full_name,
             first_name,
@@ -245,10 +228,8 @@ def chrome_addresses():
                         atk_zip.value AS "Zip/Postal Code",
                         atk_country.value AS "Country",
                         addresses.use_count, 
-                        addresses.use_date,
-                        DATETIME(addresses.use_date,'unixepoch') AS "Decoded use_date (UTC)",
-                        addresses.date_modified,
-                        DATETIME(addresses.date_modified,'unixepoch') AS "Decoded date_modified (UTC)"
+                        addresses.use_date, /* timestamps are decoded after the query runs, see Functions/timestamps.py */
+                        addresses.date_modified
                 FROM addresses
                 LEFT JOIN (SELECT * FROM address_type_tokens WHERE type == 3 ) AS atk_first_name ON addresses.guid == atk_first_name.guid
                 LEFT JOIN (SELECT * FROM address_type_tokens WHERE type == 5 ) AS atk_last_name ON addresses.guid == atk_last_name.guid
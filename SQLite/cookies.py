@@ -21,16 +21,10 @@ def chrome_cookies():
          SELECT	name,
                 host_key,
                 creation_utc,
-                datetime(creation_utc/1000000-11644473600,'unixepoch') AS 'Decoded creation_utc (UTC)',
                 last_access_utc,
-                datetime(last_access_utc/1000000-11644473600,'unixepoch') AS 'Decoded last_access_utc (UTC)',
                 last_update_utc,
-                datetime(last_update_utc/1000000-11644473600,'unixepoch') AS 'Decoded last_update_utc (UTC)',
-                expires_utc,
-                CASE expires_utc
-                    WHEN 0 then ""
-                    ELSE datetime(expires_utc/1000000-11644473600,'unixepoch')
-                END  AS 'Decoded expires_utc(UTC)'
+                expires_utc
+                /* Timestamps are decoded after the query runs, see Functions/timestamps.py */
                 
         FROM cookies   
     """
@@ -24,20 +24,10 @@ def chrome_downloads():
                 target_path,
                 received_bytes,
                 total_bytes,
+                /* Timestamps are decoded after the query runs, see Functions/timestamps.py */
                 start_time, 
-                datetime(start_time/1000000-11644473600,'unixepoch') AS "Decoded start_time (UTC)", 
-                
                 end_time,
-                CASE
-                   WHEN end_time>0 THEN datetime(end_time/1000000-11644473600,'unixepoch')
-                   ELSE 0
-                END AS "Decoded end_time (UTC)",
-                
                 last_access_time,
-                CASE 
-                   WHEN last_access_time>0 THEN datetime(last_access_time/1000000-11644473600,'unixepoch')
-                   ELSE 'Not opened via Chrome'
-                END AS "Decoded last_access_time (UTC)",
                 
                 last_modified, 
                 referrer,
@@ -45,87 +35,10 @@ def chrome_downloads():
                 tab_url, 
                 tab_referrer_url,
                 
+                /* Codes are decoded after the query runs, see Functions/code_tables.py */
                 state,
-                CASE state 
-                   WHEN 1 THEN "Complete" 
-                   WHEN 2 THEN "Interrupted"
-                   ELSE "New value!: "||state||" Check source code for meaning!"
-                END AS "Decoded state",
-                
                 danger_type,
-                /* see https://source.chromium.org/chromium/chromium/src/+/main:components/download/public/common/download_danger_type.h?q=danger_type */
-                CASE danger_type
-                    WHEN 0 THEN "Not Dangerous"
-                    WHEN 1 THEN "Dangerous File"
-                    WHEN 2 THEN "Dangerous URL"
-                    WHEN 3 THEN "Dangerous Content"
-                    WHEN 4 THEN "Maybe Dangerous Content"
-                    WHEN 5 THEN "Uncommon Content"
-                    WHEN 6 THEN "User Validated"
-                    WHEN 7 THEN "Dangerous Host"
-                    WHEN 8 THEN "Potentially Unwanted"
-                    WHEN 9 THEN "Allow Listed by Policy"
-                    WHEN 10 THEN "ASYNC Scanning"
-                    WHEN 11 THEN "Blocked Password Protected"
-                    WHEN 12 THEN "Blocked too Large"
-                    WHEN 13 THEN "Sensitive Content Warning"
-                    WHEN 14 THEN "Sensitive Content Block"
-                    WHEN 15 THEN "Deep Scanned Safe"
-                    WHEN 16 THEN "Deep Scanned Opened Dangerous"
-                    WHEN 17 THEN "Prompt for Scanning"
-                    WHEN 18 THEN "Blocked Unsupported" /* Deprecated */
-                    WHEN 19 THEN "Dangerous Account Compromise"
-                    WHEN 20 THEN "Deep Scanned Failed"
-                    WHEN 21 THEN "Prompt for Local Password Scanning"
-                    WHEN 22 THEN "ASYNC Local Password Scanning"
-                    WHEN 23 THEN "Blocked Scan Failed"
-                ELSE "New value!: "||danger_type||" Check source code for meaning!"
-                END AS "Decoded danger_type",
-                
                 interrupt_reason,
-                /* 
-                see https://source.chromium.org/chromium/chromium/src/+/main:components/download/public/common/download_interrupt_reason_values.h
-                for interrupt reasons
-                */
-                CASE interrupt_reason
-                   WHEN 0 THEN "Not Interrupted"
-                   /* File errors */
-                   WHEN 1 THEN "File Error"
-                   WHEN 2 THEN "Access Denied"
-                   WHEN 3 THEN "Disk Full"
-                   WHEN 5 THEN "Path Too Long"
-                   WHEN 6 THEN "File Too Large"
-                   WHEN 7 THEN "Virus"
-                   WHEN 10 THEN "Temporary Problem"
-                   WHEN  11 THEN "Blocked"
-                   WHEN 12 THEN "File Security Check Failed"
-                   WHEN 13 THEN "On resume, file too short"
-                   WHEN 14 THEN "Hash Mismatch"
-                   WHEN 15 THEN "Source and target of download the same"
-                   /* Network Errors */
-                   WHEN 20 THEN "Network Error"
-                   WHEN 21 THEN "Operation Timed Out"
-                   WHEN 22 THEN "Connection Lost"
-                   WHEN 23 THEN "Server Down"
-                   WHEN 24 THEN "Network Invalid Request"
-                   /* Server Responses */
-                   WHEN 30 THEN "Server Failed"
-                   WHEN 31 THEN "Server does not support range requests"
-                   WHEN 32 THEN "Obsolete (shouldn't see this error)"
-                   WHEN 33 THEN "Unable to get file"
-                   WHEN 34 THEN "Server didn't authorize access"
-                   WHEN 35 THEN "Server Certificate Problem"
-                   When 36 THEN "Server access forbidden"
-                   WHEN 37 THEN "Server Unreachable"
-                   WHEN 38 THEN "Server content length mismatch"
-                   WHEN 39 THEN "Server cross origin redirect"
-                   /* User input */
-                   WHEN 40 THEN "User canceled the download"
-                   WHEN 41 THEN "User shut down the browser"
-                   /* Crash */
-                   WHEN 50 THEN "Browser crashed"
-                   ELSE "New value!: "||interrupt_reason||" Check source code for meaning!"
-                END AS "Decoded interrupt_reason",
                 
                 chains.url AS "Download Source"
 
@@ -19,8 +19,10 @@ def chrome_favicons():
             https://cs.chromium.org/chromium/src/components/favicon_base/favicon_types.h?q=icon_type&g=0&l=86 
             lines 142-171
             
-            If you run this from within DB Browser for SQLite, you can double click on a BLOB for the image_data and 
-            select "Image" mode in the lower right pane to see the image of the favicon.
+            The images (favicon_bitmaps.image_data) are not selected: the parser reads each one by its bitmap id and 
+            writes it to a folder next to the output, named after its SHA-256 (see Classes/FaviconStore.py). 
+            If you run this from within DB Browser for SQLite, you can add favicon_bitmaps.image_data to the SELECT, 
+            double click on a BLOB and select "Image" mode in the lower right pane to see the image of the favicon.
             */
             
             /*
@@ -38,35 +40,14 @@ def chrome_favicons():
 					icon_mapping.id AS 'icon_mapping.id',
 					icon_mapping.page_url AS 'page URL', 
 					favicons.url  AS 'favicon URL', 
-					favicon_bitmaps.image_data, 
+					favicon_bitmaps.id AS 'bitmap id', 
+					length(favicon_bitmaps.image_data) AS 'image size', 
 					(favicon_bitmaps.height || " X " || favicon_bitmaps.width) AS "icon dimensions", 
-					favicons.icon_type,
-                    
-                    /* REF: 
-                    https://source.chromium.org/chromium/chromium/src/+/main:out/android-Debug/gen/components/favicon/
-                    android/java/generated_java/input_srcjars/org/chromium/components/favicon/IconType.java?
-                    q=touch_precomposed_icon&ss=chromium
-                    */ 
-                    CASE favicons.icon_type 
-                        WHEN 0 THEN "INVALID" 
-                        WHEN 1 THEN "FAVICON" 
-                        WHEN 2 THEN "TOUCH_ICON" 
-                        WHEN 3 THEN "TOUCH_PRECOMPOSED_ICON" 
-                        WHEN 4 THEN "WEB_MANIFEST_ICON" 
-                        ELSE "New value!: "||favicons.icon_type||" Check source code for meaning!" 
-                    END AS "Icon Type (decoded)",
+					favicons.icon_type, /* decoded after the query runs, see Functions/code_tables.py */
             
+                    /* Timestamps are decoded after the query runs, see Functions/timestamps.py */
                     favicon_bitmaps.last_updated, 
-                    CASE favicon_bitmaps.last_updated
-                        WHEN 0 THEN 0
-                        ELSE datetime(favicon_bitmaps.last_updated/1000000-11644473600,'unixepoch') 
-                    END AS 'Decoded last_updated (UTC)',
-                    
-                    favicon_bitmaps.last_requested,
-                    CASE favicon_bitmaps.last_requested
-                        WHEN 0 THEN 0
-                        ELSE datetime(favicon_bitmaps.last_requested/1000000-11644473600,'unixepoch')
-                    END AS 'Decoded last_requested (UTC)'
+                    favicon_bitmaps.last_requested
             
             FROM 	icon_mapping
                     LEFT JOIN favicons ON favicons.id == icon_mapping.icon_id
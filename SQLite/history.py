@@ -49,102 +49,17 @@ def chrome_history():
             urls.visit_count AS 'visit_count',
             urls.typed_count AS 'typed_count',
     
-            visit_source.source,
-            /* Checking if activity is locally browsed, synced, or otherwise */
-            CASE ifnull(visit_source.source,1)
-                WHEN 0 THEN 'Synced'
-                WHEN 1 OR visit_source.source IS NULL THEN 'Local'
-                WHEN 2 THEN 'Extension'
-                WHEN 3 THEN 'Firefox Imported'
-                WHEN 4 THEN 'IE Imported'
-                WHEN 5 THEN 'Safari Imported'
-                ELSE 'New value!: '||visit_source.source||' Check source code for meaning!'
-            END AS 'Visit Source',
-    
-            transition, 
-            /* Checking the value of the right most byte of the four byte transition value and decoding it */
-            CASE (transition&0xff)
-                WHEN 0 THEN 'Clicked on a link'
-                    WHEN 1 THEN 'Typed URL'
-                    WHEN 2 THEN 'Clicked on suggestion in the UI'
-                    WHEN 3 THEN 'Auto subframe navigation'
-                    WHEN 4 THEN 'User manual subframe navigation'
-                    WHEN 5 THEN 'User typed text in URL bar, then selected an entry that did not look like a URL'
-                    WHEN 6 THEN 'Top level navigation'
-                    WHEN 7 THEN 'User submitted form data'
-                    WHEN 8 THEN 'User reloaded page (either hitting ENTER in address bar, or hitting reload button'
-                    WHEN 9 THEN 'URL generated from a replaceable keyword other than default search provider'
-                    WHEN 10 THEN 'Corresponds to a visit generated for a keyword.'
-                    ELSE 'New value!: '||transition&0xff||' Check source code for meaning!'
-            END AS 'Transition Type',
-    
-            /* Next series of CASE statements checks the three left bytes of the four byte transition value in the transition value to see what qualifiers apply */
-    
-            CASE (transition&0x00800000) /* Applies mask to isolate 24th bit from the right */
-                WHEN 0x00800000 THEN 'yes' /* bit is set */
-            END AS 'URL Blocked',
-    
-            CASE (transition&0x01000000) /* Applies mask to isolate 25th bit from the right */
-                WHEN 0x01000000 THEN 'yes'  /*bit is set */
-            END AS 'Navigated using Forward/Back button',
-    
-            CASE (transition&0x02000000) /* Applies mask to isolate 26th bit from the right */
-                WHEN 0x02000000 THEN 'yes' /* bit is set */
-            END AS 'From Address Bar',
-    
-            CASE (transition&0x04000000) /* Applies mask to isolate 27th bit from the right */
-                WHEN 0x04000000 THEN 'yes' /* bit is set */
-            END AS 'Navigated to the home page.',
-    
-            CASE (transition&0x08000000) /* Applies mask to isolate 28th bit from the right */
-                WHEN 0x08000000 THEN 'yes' /* bit is set */
-            END AS 'Transaction originated from an external application.',
-    
-            CASE (transition&0x10000000) /* Applies mask to isolate 29th bit from the right */
-                WHEN 0x10000000 THEN 'yes' /* bit is set */
-            END AS 'Beginning of a navigation chain.',
-    
-            CASE (transition&0x20000000) /* Applies mask to isolate 30th bit from the right */
-                WHEN 0x20000000 THEN 'yes' /* bit is set */
-            END AS 'Last transition in a redirect chain.',
-    
-            CASE (transition&0x40000000) /* Applies mas to isolate 31st bit from the right */
-                WHEN 0x40000000 THEN 'yes' /* bit is set */
-            END AS 'Redirects caused by JS.',
-    
-            CASE (transition&0x80000000) /* Applies mask to isolate 32nd bit from the right */
-                WHEN 0x80000000 THEN 'yes' /* bit is set */
-            END AS 'Redirects sent from the server by HTTP headers.',
-    
-            /*  This one is redundant to some extent.  It's checking both previous bits to see if any redirect is involved.
-                  We could omit this check since the previous two checks are more verbose.
-                  The value of using this check is if you want to customize the query with a WHERE statement to look for
-                  all redirects (or exclude all redirects for example).
-    
-                  It's included in the statement because it's noted in the source code.  Chrome developers must
-                  use this as a shortcut to check for redirects rather than individually checking bits 31 & 32.
-    
-                  Included in the statement for the sake of consistency with what was noted in the source code.
-            */
-            CASE (transition&0xC0000000) /* Applies mask to isolate bits 31-32 from the right */
-                WHEN 0xC0000000 THEN 'yes' /* bits are set */
-            END AS 'Used to test whether a transition involves a redirect.',
+            /* Codes are decoded after the query runs, see Functions/code_tables.py */
+            visit_source.source, /* checking if activity is locally browsed, synced, or otherwise */
+
+            transition, /* core transition type (right most byte) and qualifiers (three left bytes) */
     
-            visit_time,
-            CASE /*added CASE check to 2019-12 version of the query*/
-                WHEN visit_time is NULL THEN NULL
-                ELSE datetime(visit_time/1000000-11644473600,'unixepoch') 
-            END AS 'Decoded visit_time (UTC)',
+            visit_time, /* decoded after the query runs, see Functions/timestamps.py */
     
             CASE last_visit_time
                 WHEN 0 THEN NULL
                 ELSE last_visit_time
-            END AS "last_visit_time",
-    
-            CASE last_visit_time
-                WHEN 0 THEN NULL
-                ELSE datetime(last_visit_time/1000000-11644473600,'unixepoch')
-            END AS 'Decoded last_visit_time (UTC)',
+            END AS "last_visit_time", /* decoded after the query runs, see Functions/timestamps.py */
     
             segments.name AS 'Segment',
     
@@ -346,8 +261,8 @@ def chrome_history_clusters_contents():
         --              relevance score (most important visits first).
         --
         -- Timestamp:   Chrome/WebKit epoch (microseconds since 1601-01-01 UTC).
-        --              Raw value preserved; decoded via:
-        --                datetime(value / 1000000 - 11644473600, 'unixepoch')
+        --              Raw value preserved; decoded after the query runs
+        --              (see Functions/timestamps.py), with microsecond precision.
         --
         -- Best practice: Raw values are displayed alongside decoded values so that
         --                an independent party can verify the decoding.
@@ -369,11 +284,6 @@ def chrome_history_clusters_contents():
         
             -- Raw Chrome timestamp (microseconds since 1601-01-01)
             v.visit_time                                                    AS 'visit_time (raw)',
-            -- Decoded to human-readable UTC
-            CASE
-                WHEN v.visit_time IS NULL THEN NULL
-                ELSE datetime(v.visit_time / 1000000 - 11644473600, 'unixepoch')
-            END                                                             AS 'visit_time (decoded UTC)',
         
             u.url,
             u.title,
@@ -396,38 +306,8 @@ def chrome_history_clusters_contents():
             v.transition                                                    AS 'transition (raw)',
             -- Core transition type (lowest byte)
             v.transition & 0xFF                                             AS 'transition_core (raw)',
-            -- Decoded core transition type
-            CASE (v.transition & 0xFF)
-                WHEN 0 THEN 'Clicked on a link'
-                WHEN 1 THEN 'Typed URL'
-                WHEN 2 THEN 'Clicked on suggestion in the UI'
-                WHEN 3 THEN 'Auto subframe navigation'
-                WHEN 4 THEN 'User manual subframe navigation'
-                WHEN 5 THEN 'User typed text in URL bar, selected non-URL entry'
-                WHEN 6 THEN 'Top level navigation'
-                WHEN 7 THEN 'User submitted form data'
-                WHEN 8 THEN 'User reloaded page'
-                WHEN 9 THEN 'URL from replaceable keyword (not default search)'
-                WHEN 10 THEN 'Visit generated for a keyword'
-                ELSE 'Unknown: ' || (v.transition & 0xFF)
-            END                                                             AS 'transition_core (decoded)',
-        
-            -- Transition qualifier flags (upper bytes)
-            CASE (v.transition & 0x01000000)
-                WHEN 0x01000000 THEN 'yes'
-            END                                                             AS 'Forward/Back button',
-        
-            CASE (v.transition & 0x02000000)
-                WHEN 0x02000000 THEN 'yes'
-            END                                                             AS 'From Address Bar',
-        
-            CASE (v.transition & 0x10000000)
-                WHEN 0x10000000 THEN 'yes'
-            END                                                             AS 'Start of redirect chain',
-        
-            CASE (v.transition & 0x20000000)
-                WHEN 0x20000000 THEN 'yes'
-            END                                                             AS 'End of redirect chain',
+            -- Decoded core transition type and qualifier flags (upper bytes) are added
+            -- after the query runs, see Functions/code_tables.py
         
             v.from_visit
         
@@ -482,8 +362,8 @@ def chrome_history_clusters_search_term():
         --              number of visits and temporal span of the cluster.
         --
         -- Timestamp:   Chrome/WebKit epoch (microseconds since 1601-01-01 UTC).
-        --              Raw value preserved; decoded via:
-        --                datetime(value / 1000000 - 11644473600, 'unixepoch')
+        --              Raw value preserved; decoded after the query runs
+        --              (see Functions/timestamps.py), with microsecond precision.
         --
         -- Best practice: Raw values are displayed alongside decoded values so that
         --                an independent party can verify the decoding.
@@ -514,13 +394,9 @@ def chrome_history_clusters_search_term():
         
             -- Earliest visit in this cluster with this search term (raw)
             MIN(v.visit_time)                                                       AS 'earliest_visit_time (raw)',
-            -- Decoded to UTC
-            datetime(MIN(v.visit_time) / 1000000 - 11644473600, 'unixepoch')       AS 'earliest_visit_time (decoded UTC)',
         
             -- Latest visit in this cluster with this search term (raw)
             MAX(v.visit_time)                                                       AS 'latest_visit_time (raw)',
-            -- Decoded to UTC
-            datetime(MAX(v.visit_time) / 1000000 - 11644473600, 'unixepoch')       AS 'latest_visit_time (decoded UTC)',
         
             -- Span in raw microseconds
             MAX(v.visit_time) - MIN(v.visit_time)                                   AS 'span (raw, microseconds)',
@@ -567,8 +443,8 @@ def chrome_history_clusters_timeline():
         --              session duration, visit count, and unique URL count.
         --
         -- Timestamp:   Chrome/WebKit epoch (microseconds since 1601-01-01 UTC).
-        --              Raw value preserved; decoded via:
-        --                datetime(value / 1000000 - 11644473600, 'unixepoch')
+        --              Raw value preserved; decoded after the query runs
+        --              (see Functions/timestamps.py), with microsecond precision.
         --
         -- Best practice: Raw values are displayed alongside decoded values so that
         --                an independent party can verify the decoding.
@@ -594,13 +470,9 @@ def chrome_history_clusters_timeline():
         
             -- First visit in this cluster: raw Chrome timestamp
             MIN(v.visit_time)                                                       AS 'first_visit_time (raw)',
-            -- First visit: decoded to UTC
-            datetime(MIN(v.visit_time) / 1000000 - 11644473600, 'unixepoch')       AS 'first_visit_time (decoded UTC)',
         
             -- Last visit in this cluster: raw Chrome timestamp
             MAX(v.visit_time)                                                       AS 'last_visit_time (raw)',
-            -- Last visit: decoded to UTC
-            datetime(MAX(v.visit_time) / 1000000 - 11644473600, 'unixepoch')       AS 'last_visit_time (decoded UTC)',
         
             -- Span in raw microseconds
             MAX(v.visit_time) - MIN(v.visit_time)                                   AS 'span (raw, microseconds)',
@@ -650,8 +522,8 @@ def chrome_history_clusters_duplicate_visits():
         --              timestamps.
         --
         -- Timestamp:   Chrome/WebKit epoch (microseconds since 1601-01-01 UTC).
-        --              Raw value preserved; decoded via:
-        --                datetime(value / 1000000 - 11644473600, 'unixepoch')
+        --              Raw value preserved; decoded after the query runs
+        --              (see Functions/timestamps.py), with microsecond precision.
         --
         -- Best practice: Raw values are displayed alongside decoded values so that
         --                an independent party can verify the decoding.
@@ -668,10 +540,6 @@ def chrome_history_clusters_duplicate_visits():
             cvd.visit_id                                                            AS 'canonical_visit_id',
         
             v1.visit_time                                                           AS 'canonical_visit_time (raw)',
-            CASE
-                WHEN v1.visit_time IS NULL THEN NULL
-                ELSE datetime(v1.visit_time / 1000000 - 11644473600, 'unixepoch')
-            END                                                                     AS 'canonical_visit_time (decoded UTC)',
         
             u1.url                                                                  AS 'canonical_url',
             u1.title                                                                AS 'canonical_title',
@@ -680,10 +548,6 @@ def chrome_history_clusters_duplicate_visits():
             cvd.duplicate_visit_id,
         
             v2.visit_time                                                           AS 'duplicate_visit_time (raw)',
-            CASE
-                WHEN v2.visit_time IS NULL THEN NULL
-                ELSE datetime(v2.visit_time / 1000000 - 11644473600, 'unixepoch')
-            END                                                                     AS 'duplicate_visit_time (decoded UTC)',
         
             u2.url                                                                  AS 'duplicate_url',
             u2.title                                                                AS 'duplicate_title',
@@ -731,8 +595,8 @@ def chrome_history_clusters_comprehensive_export():
         -- Output:      One row per cluster-visit pair with all available metadata.
         --
         -- Timestamp:   Chrome/WebKit epoch (microseconds since 1601-01-01 UTC).
-        --              Raw value preserved; decoded via:
-        --                datetime(value / 1000000 - 11644473600, 'unixepoch')
+        --              Raw value preserved; decoded after the query runs
+        --              (see Functions/timestamps.py), with microsecond precision.
         --
         -- Note:        The content_annotations and context_annotations tables were
         --              introduced alongside the cluster tables. They contain per-visit
@@ -772,10 +636,6 @@ def chrome_history_clusters_comprehensive_export():
         
             -- ── Visit timestamp ───────────────────────────────────────────────────
             v.visit_time                                                            AS 'visit_time (raw)',
-            CASE
-                WHEN v.visit_time IS NULL THEN NULL
-                ELSE datetime(v.visit_time / 1000000 - 11644473600, 'unixepoch')
-            END                                                                     AS 'visit_time (decoded UTC)',
         
             -- ── URL and page details ──────────────────────────────────────────────
             u.url,
@@ -806,62 +666,8 @@ def chrome_history_clusters_comprehensive_export():
         
             -- Core transition type (lowest byte, raw)
             v.transition & 0xFF                                                     AS 'transition_core (raw)',
-            -- Core transition type (decoded)
-            CASE (v.transition & 0xFF)
-                WHEN 0 THEN 'Clicked on a link'
-                WHEN 1 THEN 'Typed URL'
-                WHEN 2 THEN 'Clicked on suggestion in the UI'
-                WHEN 3 THEN 'Auto subframe navigation'
-                WHEN 4 THEN 'User manual subframe navigation'
-                WHEN 5 THEN 'User typed text in URL bar, selected non-URL entry'
-                WHEN 6 THEN 'Top level navigation'
-                WHEN 7 THEN 'User submitted form data'
-                WHEN 8 THEN 'User reloaded page'
-                WHEN 9 THEN 'URL from replaceable keyword (not default search)'
-                WHEN 10 THEN 'Visit generated for a keyword'
-                ELSE 'Unknown: ' || (v.transition & 0xFF)
-            END                                                                     AS 'transition_core (decoded)',
-        
-            -- ── Transition qualifier flags (each raw bit + decoded) ───────────────
-            CASE (v.transition & 0x00800000)
-                WHEN 0x00800000 THEN 'yes'
-            END                                                                     AS 'URL Blocked',
-        
-            CASE (v.transition & 0x01000000)
-                WHEN 0x01000000 THEN 'yes'
-            END                                                                     AS 'Forward/Back button',
-        
-            CASE (v.transition & 0x02000000)
-                WHEN 0x02000000 THEN 'yes'
-            END                                                                     AS 'From Address Bar',
-        
-            CASE (v.transition & 0x04000000)
-                WHEN 0x04000000 THEN 'yes'
-            END                                                                     AS 'Home page navigation',
-        
-            CASE (v.transition & 0x08000000)
-                WHEN 0x08000000 THEN 'yes'
-            END                                                                     AS 'From external application',
-        
-            CASE (v.transition & 0x10000000)
-                WHEN 0x10000000 THEN 'yes'
-            END                                                                     AS 'Start of redirect chain',
-        
-            CASE (v.transition & 0x20000000)
-                WHEN 0x20000000 THEN 'yes'
-            END                                                                     AS 'End of redirect chain',
-        
-            CASE (v.transition & 0x40000000)
-                WHEN 0x40000000 THEN 'yes'
-            END                                                                     AS 'JS redirect',
-        
-            CASE (v.transition & 0x80000000)
-                WHEN 0x80000000 THEN 'yes'
-            END                                                                     AS 'Server redirect (HTTP header)',
-        
-            CASE (v.transition & 0xC0000000)
-                WHEN 0xC0000000 THEN 'yes'
-            END                                                                     AS 'Any redirect involved',
+            -- Core transition type (decoded) and qualifier flags are added after the query
+            -- runs, see Functions/code_tables.py
         
             -- ── Content annotations ───────────────────────────────────────────────
             ca.search_normalized_url,
@@ -7,8 +7,7 @@ def chrome_keyword_historyquery():
         keyword_search_terms.url_id, 
         keyword_search_terms.term, 
         urls.visit_count, 
-        urls.last_visit_time, 
-        datetime(urls.last_visit_time/1000000-11644473600,'unixepoch') AS "Decoded history.last_visit_time (UTC)"
+        urls.last_visit_time /* decoded after the query runs, see Functions/timestamps.py */
                     
         FROM urls
         LEFT JOIN keyword_search_terms ON urls.id=keyword_search_terms.url_id
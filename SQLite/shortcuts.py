@@ -28,24 +28,9 @@ def chrome_shortcuts():
         SELECT text,
             url,
             number_of_hits,
-            last_access_time,
-            datetime(last_access_time/1000000-11644473600,'unixepoch') AS "Decoded last_access_time (UTC))",
-    
-            transition,
-            CASE (transition)
-                WHEN 0 THEN "Clicked on a link"
-                WHEN 1 THEN "Typed URL"
-                WHEN 2 THEN "Clicked on suggestion in the UI"
-                WHEN 3 THEN "Auto subframe navigation"
-                WHEN 4 THEN "User manual subframe navigation"
-                WHEN 5 THEN "User typed text in URL bar, then selected an entry that did not look like a URL"
-                WHEN 6 THEN "Top level navigation"
-                WHEN 7 THEN "User submitted form data"
-                WHEN 8 THEN "User reloaded page (either hitting ENTER in address bar, or hitting reload button"
-                WHEN 9 THEN "URL generated from a replaceable keyword other than default search provider"
-                WHEN 10 THEN "Corresponds to a visit generated for a keyword."
-                ELSE "New value!: "||transition&0xff||" Check source code for meaning!"
-            END AS "Transition Type"
+            last_access_time, /* decoded after the query runs, see Functions/timestamps.py */
+    
+            transition /* decoded after the query runs, see Functions/code_tables.py */
     
         FROM omni_box_shortcuts
     """
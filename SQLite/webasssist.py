@@ -14,8 +14,7 @@ def edge_webassist():
                 title,
                 metadata,
                 urldata,
-                last_visited_time,
-                DATETIME(last_visited_time, 'unixepoch') AS "decoded last_visited_time (UTC)",
+                last_visited_time, /* decoded after the query runs, see Functions/timestamps.py */
                 num_visits
         
         FROM navigation_history
@@ -0,0 +1,186 @@
+# Written by Jacques Boucher
+# email: jjrboucher@gmail.com
+#
+# Command line front end of the parser: same engine and output as browser-artifact-parser-GUI.py, without Tk,
+# so that it can be scripted or run on a machine without a display.
+#
+# Examples:
+#   python browser-artifact-parser-CLI.py "C:/Users/me/AppData/Local/Google/Chrome/User Data/Default" out.xlsx
+#   python browser-artifact-parser-CLI.py ./Default out.xlsx --artifacts History Downloads "Login Data" --workers 8
+#   python browser-artifact-parser-CLI.py --user-data "C:/Users/me/AppData/Local/Google/Chrome/User Data" out_folder
+#   python browser-artifact-parser-CLI.py --discover E:/ out_folder
+#   python browser-artifact-parser-CLI.py --list-artifacts
+
+import argparse
+import datetime
+import os
+import signal
+import sys
+import threading
+
+# The engine (and pandas) is only imported once the arguments are checked, so that --help, --list-artifacts
+# and argument errors answer at once
+from Classes.ParserSettings import __version__, ARTIFACTS, MAX_WORKERS, OUTPUT_FORMATS
+
+
+def parse_arguments(argv=None):
+    """
+    Parse the command line.
+    :param argv: arguments (defaults to sys.argv[1:])
+    :return: argparse namespace
+    """
+    parser = argparse.ArgumentParser(
+        description=f'Chromium Browser Parser (version date: {__version__}). '
+                    'Extracts the artifacts of a Chrome/Edge/Opera user profile to one output file.'
+    )
+    parser.add_argument('profile', nargs='?',
+                        help='browser profile folder (e.g. ".../User Data/Default"), '
+                             'the User Data folder with --user-data, or the folder to search with --discover')
+    parser.add_argument('output', nargs='?',
+                        help='output file (overwritten if it exists), or output folder with --user-data/--discover')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('-u', '--user-data', action='store_true',
+                      help='parse every profile of a User Data folder (listed in its Local State file) into '
+                           'one output file per profile, plus an index of the profiles')
+    mode.add_argument('-d', '--discover', action='store_true',
+                      help='search a folder tree (e.g. a mounted image) for the profiles of every Chromium browser '
+                           'and user, and parse each one as it is found into its own output file, plus an index')
+    parser.add_argument('-p', '--processes', type=int, default=None,
+                        help='with --user-data/--discover, number of profiles parsed at the same time '
+                             '(default: number of CPUs)')
+    parser.add_argument('--max-depth', type=int, default=None,
+                        help='with --discover, deepest folder level searched (default: no limit)')
+    parser.add_argument('-a', '--artifacts', nargs='+', metavar='ARTIFACT',
+                        help='artifacts to parse (default: all but Web Assist (Edge)). '
+                             'Names are case insensitive; quote names that contain spaces.')
+    parser.add_argument('--all', action='store_true', help='parse every artifact, including Web Assist (Edge)')
+    parser.add_argument('-f', '--format', choices=list(OUTPUT_FORMATS), default='xlsx',
+                        help='output format (default: %(default)s)')
+    parser.add_argument('-w', '--workers', type=int, default=MAX_WORKERS,
+                        help='number of artifacts processed concurrently (default: %(default)s)')
+    parser.add_argument('--snapshot', action='store_true',
+                        help='load each database into memory and index it first (faster on large profiles)')
+    parser.add_argument('-c', '--cache', metavar='FOLDER',
+                        help='result cache folder (e.g. one per case): artifacts whose input files and code have not '
+                             'changed since a previous run with the same folder are reused instead of parsed again')
+    parser.add_argument('--metrics', metavar='REPORT.json',
+                        help='time each artifact\'s stages (open, query, decode, sanitize, write) and measure its '
+                             'records per second, input size and peak memory: adds Summary columns and writes this '
+                             'JSON run report (slows the run down; single profile only)')
+    parser.add_argument('--trace', metavar='TRACE.txt',
+                        help='diagnostic mode: write the SQL of every artifact query with its elapsed time, SQLite VM '
+                             'steps, rows and EXPLAIN QUERY PLAN (full scans listed) to this file (single profile only)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='only print errors')
+    parser.add_argument('--list-artifacts', action='store_true', help='list the artifact names and exit')
+
+    arguments = parser.parse_args(argv)
+    if not arguments.list_artifacts and (arguments.profile is None or arguments.output is None):
+        parser.error('the profile folder and the output file are required')
+    if arguments.workers < 1:
+        parser.error('--workers must be at least 1')
+    if arguments.processes is not None and arguments.processes < 1:
+        parser.error('--processes must be at least 1')
+    for option in ('metrics', 'trace'):
+        if getattr(arguments, option) and (arguments.user_data or arguments.discover):
+            parser.error(f'--{option} cannot be used with --user-data or --discover')
+    return arguments
+
+
+def selected_artifacts(arguments):
+    """
+    Resolve the artifact names given on the command line (case insensitive) to the engine's names.
+    :param arguments: argparse namespace
+    :return: list of artifact names, or None for the default selection
+    :raises ValueError: if a name is not an artifact
+    """
+    if arguments.all:
+        return list(ARTIFACTS)
+    if not arguments.artifacts:
+        return None
+
+    names = {name.lower(): name for name in ARTIFACTS}
+    unknown = [name for name in arguments.artifacts if name.lower() not in names]
+    if unknown:
+        raise ValueError(f"Unknown artifact(s): {', '.join(unknown)}. Use --list-artifacts to see the names.")
+    return [names[name.lower()] for name in arguments.artifacts]
+
+
+def main(argv=None):
+    arguments = parse_arguments(argv)
+
+    if arguments.list_artifacts:
+        for name, selected in ARTIFACTS.items():
+            print(f'{name}{"" if selected else "  (not selected by default)"}')
+        return 0
+
+    if not os.path.isdir(arguments.profile):
+        print(f'❌ Folder not found: {arguments.profile}', file=sys.stderr)
+        return 2
+
+    # Status messages come from the reader threads and the writer thread at once; print() writes the text and
+    # the newline separately, so each line is printed under the lock to keep lines from running together
+    status_lock = threading.Lock()
+
+    def update_status(message):
+        if not arguments.quiet or message.startswith('❌'):
+            timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+            with status_lock:
+                print(f'[{timestamp}] {message}', file=sys.stderr if message.startswith('❌') else sys.stdout,
+                      flush=True)
+
+    from Classes.ParserEngine import ParserEngine
+    from Classes.ProfileCrawler import ProfileCrawler
+    from Classes.ProfileSweep import ProfileSweep
+
+    try:
+        if arguments.user_data or arguments.discover:
+            sweep = ProfileSweep(
+                arguments.profile,
+                arguments.output,
+                artifacts=selected_artifacts(arguments),
+                output_format=arguments.format,
+                processes=arguments.processes,
+                max_workers=arguments.workers,
+                snapshot=arguments.snapshot,
+                cache_dir=arguments.cache,
+                on_status=update_status
+            )
+            if arguments.discover:
+                crawler = ProfileCrawler(arguments.profile, max_depth=arguments.max_depth)
+                index = sweep.run(crawler.crawl())
+                update_status(f'Searched {crawler.folders_scanned} folders')
+                for folder, error in crawler.errors:
+                    update_status(f'⚠ Could not list {folder}: {error}')
+            else:
+                index = sweep.run()
+            return 0 if (index['Status'] == 'Completed').all() else 1
+
+        engine = ParserEngine(
+            arguments.profile,
+            arguments.output,
+            artifacts=selected_artifacts(arguments),
+            output_format=arguments.format,
+            max_workers=arguments.workers,
+            snapshot=arguments.snapshot,
+            cache_dir=arguments.cache,
+            metrics_file=arguments.metrics,
+            trace_file=arguments.trace,
+            on_status=update_status
+        )
+        # Ctrl+C stops the run as the GUI's Stop button does: queries are interrupted and the output is saved
+        signal.signal(signal.SIGINT, lambda signum, frame: engine.cancel())
+        completed = engine.run()
+        if engine.cancellation.cancelled:
+            return 130
+    except KeyboardInterrupt:
+        print('⚠ Processing was stopped by user.', file=sys.stderr)
+        return 130
+    except Exception as e:
+        print(f'❌ Critical error: {str(e)}', file=sys.stderr)
+        return 1
+
+    return 0 if completed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,38 +10,14 @@
 
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk, font
-from Classes.ChromeExtensions import ChromeExtensions
-from Classes.Preferences import Preferences
-from Functions.write_to_excel import write_excel
-from JSON.bookmarks import get_chromium_bookmarks
-from SQLite.cookies import chrome_cookies
-from SQLite.downloads import chrome_downloads, chrome_downloads_gaps
-from SQLite.favicons import chrome_favicons
-from SQLite.history import (chrome_history, chrome_history_gaps, chrome_history_clusters_overview,
-                            chrome_history_clusters_contents, chrome_history_clusters_search_term,
-                            chrome_history_clusters_timeline, chrome_history_clusters_duplicate_visits,
-                            chrome_history_clusters_comprehensive_export)
-from SQLite.logindata import chrome_login_data, chrome_login_data_gaps
-from SQLite.searchterms import chrome_keyword_historyquery
-from SQLite.shortcuts import chrome_shortcuts
-from SQLite.topsites import chrome_topsites
-from SQLite.WebData import (
-    chrome_autofill,
-    chrome_keywords,
-    chrome_masked_credit_cards,
-    chrome_masked_bank_accounts,
-    chrome_addresses, chrome_loyalty_cards
-)
-from SQLite.webasssist import edge_webassist
-
-import openpyxl
-import pandas as pd
-import sqlite3
-import numpy as np
-import io
+from Classes.ParserSettings import ARTIFACTS, __version__
+from Classes.UiEventQueue import UiEventQueue
+
+import importlib
 import threading
 
-__version__ = '2026-Mar-1'
+EVENT_POLL_MS = 50  # how often the status and progress posted by the engine are shown
+MAX_LOG_LINES = 5000  # lines kept in the status view (the oldest are removed)
 
 class ModernChromeParserGUI:
     def __init__(self, root):
@@ -57,6 +33,11 @@ class ModernChromeParserGUI:
         self.profile_path = None
         self.output_path = None
         self.is_processing = False
+        self.engine = None  # engine of the run in progress
+        self.processing_thread = None
+        # The engine runs on another thread: its status and progress are queued and shown by pump_events
+        self.events = UiEventQueue()
+        self.snapshot_var = tk.BooleanVar(value=False)  # copy databases to memory and index them before querying
 
         # Artifact selection variables
         self.artifact_vars = {}
@@ -64,6 +45,11 @@ class ModernChromeParserGUI:
 
         # Create the main UI
         self.create_widgets()
+        self.pump_events()
+
+        # The engine (pandas, openpyxl, the queries, ...) takes a while to load: load it while the user picks
+        # the folders rather than before the window shows. run_parser waits for it if it is not done yet.
+        threading.Thread(target=self.preload_engine, daemon=True).start()
 
         # Try to set icon (handle gracefully if not found)
         try:
@@ -105,28 +91,8 @@ class ModernChromeParserGUI:
     def setup_artifact_selection(self):
         """Initialize artifact selection options"""
         self.artifacts_config = {
-            'History': {'enabled': True, 'query': 'History'},
-            'History Gaps': {'enabled': True, 'query': 'History Gaps'},
-            'History Clusters': {'enabled': True, 'query': 'History Clusters'},
-            'Downloads': {'enabled': True, 'query': 'Downloads'},
-            'Downloads Gaps': {'enabled': True, 'query': 'Downloads Gaps'},
-            'Autofill': {'enabled': True, 'query': 'Autofill'},
-            'Addresses': {'enabled': True, 'query': 'Addresses'},
-            'Keywords': {'enabled': True, 'query': 'Keywords'},
-            'Credit Cards': {'enabled': True, 'query': 'Credit Cards'},
-            'Bank Accounts': {'enabled': True, 'query': 'Bank Accounts'},
-            'Loyalty Cards': {'enabled': True, 'query': 'Loyalty Cards'},
-            'Login Data': {'enabled': True, 'query': 'Login Data'},
-            'Login Data Gaps': {'enabled': True, 'query': 'Login Data Gaps'},
-            'Shortcuts': {'enabled': True, 'query': 'Shortcuts'},
-            'Top Sites': {'enabled': True, 'query': 'Top Sites'},
-            'Cookies': {'enabled': True, 'query': 'Cookies'},
-            'FavIcons': {'enabled': True, 'query': 'FavIcons'},
-            'Search Terms': {'enabled': True, 'query': 'Search Terms'},
-            'Bookmarks': {'enabled': True, 'query': 'Bookmarks'},
-            'Preferences': {'enabled': True, 'query': 'Preferences'},
-            'Extensions': {'enabled': True, 'query': 'Extensions'},
-            'Web Assist (Edge)': {'enabled': False, 'query': 'Web Assist'}
+            artifact: {'enabled': enabled, 'query': artifact}
+            for artifact, enabled in ARTIFACTS.items()
         }
 
         # Create BooleanVar for each artifact
@@ -246,6 +212,9 @@ class ModernChromeParserGUI:
                    command=self.deselect_all_artifacts,
                    style='Modern.TButton').grid(row=0, column=1)
 
+        ttk.Checkbutton(button_frame, text="⚡ Load databases into memory (faster on large profiles)",
+                        variable=self.snapshot_var).grid(row=0, column=2, padx=(20, 0))
+
     def create_progress_section(self, parent, row):
         """Create the progress bar and action buttons section"""
         # Add a separator line
@@ -332,19 +301,44 @@ class ModernChromeParserGUI:
             var.set(False)
 
     def update_status(self, message):
-        """Update the status text display"""
+        """Add a message to the status display (may be called from any thread)"""
+        self.events.post_status(message)
+
+    def update_progress(self, current, total, message=""):
+        """Update the progress bar and label (may be called from any thread)"""
+        self.events.post_progress(current, total, message)
+
+    def get_timestamp(self, moment=None):
+        """Get timestamp for status messages"""
+        import datetime
+        return (moment or datetime.datetime.now()).strftime("%H:%M:%S")
+
+    def pump_events(self):
+        """Show the status and progress posted since the last call, in one repaint, then check again shortly"""
+        events = self.events.drain()
+        if events.messages or events.dropped:
+            lines = [f"[{self.get_timestamp(moment)}] {message}\n" for moment, message in events.messages]
+            if events.dropped:
+                lines.insert(0, f"[{self.get_timestamp()}] ... {events.dropped} messages not shown\n")
+            self.show_status_lines(lines)
+        if events.progress is not None:
+            self.show_progress(*events.progress)
+        for function, args in events.calls:
+            function(*args)
+
+        self.root.after(EVENT_POLL_MS, self.pump_events)
+
+    def show_status_lines(self, lines):
+        """Append lines to the status text display, keeping only the last MAX_LOG_LINES"""
         self.status_text.config(state="normal")
-        self.status_text.insert(tk.END, f"[{self.get_timestamp()}] {message}\n")
+        self.status_text.insert(tk.END, "".join(lines[-MAX_LOG_LINES:]))
+        line_count = int(self.status_text.index("end-1c").split(".")[0]) - 1
+        if line_count > MAX_LOG_LINES:
+            self.status_text.delete("1.0", f"{line_count - MAX_LOG_LINES + 1}.0")
         self.status_text.see(tk.END)
         self.status_text.config(state="disabled")
-        self.root.update_idletasks()
-
-    def get_timestamp(self):
-        """Get current timestamp for status messages"""
-        import datetime
-        return datetime.datetime.now().strftime("%H:%M:%S")
 
-    def update_progress(self, current, total, message=""):
+    def show_progress(self, current, total, message=""):
         """Update the progress bar and label"""
         if total > 0:
             percentage = (current / total) * 100
@@ -356,7 +350,6 @@ class ModernChromeParserGUI:
         else:
             self.progress_var.set(0)
             self.progress_label.config(text=message or "Ready to process")
-        self.root.update_idletasks()
 
     def browse_profile(self):
         """Open file dialog to select Chrome profile folder"""
@@ -383,8 +376,8 @@ class ModernChromeParserGUI:
 
     def run_parser_threaded(self):
         """Run the parser in a separate thread to prevent UI freezing"""
-        if self.is_processing:
-            return
+        if self.is_processing or (self.processing_thread is not None and self.processing_thread.is_alive()):
+            return  # still running, or still saving what was written before Stop was pressed
 
         # Validate inputs
         self.profile_path = self.profile_entry.get().strip()
@@ -410,298 +403,68 @@ class ModernChromeParserGUI:
         self.processing_thread.start()
 
     def stop_processing(self):
-        """Stop the current processing (note: this is a basic implementation)"""
+        """Stop the current processing: running queries are interrupted and what was written is saved"""
         self.is_processing = False
-        self.update_status("Processing stopped by user.")
-        self.run_button.config(state='normal')
+        if self.engine is not None:
+            self.engine.cancel()
+        self.update_status("Stopping...")
         self.stop_button.config(state='disabled')
         self.update_progress(0, 1, "Stopped")
 
+    @staticmethod
+    def preload_engine():
+        """Import the engine in the background (a failure is reported when Run is pressed instead)"""
+        try:
+            importlib.import_module('Classes.ParserEngine')
+        except Exception:
+            pass
+
     def run_parser(self):
-        """Main parser logic with progress tracking"""
+        """Main parser logic with progress tracking (processing thread)"""
+        completed = False
+        error = None
         try:
             # Get selected artifacts
             selected_artifacts = [name for name, var in self.artifact_vars.items() if var.get()]
-            total_artifacts = len(selected_artifacts)
-            current_artifact = 0
-
-            self.update_status(f"Starting to process {total_artifacts} selected artifacts...")
-            self.update_progress(0, total_artifacts, "Initializing...")
-
-            # Define query mappings
-            chromium_queries = {
-                "History": [f'{self.profile_path}/History', chrome_history],
-                "History Gaps": [f'{self.profile_path}/History', chrome_history_gaps],
-                "Downloads": [f'{self.profile_path}/History', chrome_downloads],
-                "Downloads Gaps": [f'{self.profile_path}/History', chrome_downloads_gaps],
-                "Autofill": [f'{self.profile_path}/Web Data', chrome_autofill],
-                "Addresses": [f'{self.profile_path}/Web Data', chrome_addresses],
-                "Keywords": [f'{self.profile_path}/Web Data', chrome_keywords],
-                "Credit Cards": [f'{self.profile_path}/Web Data', chrome_masked_credit_cards],
-                "Loyalty Cards": [f'{self.profile_path}/Web Data', chrome_loyalty_cards],
-                "Bank Accounts": [f'{self.profile_path}/Web Data', chrome_masked_bank_accounts],
-                "Login Data": [f'{self.profile_path}/Login Data', chrome_login_data],
-                "Login Data Gaps": [f'{self.profile_path}/Login Data', chrome_login_data_gaps],
-                "Shortcuts": [f'{self.profile_path}/Shortcuts', chrome_shortcuts],
-                "Top Sites": [f'{self.profile_path}/Top Sites', chrome_topsites],
-                "Cookies": [f'{self.profile_path}/Network/Cookies', chrome_cookies],
-                "FavIcons": [f'{self.profile_path}/Favicons', chrome_favicons]
-            }
-
-            edge_queries = {
-                "Web Assist (Edge)": [f'{self.profile_path}/WebAssistDatabase', edge_webassist]
-            }
-
-            record_counts = []
-
-            # Process SQLite-based artifacts
-            for artifact_name in selected_artifacts:
-                if not self.is_processing:
-                    break
-
-                current_artifact += 1
-                self.update_progress(current_artifact, total_artifacts, f"Processing {artifact_name}")
-                self.update_status(f"Processing {artifact_name}...")
-
-                try:
-                    # Check if it's a chromium or edge query
-                    if artifact_name in chromium_queries:
-                        df, ws = self.get_dataframes(
-                            chromium_queries[artifact_name][0],
-                            chromium_queries[artifact_name][1]
-                        )
-                        write_excel(df, ws, self.output_path)
-                        record_counts.append((ws, len(df)))
-                        self.update_status(f"✓ {artifact_name}: {len(df)} records processed")
-
-                    elif artifact_name in edge_queries:
-                        df, ws = self.get_dataframes(
-                            edge_queries[artifact_name][0],
-                            edge_queries[artifact_name][1]
-                        )
-                        write_excel(df, ws, self.output_path)
-                        record_counts.append((ws, len(df)))
-                        self.update_status(f"✓ {artifact_name}: {len(df)} records processed")
-
-                    # Handle special cases
-                    elif artifact_name == "Search Terms":
-                        dataframe_searchterms, ws = self.process_search_terms()
-                        write_excel(dataframe_searchterms, ws, self.output_path)
-                        record_counts.append((ws, len(dataframe_searchterms)))
-                        self.update_status(f"✓ Search Terms: {len(dataframe_searchterms)} records processed")
-
-                    # Processes the different cluster options
-                    # Cluster overview
-                    # Cluster content
-                    # Cluster search term
-
-                    elif artifact_name == "History Clusters":
-                        clusters = [chrome_history_clusters_overview,
-                                    chrome_history_clusters_contents,
-                                    chrome_history_clusters_search_term,
-                                    chrome_history_clusters_timeline,
-                                    chrome_history_clusters_duplicate_visits,
-                                    chrome_history_clusters_comprehensive_export
-                                    ]
-
-                        for cluster_func in clusters:
-                            df, ws = self.get_dataframes(
-                                f'{self.profile_path}/History',
-                                cluster_func
-                            )
-                            write_excel(df, ws, self.output_path)
-                            record_counts.append((ws, len(df)))
-                            self.update_status(f"✓ {ws}: {len(df)} records processed")
-
-                    elif artifact_name == "Bookmarks":
-                        bookmarks_df, ws = self.process_bookmarks()
-                        write_excel(bookmarks_df, ws, self.output_path)
-                        record_counts.append((ws, len(bookmarks_df)))
-                        self.update_status(f"✓ Bookmarks: {len(bookmarks_df)} records processed")
-
-                    elif artifact_name == "Preferences":
-                        ws = "Preferences"
-                        temp_record_count = self.process_preferences()
-                        record_counts.append((ws, temp_record_count))
-                        self.update_status(f"✓ {ws} processed")
-
-                    elif artifact_name == "Extensions":
-                        ws = 'Extensions'
-
-                        extension_list = [[]]
-                        extensions_df = pd.DataFrame()
-                        extensions = ChromeExtensions(self.profile_path)
-                        all_extensions = extensions.get_manifest_paths()
-                        extension_count = extensions.get_extension_count()
-
-                        if extension_count == 0:
-                            extension_list = [["","","","","",""]]
-                        else:
-                            for ext_ID in all_extensions.keys():
-                                extension_list.append([
-                                    ext_ID,
-                                    extensions.get_name(ext_ID),
-                                    extensions.get_version(ext_ID),
-                                    extensions.get_description(ext_ID),
-                                    extensions.get_author(ext_ID),
-                                    extensions.get_homepage_url(ext_ID)
-                                ])
-
-                        extensions_df = pd.DataFrame(extension_list)
-
-                        extensions_df.columns = [
-                            "ID",
-                            "Name",
-                            "Version",
-                            "Description",
-                            "Author",
-                            "Homepage URL"
-                        ]
-                        write_excel(extensions_df, ws, self.output_path)
-
-                        record_counts.append((ws, extension_count))
-                        self.update_status(f"✓ {ws}: {extension_count} extensions processed")
-
-
-
-                except Exception as error:
-                    self.update_status(f"❌ Failed to process {artifact_name}")
-                    record_counts.append((artifact_name, 0))
-                    if "database is locked" in str(error):
-                        self.update_status(f"   Database file is locked. Close the browser and try again.")
-
-            if self.is_processing:
-                # Create summary
-                self.update_status("Creating summary worksheet...")
-                summary_df = pd.DataFrame(record_counts, columns=["Worksheet Name", "Record Count"])
-
-                #Adding script version to this worksheet
-                version = pd.DataFrame(
-                    [
-                        ["",""],
-                        ["------------------", "---------------"],
-                        ["Script Version:", __version__],
-                    ],
-                    columns=summary_df.columns
-                )
-
-                summary_df = pd.concat([summary_df, version], ignore_index=True)
-
-                write_excel(summary_df, "Summary", self.output_path)
-
-                # Reorganize workbook
-                self.update_status("Organizing worksheets...")
-                self.reorganize_workbook()
-
-                self.update_status("✅ All processing completed successfully!")
-                self.update_status(f"📁 Output saved to: {self.output_path}")
-                self.update_progress(total_artifacts, total_artifacts, "Completed!")
-
-                # Show completion message
-                messagebox.showinfo("Success",
-                                    f"Processing completed successfully!\n\nOutput saved to:\n{self.output_path}")
-            else:
-                self.update_status("⚠ Processing was stopped by user.")
+
+            from Classes.ParserEngine import ParserEngine  # already loaded by preload_engine, unless Run was quick
+
+            # The engine reports back through update_status / update_progress and stops when Stop is pressed
+            self.engine = ParserEngine(
+                self.profile_path,
+                self.output_path,
+                artifacts=selected_artifacts,
+                snapshot=self.snapshot_var.get(),
+                on_status=self.update_status,
+                on_progress=self.update_progress,
+                should_continue=lambda: self.is_processing
+            )
+
+            completed = self.engine.run()
 
         except Exception as e:
             self.update_status(f"❌ Critical error: {str(e)}")
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
+            error = e
 
         finally:
-            # Reset UI state
-            self.is_processing = False
-            self.run_button.config(state='normal')
-            self.stop_button.config(state='disabled')
-            if not hasattr(self, 'progress_var') or self.progress_var.get() < 100:
-                self.update_progress(0, 1, "Ready to process")
-
-    def get_dataframes(self, db_file, function):
-        """Get dataframes from SQLite database"""
-        query, worksheet_name = function()
-        conn = sqlite3.connect(f'file:{db_file}?immutable=1', uri=True)
-        dataframe = pd.read_sql_query(query, conn)
-        conn.close()
-        return dataframe, worksheet_name
-
-    def process_search_terms(self):
-        """Process search terms data"""
-        worksheet = 'Search Terms'
-        input_file = f'{self.profile_path}/History'
-        df_history, ws_history = self.get_dataframes(input_file, chrome_keyword_historyquery)
-
-        input_file = f'{self.profile_path}/Web Data'
-        df_keywords, ws_keyword = self.get_dataframes(input_file, chrome_keywords)
-
-        searchterms = []
-        if len(df_keywords) > 0:
-            for row in df_history.itertuples():
-                if not np.isnan(row[3]):
-                    try:
-                        kw = [
-                            df_keywords.query(f'id == {row[3]}')['keyword'].values[0],
-                            df_keywords.query(f'id == {row[3]}')['date_created'].values[0],
-                            df_keywords.query(f'id == {row[3]}')['Decoded date_created (UTC)'].values[0],
-                            df_keywords.query(f'id == {row[3]}')['last_modified'].values[0],
-                            df_keywords.query(f'id == {row[3]}')['Decoded last_modified (UTC)'].values[0]
-                        ]
-                    except IndexError:
-                        kw = ['', '', '', '', '']
-                    searchterms.append([
-                        row[1], row[2], row[3], kw[0], row[5], row[6], kw[1], kw[2], kw[3], kw[4], row[7], row[8]
-                    ])
-        else:
-            searchterms = [["", "", "", "", "", "", "", "", "", "", "", ""]]
-
-        df_searchterms = pd.DataFrame(searchterms)
-        df_searchterms.columns = [
-            'URL id', 'url', 'keyword id', 'keyword', 'search term', 'typed_count', 'date_created',
-            'Decoded date_created (UTC)', 'last_modified', 'Decoded last_modified (UTC)',
-            'last_visit_time (UTC)', 'Decoded last_visit_time (UTC)'
-        ]
-        return df_searchterms, worksheet
-
-    def process_bookmarks(self):
-        """Process bookmarks data"""
-        ws = 'Bookmarks'
-        try:
-            bookmarks_df, ws = get_chromium_bookmarks(f'{self.profile_path}/Bookmarks')
-        except:
-            bookmarks_df = pd.DataFrame()
-
-        try:
-            bookmarks_backup_df, ws_bak = get_chromium_bookmarks(f'{self.profile_path}/Bookmarks.bak')
-        except:
-            bookmarks_backup_df = pd.DataFrame()
-
-        all_bookmarks = pd.concat([bookmarks_df, bookmarks_backup_df], ignore_index=True)
-        return all_bookmarks, ws
-
-    def process_preferences(self):
-        """Process preferences data"""
-        preferences = Preferences(f'{self.profile_path}/Preferences')
-        preferences_output = io.StringIO()
-        print(preferences, file=preferences_output)
-        preferences_data = preferences_output.getvalue().splitlines()
-        preferences_df = pd.DataFrame(preferences_data, columns=["Preferences Output"])
-        write_excel(preferences_df, "Preferences", self.output_path)
-        return len(preferences_df)
-
-
-    def reorganize_workbook(self):
-        """Reorganize the Excel workbook sheets"""
-        wb = openpyxl.load_workbook(self.output_path)
-
-        # Move important sheets to the front
-        if 'Summary' in wb.sheetnames:
-            current_index = wb.sheetnames.index(wb["Summary"].title)
-            wb.move_sheet(wb["Summary"], -current_index)
-
-        if 'Preferences' in wb.sheetnames:
-            current_index = wb.sheetnames.index(wb["Preferences"].title)
-            wb.move_sheet(wb["Preferences"], -current_index + 1)
-
-        wb.save(self.output_path)
+            # Widgets are only touched from the Tk thread
+            self.events.post_call(self.processing_finished, completed, error)
 
+    def processing_finished(self, completed, error):
+        """Report the end of a run and reset the UI state (Tk thread)"""
+        self.engine = None
+        self.is_processing = False
+        self.run_button.config(state='normal')
+        self.stop_button.config(state='disabled')
+        if not hasattr(self, 'progress_var') or self.progress_var.get() < 100:
+            self.show_progress(0, 1, "Ready to process")
+
+        if completed:
+            # Show completion message
+            messagebox.showinfo("Success",
+                                f"Processing completed successfully!\n\nOutput saved to:\n{self.output_path}")
+        elif error is not None:
+            messagebox.showerror("Error", f"An error occurred: {str(error)}")
 
 if __name__ == '__main__':
     # Create and configure the main window